@@ -1,3 +1,4 @@
+from .job_manager import JobManager
 from .utils.db import _conn
 
 TEST_JOB_ID = 123
@@ -7,10 +8,9 @@ TEST_JOB_TITLE = "Test Job From Script"
 print(f"Attempting to insert test job with ID: {TEST_JOB_ID}")
 
 try:
+    # Спочатку видаляємо, щоб скрипт можна було запускати багато разів
+    JobManager().delete_job(TEST_JOB_ID)
     with _conn() as cx:
-        # Спочатку видаляємо, щоб скрипт можна було запускати багато разів
-        cx.execute("DELETE FROM jobs WHERE id = ?", (TEST_JOB_ID,))
-        
         # Вставляємо новий тестовий запис
         cx.execute(
             "INSERT INTO jobs (id, url, title, status) VALUES (?, ?, ?, ?)",
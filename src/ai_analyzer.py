@@ -1,31 +1,75 @@
 """AI analysis for job relevance using Azure OpenAI."""
 import os
 import json
-import re
-from openai import AzureOpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-def clean_json_response(response: str) -> str:
-    """Clean markdown formatting from JSON response."""
-    # Remove markdown code blocks
-    response = re.sub(r'```json\n?', '', response)
-    response = re.sub(r'```\n?', '', response)
-    response = response.strip()
-    return response
+try:
+    from .llm_client import get_llm_client
+    from .llm_dispatcher import get_dispatcher
+    from .prompt_builder import build_messages
+    from .structured_output import StructuredOutputError, complete_json
+    from .token_budget import BATCH_JOB_TOKENS, JOB_DESCRIPTION_TOKENS, compress_job_text, fit_job_description, split_budget
+    from .utils.ai_cache import get_ai_cache, hash_text
+    from .local_ranker import log_shadow_stats, prefilter_jobs, prefilter_settings
+except ImportError:
+    from llm_client import get_llm_client
+    from llm_dispatcher import get_dispatcher
+    from prompt_builder import build_messages
+    from structured_output import StructuredOutputError, complete_json
+    from token_budget import BATCH_JOB_TOKENS, JOB_DESCRIPTION_TOKENS, compress_job_text, fit_job_description, split_budget
+    from utils.ai_cache import get_ai_cache, hash_text
+    from local_ranker import log_shadow_stats, prefilter_jobs, prefilter_settings
+
+# The relevance analyzer runs against its own deployment/API version
+# (ANALYZER_ENDPOINT overrides it, e.g. to point at the local LLM stub)
+ANALYZER_ENDPOINT = os.getenv("ANALYZER_ENDPOINT", "https://elvarika.openai.azure.com")
+ANALYZER_API_VERSION = "2024-12-01-preview"
+
+RELEVANCE_CACHE_NAMESPACE = "relevance"
+# Bump when the relevance prompt or reply schema changes, so older cached scores aren't reused
+RELEVANCE_PROMPT_VERSION = "relevance-v1"
+
+# Shared by single and batched scoring so both reuse the same cached prompt prefix
+RELEVANCE_INSTRUCTIONS = """
+You screen job postings for a job seeker. For each posting, score its relevance
+to the candidate below from 0 to 100, list concrete match reasons and concerns,
+and recommend APPLY, REVIEW or SKIP. Respond in JSON.
+"""
+
+def _cache_keys(job_title: str, job_description: str, user_skills: str) -> Tuple[str, str]:
+    """(profile hash, job content hash) for the relevance cache.
+
+    The profile part also covers the prompt version and the model, so a
+    changed prompt or deployment scores jobs afresh.
+    """
+    model = os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4")
+    return hash_text(RELEVANCE_PROMPT_VERSION, model, user_skills), hash_text(job_title, job_description)
 
 def analyze_job_relevance(job_title: str, job_description: str, user_skills: str) -> dict:
-    """Analyze if job is relevant for the user."""
-    client = AzureOpenAI(
-        azure_endpoint="https://elvarika.openai.azure.com",
-        api_key=os.getenv("OPENAI_KEY"),
-        api_version="2024-12-01-preview"
-    )
+    """Analyze if job is relevant for the user.
+    
+    Results are cached per (skills, job text) and reused until either changes.
+    """
+    cache = get_ai_cache()
+    profile_hash, content_hash = _cache_keys(job_title, job_description, user_skills)
+    if cache:
+        cached = cache.get(RELEVANCE_CACHE_NAMESPACE, profile_hash, content_hash)
+        if cached is not None:
+            return cached
     
-    prompt = f"""
-    Analyze this job posting for relevance to a candidate with these skills: {user_skills}
+    result, ok = _request_job_relevance(job_title, job_description, user_skills)
+    if ok and cache:
+        cache.put(RELEVANCE_CACHE_NAMESPACE, profile_hash, content_hash, result)
+    return result
+
+def _request_job_relevance(job_title: str, job_description: str, user_skills: str) -> Tuple[dict, bool]:
+    """Score one job with the LLM; returns (result, ok) where ok is False for fallbacks."""
+    request = f"""
     Job Title: {job_title}
-    Job Description: {job_description[:2000]}
+    Job Description: {fit_job_description(job_description, JOB_DESCRIPTION_TOKENS)}
     
-    Respond with ONLY valid JSON, no markdown formatting:
+    Respond in JSON:
     {{
         "relevance_score": 85,
         "is_relevant": true,
@@ -36,25 +80,186 @@ def analyze_job_relevance(job_title: str, job_description: str, user_skills: str
     """
     
     try:
-        response = client.chat.completions.create(
+        result = complete_json(
+            "job_relevance", build_messages(RELEVANCE_INSTRUCTIONS, f"Skills: {user_skills}", request),
+            ANALYZER_ENDPOINT, ANALYZER_API_VERSION,
             model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-            messages=[{"role": "user", "content": prompt}],
             temperature=0.1
         )
+        return result, True
         
-        raw_response = response.choices[0].message.content
-        cleaned_response = clean_json_response(raw_response)
-        
-        result = json.loads(cleaned_response)
-        return result
-        
-    except json.JSONDecodeError as e:
+    except StructuredOutputError as e:
         print(f"JSON parsing error: {e}")
-        print(f"Raw response: {raw_response[:200]}...")
-        return {"relevance_score": 0, "is_relevant": False, "recommendation": "SKIP"}
+        return error_result(e), False
     except Exception as e:
         print(f"AI analysis error: {e}")
-        return {"relevance_score": 0, "is_relevant": False, "recommendation": "SKIP"}
+        return error_result(e), False
+
+DEFAULT_BATCH_SIZE = 10
+SKIP_RESULT = {"relevance_score": 0, "is_relevant": False, "recommendation": "SKIP"}
+
+def error_result(error: Exception) -> dict:
+    """SKIP-shaped result for a job that could not be scored; the "error" key tells it
+    apart from a real low score, so callers can retry the job instead of dropping it."""
+    return {**SKIP_RESULT, "error": str(error)}
+
+def _match_batch_results(parsed: Dict[str, Any], job_ids: List[str]) -> Optional[Dict[str, dict]]:
+    """Index a batch reply as {job_id: result}; None if any job is missing."""
+    by_id = {str(item.get("job_id")): item for item in parsed.get("results", [])}
+    if set(job_ids) - set(by_id):
+        return None
+    return by_id
+
+def _cache_batch_results(batch: List[Tuple[str, Dict[str, Any]]], results: Dict[str, dict], user_skills: str):
+    cache = get_ai_cache()
+    if not cache:
+        return
+    for job_id, job in batch:
+        profile_hash, content_hash = _cache_keys(job.get("title", ""), job.get("description") or "", user_skills)
+        result = dict(results[job_id])
+        result.pop("job_id", None)
+        cache.put(RELEVANCE_CACHE_NAMESPACE, profile_hash, content_hash, result)
+
+def _score_batch(batch: List[Tuple[str, Dict[str, Any]]], user_skills: str) -> Dict[str, dict]:
+    """Score one packed batch; split it in half and retry on malformed or incomplete output.
+
+    Transport and dispatcher errors (rate limits, timeouts, auth) propagate:
+    splitting would only multiply the failing requests.
+    """
+    if len(batch) == 1:
+        job_id, job = batch[0]
+        result, ok = _request_job_relevance(job.get("title", ""), job.get("description") or "", user_skills)
+        if ok:
+            _cache_batch_results(batch, {job_id: result}, user_skills)
+        return {job_id: result}
+    
+    # One token budget for the whole batch; short postings leave room for long ones
+    descriptions = [compress_job_text(job.get("description") or "") for _, job in batch]
+    budgets = split_budget(descriptions, BATCH_JOB_TOKENS * len(batch))
+    jobs_text = "\n\n".join(
+        f"### job_id: {job_id}\nJob Title: {job.get('title', '')}\n"
+        f"Job Description: {fit_job_description(description, budget)}"
+        for (job_id, job), description, budget in zip(batch, descriptions, budgets)
+    )
+    
+    request = f"""
+    Score each of the following {len(batch)} job postings.
+    
+    {jobs_text}
+    
+    Respond in JSON, with exactly one entry in "results" per job_id:
+    {{
+        "results": [
+            {{
+                "job_id": "0",
+                "relevance_score": 85,
+                "is_relevant": true,
+                "match_reasons": ["reason1", "reason2"],
+                "concerns": ["concern1"],
+                "recommendation": "APPLY"
+            }}
+        ]
+    }}
+    """
+    
+    try:
+        reply = complete_json(
+            "job_relevance_batch", build_messages(RELEVANCE_INSTRUCTIONS, f"Skills: {user_skills}", request),
+            ANALYZER_ENDPOINT, ANALYZER_API_VERSION,
+            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
+            temperature=0.1
+        )
+        parsed = _match_batch_results(reply, [job_id for job_id, _ in batch])
+    except StructuredOutputError as e:
+        print(f"Batch AI analysis error: {e}")
+        parsed = None
+    
+    if parsed is not None:
+        _cache_batch_results(batch, parsed, user_skills)
+        return {job_id: parsed[job_id] for job_id, _ in batch}
+    
+    print(f"⚠️ Malformed batch output for {len(batch)} jobs, splitting and retrying")
+    middle = len(batch) // 2
+    results = _score_batch(batch[:middle], user_skills)
+    results.update(_score_batch(batch[middle:], user_skills))
+    return results
+
+def analyze_jobs_relevance_batch(jobs: List[Dict[str, Any]], user_skills: str,
+                                 batch_size: int = DEFAULT_BATCH_SIZE) -> List[dict]:
+    """Score many jobs against one candidate profile, K jobs per LLM request.
+    
+    Each job needs 'title' and 'description'. Returns one result per job, in
+    input order, with the same shape as `analyze_job_relevance`. Jobs whose
+    request failed (outage, rate limit, unparseable reply) carry an "error" key. The skills
+    prompt is sent once per batch instead of once per job; batches whose
+    output can't be parsed are split in half and retried down to single jobs.
+    """
+    indexed = [(str(i), job) for i, job in enumerate(jobs)]
+    results = {}
+    
+    # Only jobs without a cached result for this profile go to the LLM
+    cache = get_ai_cache()
+    misses = []
+    for job_id, job in indexed:
+        cached = None
+        if cache:
+            profile_hash, content_hash = _cache_keys(job.get("title", ""), job.get("description") or "", user_skills)
+            cached = cache.get(RELEVANCE_CACHE_NAMESPACE, profile_hash, content_hash)
+        if cached is not None:
+            results[job_id] = cached
+        else:
+            misses.append((job_id, job))
+    
+    if cache and len(misses) < len(indexed):
+        print(f"♻️ Reused {len(indexed) - len(misses)}/{len(indexed)} cached relevance scores")
+    
+    def score(batch):
+        try:
+            return _score_batch(batch, user_skills)
+        except Exception as e:
+            print(f"AI analysis error: {e}")
+            return {job_id: error_result(e) for job_id, _ in batch}
+    
+    # Batches are independent, so they run concurrently up to the dispatcher's limits
+    batch_size = max(batch_size, 1)
+    batches = [misses[start:start + batch_size] for start in range(0, len(misses), batch_size)]
+    if len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(batches), get_dispatcher().max_concurrency)) as pool:
+            for batch_results in pool.map(score, batches):
+                results.update(batch_results)
+    elif batches:
+        results.update(score(batches[0]))
+    
+    ordered = []
+    for job_id, _ in indexed:
+        result = dict(results.get(job_id, SKIP_RESULT))
+        result.pop("job_id", None)
+        ordered.append(result)
+    return ordered
+
+def analyze_jobs_relevance_ranked(jobs: List[Dict[str, Any]], user_skills: str, config: Optional[Dict[str, Any]] = None,
+                                  min_relevance: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+                                  skill_vector=None) -> List[dict]:
+    """`analyze_jobs_relevance_batch` behind the local BM25 pre-filter.
+    
+    `config` is the search/user config; its `prefilter` block decides how many
+    jobs reach the LLM (see local_ranker; `skill_vector` is the user's compiled
+    vector for the "vector" method). Jobs cut locally get a SKIP result
+    carrying their `prefilter_score`. In shadow mode every job is still scored
+    and the would-be cuts are compared against `min_relevance` and logged.
+    """
+    settings = prefilter_settings(config)
+    kept, cut = prefilter_jobs(jobs, user_skills, settings, skill_vector)
+    
+    analyses = analyze_jobs_relevance_batch(kept, user_skills, batch_size) if kept else []
+    by_job = {id(job): analysis for job, analysis in zip(kept, analyses)}
+    for job in cut:
+        by_job[id(job)] = {**SKIP_RESULT, "prefilter_score": job["prefilter_score"], "skipped_by": "prefilter"}
+    
+    results = [by_job[id(job)] for job in jobs]
+    if settings.get("enabled") and settings.get("shadow_mode"):
+        log_shadow_stats(jobs, results, min_relevance)
+    return results
 
 if __name__ == "__main__":
     # Test with sample data
@@ -67,15 +272,8 @@ if __name__ == "__main__":
 
 
 def get_azure_client():
-    """Get Azure OpenAI client."""
-    from openai import AzureOpenAI
-    import os
-    
-    return AzureOpenAI(
-        azure_endpoint="https://elvarika.openai.azure.com",
-        api_key=os.getenv("OPENAI_KEY"),
-        api_version="2024-12-01-preview"
-    )
+    """Get the shared Azure OpenAI client."""
+    return get_llm_client(ANALYZER_ENDPOINT, ANALYZER_API_VERSION)
 
 # Command line interface for n8n  
 if __name__ == "__main__":
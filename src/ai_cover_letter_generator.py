@@ -1,19 +1,26 @@
 """AI-powered cover letter generator for individual job applications."""
-import os
 import json
-from datetime import datetime
+import os
+import threading
 from pathlib import Path
 from typing import Dict, Any
-from openai import AzureOpenAI
+try:
+    from .letter_templates import agenerate_letter
+    from .pdf_renderer import submit_pdf
+    from .token_budget import COVER_LETTER_JOB_TOKENS, fit_job_description
+    from .utils.blob_store import get_blob_store
+except ImportError:
+    from letter_templates import agenerate_letter
+    from pdf_renderer import submit_pdf
+    from token_budget import COVER_LETTER_JOB_TOKENS, fit_job_description
+    from utils.blob_store import get_blob_store
+
+# Render path -> blob digest of PDFs already moved into the blob store. Callers that
+# shared one render (same letter) attach the same blob after the file left PDF_DIR.
+_filed_pdfs: Dict[str, str] = {}
+_filed_pdfs_lock = threading.Lock()
 
 class AICoverLetterGenerator:
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-            api_key=os.getenv("OPENAI_KEY"),
-            api_version="2024-05-01-preview"
-        )
-    
     def load_user_prompt(self, username: str) -> str:
         """Load user's custom prompt for cover letter generation."""
         prompt_file = Path(f"~/jobbot/data/users/{username}/cover_letter_prompt.txt").expanduser()
@@ -57,53 +64,29 @@ class AICoverLetterGenerator:
             # Load user's custom prompt
             user_prompt = self.load_user_prompt(username)
             
-            # Prepare job and resume data
+            # Prepare job data
             job_title = job_data.get('title', '')
             company = job_data.get('company', '')
-            job_description = job_data.get('description', '')[:2000]  # Limit length
+            job_description = fit_job_description(job_data.get('description', ''), COVER_LETTER_JOB_TOKENS)
             
-            # Extract key resume info
-            resume_summary = user_resume.get('comprehensive_summary', '')
-            experience = user_resume.get('all_work_experience', [])
-            skills = user_resume.get('comprehensive_skills', {})
-            
-            # Build the complete prompt
-            complete_prompt = f"""
-{user_prompt}
+            # Instructions and resume are identical for every job of this user: their
+            # paragraphs are generated once (letter_templates); only the job delta is per request
+            instructions = f"""
+Ти експерт з написання cover letters на норвезькій мові.
 
+{user_prompt}
+"""
+            job_request = f"""
 ВАКАНСІЯ:
 Назва: {job_title}
 Компанія: {company}
 Опис: {job_description}
-
-РЕЗЮМЕ КОРИСТУВАЧА:
-Профіль: {resume_summary}
-
-Досвід роботи:
-{self._format_experience(experience[:3])}  # Top 3 experiences
-
-Навички:
-Технічні: {', '.join(skills.get('technical', [])[:10])}
-М'які навички: {', '.join(skills.get('soft_skills', [])[:5])}
-Мови: {self._format_languages(skills.get('languages', []))}
-
-ЗАВДАННЯ:
-Створи унікальний cover letter для цієї конкретної вакансії.
-Поверни ТІЛЬКИ текст cover letter (без заголовків чи форматування).
 """
 
-            response = self.client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-                messages=[
-                    {"role": "system", "content": "Ти експерт з написання cover letters на норвезькій мові."},
-                    {"role": "user", "content": complete_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
+            cover_letter_text, template_reused = await agenerate_letter(
+                instructions, self._format_resume(user_resume), job_request
             )
             
-            cover_letter_text = response.choices[0].message.content.strip()
-            
             # Save to file
             cover_letter_path = self._save_cover_letter(username, job_data, cover_letter_text)
             
@@ -114,7 +97,8 @@ class AICoverLetterGenerator:
                 "cover_letter": cover_letter_text,
                 "file_path": cover_letter_path,
                 "word_count": len(cover_letter_text.split()),
-                "language": "norwegian"
+                "language": "norwegian",
+                "template_reused": template_reused
             }
             
         except Exception as e:
@@ -126,6 +110,23 @@ class AICoverLetterGenerator:
                 "file_path": ""
             }
     
+    def _format_resume(self, user_resume: Dict[str, Any]) -> str:
+        """Resume section of the prompt; depends only on the resume, never on the job."""
+        experience = user_resume.get('all_work_experience', [])
+        skills = user_resume.get('comprehensive_skills', {})
+        return f"""
+РЕЗЮМЕ КОРИСТУВАЧА:
+Профіль: {user_resume.get('comprehensive_summary', '')}
+
+Досвід роботи:
+{self._format_experience(experience[:3])}
+
+Навички:
+Технічні: {', '.join(skills.get('technical', [])[:10])}
+М'які навички: {', '.join(skills.get('soft_skills', [])[:5])}
+Мови: {self._format_languages(skills.get('languages', []))}
+"""
+    
     def _format_experience(self, experiences: list) -> str:
         """Format work experience for prompt."""
         formatted = []
@@ -147,24 +148,12 @@ class AICoverLetterGenerator:
     
     def _save_cover_letter(self, username: str, job_data: Dict[str, Any], 
                           cover_letter: str) -> str:
-        """Save cover letter to file."""
+        """Save cover letter to the blob store, referenced by (user, job)."""
         try:
-            # Create filename
-            job_title = job_data.get('title', 'job').replace(' ', '_').replace('/', '_')
-            company = job_data.get('company', 'company').replace(' ', '_').replace('/', '_')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            filename = f"cover_letter_{job_title}_{company}_{timestamp}.txt"
-            
-            # Save path
-            letters_dir = Path(f"~/jobbot/data/users/{username}/letters").expanduser()
-            letters_dir.mkdir(parents=True, exist_ok=True)
-            file_path = letters_dir / filename
-            
-            # Write file
-            file_path.write_text(cover_letter, encoding='utf-8')
-            
+            file_path = get_blob_store().store(cover_letter, username, job_data, 'cover_letter',
+                                               ext='.txt', kind='letter')
             print(f"💾 Saved cover letter: {file_path}")
-            return str(file_path)
+            return file_path
             
         except Exception as e:
             print(f"❌ Error saving cover letter: {e}")
@@ -183,53 +172,22 @@ class AICoverLetterGenerator:
             return False
     
     def generate_pdf_cover_letter(self, username: str, job_data: Dict[str, Any], 
-                                cover_letter_text: str) -> str:
-        """Generate PDF version of cover letter."""
+                                cover_letter_text: str, wait: bool = True) -> str:
+        """PDF version of the cover letter, filed in the blob store (role 'cover_letter_pdf').
+
+        Returns the blob-store path. With wait=False the render path is returned at once;
+        the file moves into the blob store when the render finishes (see `lookup`).
+        """
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-            from reportlab.lib.units import cm
-            
-            # Create filename
-            job_title = job_data.get('title', 'job').replace(' ', '_')
-            company = job_data.get('company', 'company').replace(' ', '_')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            filename = f"cover_letter_{job_title}_{company}_{timestamp}.pdf"
-            
-            # Save path
-            letters_dir = Path(f"~/jobbot/data/users/{username}/letters").expanduser()
-            letters_dir.mkdir(parents=True, exist_ok=True)
-            pdf_path = letters_dir / filename
-            
-            # Create PDF
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4,
-                                  rightMargin=2*cm, leftMargin=2*cm,
-                                  topMargin=2*cm, bottomMargin=2*cm)
-            
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-            )
-            
-            # Build PDF content
-            story = []
-            story.append(Paragraph(f"Cover Letter - {job_data.get('title', '')}", title_style))
-            story.append(Spacer(1, 12))
-            
-            # Split cover letter into paragraphs
-            paragraphs = cover_letter_text.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    story.append(Paragraph(para.strip(), styles['Normal']))
-                    story.append(Spacer(1, 12))
-            
-            doc.build(story)
-            print(f"📄 Generated PDF cover letter: {pdf_path}")
-            return str(pdf_path)
+            pdf_path, future = submit_pdf(cover_letter_text, f"Cover Letter - {job_data.get('title', '')}")
+            if not wait:
+                future.add_done_callback(lambda done: self._store_pdf(username, job_data, done))
+                return pdf_path
+            future.result()
+            pdf_path = self._store_pdf(username, job_data, future)
+            if pdf_path:
+                print(f"📄 Generated PDF cover letter: {pdf_path}")
+            return pdf_path
             
         except ImportError:
             print("⚠️ ReportLab not installed. Install with: pip install reportlab")
@@ -238,6 +196,29 @@ class AICoverLetterGenerator:
             print(f"❌ Error generating PDF: {e}")
             return ""
 
+    def _store_pdf(self, username: str, job_data: Dict[str, Any], future) -> str:
+        """Move a finished render into the blob store and reference it; returns the blob path.
+
+        The PDF_DIR link is removed afterwards, so the blob store holds the only copy
+        and `gc` frees it once the job is released.
+        """
+        if future.cancelled() or future.exception() is not None:
+            return ""  # logged by the render service
+        rendered = future.result()
+        try:
+            blobs = get_blob_store()
+            with _filed_pdfs_lock:
+                if os.path.exists(rendered):
+                    digest, _ = blobs.put_file(rendered, kind='pdf')
+                    _filed_pdfs[rendered] = digest
+                    os.unlink(rendered)
+                digest = _filed_pdfs[rendered]
+            blobs.attach(username, job_data, 'cover_letter_pdf', digest)
+            return str(blobs.path(digest, '.pdf'))
+        except Exception as e:
+            print(f"⚠️ Could not index PDF: {e}")
+            return ""
+
 if __name__ == "__main__":
     generator = AICoverLetterGenerator()
     print("✅ AI Cover Letter Generator created")
@@ -1,25 +1,65 @@
 """AI-powered form analyzer for job application forms."""
 import os
 import json
-import base64
-from typing import Dict, List, Any
-from openai import AzureOpenAI
+from typing import Dict, List, Any, Optional
+try:
+    from .structured_output import StructuredOutputError, acomplete_json
+    from .token_budget import FORM_HTML_TOKENS, truncate_tokens
+    from .utils.ai_cache import get_ai_cache, hash_text
+    from .utils.form_structure import (bind_positions, detect_ats, distill_html, form_schema_text, form_signature,
+                                       locate_frames, rebind_selectors, schema_fields)
+    from .utils.screenshots import vision_data_url
+except ImportError:
+    from structured_output import StructuredOutputError, acomplete_json
+    from token_budget import FORM_HTML_TOKENS, truncate_tokens
+    from utils.ai_cache import get_ai_cache, hash_text
+    from utils.form_structure import (bind_positions, detect_ats, distill_html, form_schema_text, form_signature,
+                                      locate_frames, rebind_selectors, schema_fields)
+    from utils.screenshots import vision_data_url
+
+# One namespace per ATS vendor, so the AI cache reports hit rates per vendor
+FORM_CACHE_PREFIX = "form_analysis:"
+
+def form_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """{vendor: hits, misses, entries, hit_rate} of the form-structure cache."""
+    cache = get_ai_cache()
+    if not cache:
+        return {}
+    return {namespace[len(FORM_CACHE_PREFIX):]: counters for namespace, counters in cache.stats().items()
+            if namespace.startswith(FORM_CACHE_PREFIX)}
 
 class AIFormAnalyzer:
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-            api_key=os.getenv("OPENAI_KEY"),
-            api_version="2024-05-01-preview"
-        )
-    
     async def analyze_application_form(self, screenshot_path: str, html_content: str, 
-                                     job_title: str, company: str) -> Dict[str, Any]:
-        """Analyze job application form and return filling instructions."""
+                                     job_title: str, company: str, page_url: str = "",
+                                     form_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze job application form and return filling instructions.
+
+        The model gets the distilled form schema (`distill_form(page)` when the caller
+        has the live page, else distilled from html_content) rather than raw HTML.
+        Forms whose field structure was analyzed before (same ATS form) reuse that
+        mapping without a vision call, with selectors re-bound to this form's fields.
+        """
+        model = os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4")
+        cache = get_ai_cache()
+        form_schema = form_schema or distill_html(html_content, page_url)
+        signature = form_signature(schema_fields(form_schema))
+        namespace = FORM_CACHE_PREFIX + detect_ats(html_content, page_url)
+        model_hash = hash_text(model)
+        if cache and signature:
+            cached = cache.get(namespace, model_hash, signature)
+            if cached is not None:
+                print(f"♻️ Reused {namespace[len(FORM_CACHE_PREFIX):]} form mapping for {job_title} at {company}")
+                return locate_frames(rebind_selectors(cached, form_schema), form_schema)
         
-        # Encode screenshot
-        with open(screenshot_path, "rb") as image_file:
-            screenshot_b64 = base64.b64encode(image_file.read()).decode()
+        # Encode screenshot (downscaled to the vision limits if it is a full-size original)
+        screenshot_url = vision_data_url(screenshot_path)
+        
+        if form_schema["frames"]:
+            form_section = ("Поля форми (витяг з DOM по фреймах; selector і frame готові до використання):\n"
+                            + truncate_tokens(form_schema_text(form_schema), FORM_HTML_TOKENS))
+        else:
+            # Nothing recognizable as a form control (e.g. rendered by script later): fall back to HTML
+            form_section = f"HTML код форми:\n{truncate_tokens(html_content, FORM_HTML_TOKENS)}"
         
         prompt = f"""
         Проаналізуй форму заявки на роботу і визнач як її заповнити.
@@ -27,12 +67,11 @@ class AIFormAnalyzer:
         Вакансія: {job_title}
         Компанія: {company}
         
-        HTML код форми:
-        {html_content[:3000]}...
+        {form_section}
         
         ЗАВДАННЯ:
         1. Знайди всі поля для заповнення (input, textarea, select)
-        2. Визнач селектори для кожного поля
+        2. Визнач селектори для кожного поля (і frame, якщо поле у фреймі)
         3. Знайди поля для завантаження файлів (CV, Cover Letter)
         4. Знайди чекбокси та радіо-кнопки
         5. Знайди кнопку відправки
@@ -47,7 +86,8 @@ class AIFormAnalyzer:
                     "label": "Field label",
                     "required": true/false,
                     "placeholder": "placeholder text",
-                    "suggested_value": "what to fill based on field type"
+                    "suggested_value": "what to fill based on field type",
+                    "frame": "frame path from the field list (main if not in an iframe)"
                 }}
             ],
             "submit_button": {{
@@ -65,51 +105,38 @@ class AIFormAnalyzer:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-                messages=[
+            result = await acomplete_json(
+                "form_analysis",
+                [
                     {
                         "role": "user", 
                         "content": [
                             {"type": "text", "text": prompt},
                             {
                                 "type": "image_url",
-                                "image_url": {"url": f"data:image/png;base64,{screenshot_b64}"}
+                                "image_url": {"url": screenshot_url}
                             }
                         ]
                     }
                 ],
+                model=model,
                 temperature=0.1,
                 max_tokens=2000
             )
             
-            raw_response = response.choices[0].message.content
-            
-            # Clean and parse JSON
-            clean_response = self._clean_json_response(raw_response)
-            result = json.loads(clean_response)
-            
             print(f"✅ AI analyzed form for {job_title} at {company}")
-            return result
+            if cache and signature:
+                cache.put(namespace, model_hash, signature, bind_positions(result, form_schema))
+            return locate_frames(result, form_schema)
             
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             print(f"❌ JSON parsing error: {e}")
-            print(f"Raw response: {raw_response[:200]}...")
             return self._get_fallback_analysis()
             
         except Exception as e:
             print(f"❌ AI form analysis error: {e}")
             return self._get_fallback_analysis()
     
-    def _clean_json_response(self, response: str) -> str:
-        """Clean markdown formatting from JSON response."""
-        response = response.strip()
-        if response.startswith('```json'):
-            response = response[7:]
-        if response.endswith('```'):
-            response = response[:-3]
-        return response.strip()
-    
     def _get_fallback_analysis(self) -> Dict[str, Any]:
         """Return fallback analysis if AI fails."""
         return {
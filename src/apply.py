@@ -8,12 +8,13 @@ import asyncio
 from pathlib import Path
 from typing import Optional
 
+from .job_manager import JobManager
+from .letter_generator import load_letter
 from .utils.db import get_job, update_status
 from playwright.async_api import async_playwright, Page
 
 # --- Config ---
 DATA_DIR = Path("/app/data")
-LETTERS_DIR = DATA_DIR / "letters"
 RESUME_PDF = DATA_DIR / "attachments" / "resume.pdf"
 ADAPTERS_DIR = Path("src/utils/adapters")
 
@@ -75,15 +76,16 @@ async def main(job_id: int) -> None:
     job = get_job(job_id)
     if not job: raise RuntimeError(f"job_id {job_id} not found in DB")
 
-    letter_path = LETTERS_DIR / f"{job_id}.txt"
-    if not letter_path.exists(): raise RuntimeError(f"Letter file {letter_path} missing")
+    # Letters are kept in the blob store by save_letter (letter_generator)
+    letter_text = load_letter(job_id)
+    if not letter_text: raise RuntimeError(f"Letter for job {job_id} missing")
     
-    letter_text = letter_path.read_text(encoding="utf-8")
     fn_number = os.getenv("FN_NUMBER")
     
     try:
         await submit_application(job["url"], letter_text, fn_number)
-        update_status(job_id, "APPLIED_DIRECT (simulated)")
+        # Final status: the letter and screenshots are released for blob-store gc
+        JobManager().archive_job(job_id, "APPLIED_DIRECT (simulated)")
         print(f"[OK] Applied for job {job_id}")
     except Exception as e:
         print(f"[ERROR] job {job_id}: {e}", file=sys.stderr)
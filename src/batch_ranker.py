@@ -0,0 +1,63 @@
+"""Rank one shared batch of postings against every user at once.
+
+Each user's workflow used to scrape and score the same postings on its own,
+so local scoring cost grew with users x postings. Here every unique posting
+(deduplicated with utils.job_identity) is vectorized once, all users'
+compiled skill vectors are stacked into a matrix, and a single product
+gives the users x jobs similarity matrix:
+
+    scores = U @ J.T        U: users x dim, J: jobs x dim (see skill_vectors)
+
+Each user then gets only their top-K postings (above `min_similarity`) for
+LLM confirmation.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    from .skill_vectors import VECTOR_DIM, job_matrix
+    from .utils.job_identity import dedup_jobs
+except ImportError:
+    from skill_vectors import VECTOR_DIM, job_matrix
+    from utils.job_identity import dedup_jobs
+
+DEFAULT_TOP_K = 25
+DEFAULT_MIN_SIMILARITY = 0.1
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k best scores in each row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=int)
+    # argpartition is O(n) per row; only the k survivors get sorted
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+def rank_users_jobs(user_vectors: Dict[str, np.ndarray], jobs: List[Dict[str, Any]],
+                    top_k: int = DEFAULT_TOP_K,
+                    min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Dict[str, List[Dict[str, Any]]]:
+    """{username: top-K job copies with `prefilter_score`} for every user vector."""
+    if not user_vectors:
+        return {}
+    unique = dedup_jobs(list(jobs))
+    users = list(user_vectors)
+    if not unique:
+        return {user: [] for user in users}
+
+    matrix = job_matrix(unique)  # each unique posting embedded once
+    profiles = np.vstack([np.asarray(user_vectors[user], dtype=np.float32).reshape(VECTOR_DIM) for user in users])
+    scores = np.clip(profiles @ matrix.T, 0.0, 1.0)
+
+    best = top_k_indices(scores, top_k)
+    ranked = {}
+    for row, user in enumerate(users):
+        ranked[user] = [
+            {**unique[col], "prefilter_score": round(float(scores[row, col]), 4)}
+            for col in best[row]
+            if scores[row, col] >= min_similarity
+        ]
+    print(f"🧮 Batch ranking: {len(unique)} unique postings x {len(users)} users, "
+          f"{sum(len(jobs) for jobs in ranked.values())} candidates for LLM confirmation")
+    return ranked
@@ -0,0 +1,154 @@
+"""End-to-end timing of the AI pipeline against the local LLM stub.
+
+Starts `llm_stub_server` in-process, points every AI module at it and runs
+the real code paths: relevance scoring (one call per job and batched),
+cover letters, form analysis and resume analysis + merge. Each phase is
+repeated for every dispatcher concurrency level, so the effect of
+concurrency, 429 back-off and JSON repair can be measured without spending
+API quota.
+
+    docker exec jobbot python -m src.benchmark_ai_pipeline --jobs 20 --latency 0.5 --concurrency 1,4,8
+    docker exec jobbot python -m src.benchmark_ai_pipeline --capacity 4 --malformed-rate 0.1
+"""
+import argparse
+import asyncio
+import os
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .llm_stub_server import StubState, start_stub_server
+
+SKILLS = "Lager, truck T1-T4, plukk og pakk, kundeservice, norsk, engelsk"
+
+RESUME = {
+    "comprehensive_summary": "Erfaren lagermedarbeider med kundeservicebakgrunn.",
+    "all_work_experience": [{"company": "Lager AS", "position": "Lagermedarbeider", "period": "2020-2024"}],
+    "comprehensive_skills": {"technical": ["truck T1-T4", "WMS"], "soft_skills": ["teamwork"],
+                             "languages": [{"language": "Norsk", "spoken": "flytende"}]},
+}
+
+RESUME_TEXT = "Test Kandidat\nLagermedarbeider, Lager AS 2020-2024\nTruckførerbevis T1-T4\n" * 10
+
+FORM_HTML = """<form><label>Navn <input name="name"></label><label>E-post <input type="email"></label>
+<button type="submit">Send søknad</button></form>"""
+
+def make_jobs(count: int):
+    text = "Vi søker en strukturert lagermedarbeider. Du har truckførerbevis og liker kundekontakt.\n"
+    return [
+        {"job_id": f"bench-{i}", "title": f"Lagermedarbeider {i}", "company": f"Firma {i % 5} AS",
+         "description": f"Stilling nr. {i}.\n" + text * 8, "url": f"https://example.com/job/{i}"}
+        for i in range(count)
+    ]
+
+def write_png(path: Path):
+    """1x1 PNG for the form analyzer's screenshot input."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+    png += chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff")) + chunk(b"IEND", b"")
+    path.write_bytes(png)
+
+def run_phases(jobs, concurrency: int, screenshot: Path):
+    """Run every phase once; returns [(name, calls, seconds)]."""
+    from .ai_analyzer import analyze_job_relevance, analyze_jobs_relevance_batch
+    from .ai_cover_letter_generator import AICoverLetterGenerator
+    from .ai_form_analyzer import AIFormAnalyzer
+    from .resume_analyzer import ResumeAnalyzer
+
+    timings = []
+
+    def timed(name, calls, fn):
+        started = time.perf_counter()
+        fn()
+        timings.append((name, calls, time.perf_counter() - started))
+
+    def relevance_single():
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda job: analyze_job_relevance(job["title"], job["description"], SKILLS), jobs))
+
+    async def letters():
+        generator = AICoverLetterGenerator()
+        await asyncio.gather(*(generator.generate_cover_letter("bench", job, RESUME) for job in jobs))
+
+    async def forms():
+        analyzer = AIFormAnalyzer()
+        await asyncio.gather(*(analyzer.analyze_application_form(str(screenshot), FORM_HTML, job["title"], job["company"])
+                               for job in jobs))
+
+    def resumes():
+        analyzer = ResumeAnalyzer()
+        files = [f"cv_{i}.txt" for i in range(max(len(jobs) // 5, 2))]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            analyses = list(pool.map(lambda name: analyzer.analyze_single_resume(RESUME_TEXT, name), files))
+        analyzer.combine_multiple_resumes(analyses)
+
+    timed("relevance (per job)", len(jobs), relevance_single)
+    timed("relevance (batched)", len(jobs), lambda: analyze_jobs_relevance_batch(jobs, SKILLS))
+    timed("cover letters", len(jobs), lambda: asyncio.run(letters()))
+    timed("form analysis", len(jobs), lambda: asyncio.run(forms()))
+    timed("resume analysis+merge", max(len(jobs) // 5, 2) + 1, resumes)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--capacity", type=int, default=0, help="stub 429s above this many in-flight requests (0 = unlimited)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated dispatcher concurrency levels")
+    args = parser.parse_args()
+
+    state = StubState(args.latency, args.jitter, args.capacity, args.rate_limit_rate, args.malformed_rate, args.retry_after)
+    server = start_stub_server(state)
+    stub_url = f"http://127.0.0.1:{server.server_port}"
+    workdir = tempfile.mkdtemp(prefix="jobbot-bench-")
+
+    # Must be set before the AI modules are imported (ANALYZER_ENDPOINT is read at import time)
+    os.environ.update({
+        "OPENAI_ENDPOINT": stub_url, "ANALYZER_ENDPOINT": stub_url, "OPENAI_KEY": "stub",
+        "AI_CACHE_DISABLED": "1", "HOME": workdir, "BLOB_DIR": str(Path(workdir) / "blobs"),
+    })
+    from .llm_dispatcher import LLMDispatcher, set_dispatcher
+    from .structured_output import get_parse_stats, reset_parse_stats
+
+    screenshot = Path(workdir) / "form.png"
+    write_png(screenshot)
+    jobs = make_jobs(args.jobs)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    results = []
+    try:
+        for concurrency in levels:
+            dispatcher = LLMDispatcher(max_concurrency=concurrency, max_retries=8)
+            set_dispatcher(dispatcher)
+            state.reset()
+            reset_parse_stats()
+            timings = run_phases(jobs, concurrency, screenshot)
+            results.append((concurrency, timings, state.snapshot(), dispatcher.get_stats(), get_parse_stats()))
+    finally:
+        server.shutdown()
+
+    print("\n📊 AI pipeline benchmark (LLM stub)")
+    print(f"  jobs={args.jobs} latency={args.latency}s capacity={args.capacity or 'unlimited'} "
+          f"rate_limit_rate={args.rate_limit_rate} malformed_rate={args.malformed_rate}")
+    for concurrency, timings, stub, dispatch, parse in results:
+        print(f"\n  concurrency={concurrency}")
+        for name, calls, seconds in timings:
+            print(f"    {name:<24} {calls:>4} items in {seconds:6.2f}s  ({calls / seconds if seconds else 0:6.1f}/s)")
+        print(f"    stub: {stub['requests']} requests, max in flight {stub['max_in_flight']}, "
+              f"{stub['rate_limited']} x 429, {stub['malformed']} malformed")
+        print(f"    dispatcher: {dispatch['retries']} retries, {dispatch['wait_seconds']:.2f}s waiting, "
+              f"{dispatch['failed']} failed, cached tokens {dispatch['cached_token_ratio']:.0%}")
+        repaired = sum(counter["repaired"] for counter in parse.values())
+        failed = sum(counter["failed"] for counter in parse.values())
+        print(f"    structured output: {repaired} repaired, {failed} failed")
+
+if __name__ == "__main__":
+    main()
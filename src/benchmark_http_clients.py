@@ -0,0 +1,88 @@
+"""Side-by-side benchmark of sync vs async job page fetching.
+
+Serves a fake NAV search page and job pages from a local HTTP server with
+configurable latency (plus one slow outlier page), then times
+DeepJobAnalyzer (requests.Session) against AsyncDeepJobAnalyzer (httpx).
+No AI calls are made; only the fetch + parse stage is measured.
+
+    docker exec jobbot python -m src.benchmark_http_clients --jobs 20 --latency 0.3
+"""
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .deep_job_analyzer import DeepJobAnalyzer, AsyncDeepJobAnalyzer
+
+JOB_PAGE = """<html><body><h1>Lagermedarbeider {n}</h1><span class="company">Test AS</span>
+<section>{text}</section><p>Innlandet</p></body></html>"""
+
+def make_handler(jobs: int, latency: float, slow_latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/search"):
+                host = f"http://{self.headers['Host']}"
+                links = "".join(f'<a href="{host}/stilling/{i}">Job {i}</a>' for i in range(jobs))
+                body = f"<html><body>{links}</body></html>"
+            else:
+                n = int(self.path.rsplit("/", 1)[-1])
+                time.sleep(slow_latency if n == 0 else latency)
+                body = JOB_PAGE.format(n=n, text="Vi søker en strukturert medarbeider. " * 20)
+
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def run_sync(search_url: str, jobs: int) -> int:
+    analyzer = DeepJobAnalyzer(request_delay=(0, 0), max_jobs=jobs)
+    links = analyzer.get_job_links_from_search_page(search_url)
+    pages = [analyzer.fetch_full_job_description(url) for url in links[:jobs]]
+    return len([page for page in pages if page['description']])
+
+async def run_async(search_url: str, jobs: int, concurrency: int) -> int:
+    async with AsyncDeepJobAnalyzer(request_delay=(0, 0), max_jobs=jobs, max_concurrency=concurrency) as analyzer:
+        links = await analyzer.get_job_links_from_search_page(search_url)
+        pages = await asyncio.gather(*(analyzer.fetch_full_job_description(url) for url in links[:jobs]))
+        return len([page for page in pages if page['description']])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per job page")
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="seconds for the one slow page")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.jobs, args.latency, args.slow_latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    search_url = f"http://127.0.0.1:{server.server_port}/search"
+
+    try:
+        started = time.perf_counter()
+        sync_count = run_sync(search_url, args.jobs)
+        sync_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        async_count = asyncio.run(run_async(search_url, args.jobs, args.concurrency))
+        async_time = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    print("\n📊 Fetch benchmark")
+    print(f"  jobs={args.jobs} latency={args.latency}s slow_page={args.slow_latency}s concurrency={args.concurrency}")
+    print(f"  sync  (requests): {sync_count} pages in {sync_time:.2f}s")
+    print(f"  async (httpx):    {async_count} pages in {async_time:.2f}s")
+    if async_time:
+        print(f"  speedup: {sync_time / async_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
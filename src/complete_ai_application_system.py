@@ -3,17 +3,30 @@ import asyncio
 import os
 from playwright.async_api import async_playwright
 from resume_loader import create_ai_prompt, load_user_resume
-from openai import AzureOpenAI
+from prompt_builder import build_messages
+from structured_output import acomplete_json
+from token_budget import SHORT_JOB_TOKENS, fit_job_description
 
+APPLICATION_INSTRUCTIONS = """
+На основі РЕАЛЬНОГО резюме створи персональну заявку норвезькою мовою.
+
+Створи професійну заявку норвезькою мовою (150-250 слів) що:
+1. Підкреслює РЕАЛЬНИЙ досвід кандидата
+2. Показує як досвід підходить до вакансії
+3. Згадує конкретні навички з резюме
+4. Має професійний норвезький тон
+5. Персоналізована для компанії з вакансії
+
+Поверни JSON:
+{
+    "cover_letter": "повна заявка норвезькою мовою",
+    "key_skills_match": ["які навички з резюме підходять"],
+    "experience_highlight": "головний досвід що треба підкреслити",
+    "motivation": "чому цікава ця позиція"
+}
+"""
 
 class CompleteApplicationSystem:
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-            api_key=os.getenv("OPENAI_KEY"),
-            api_version="2024-05-01-preview"
-        )
-    
     async def create_personalized_application(self, job_title, company, job_description, username):
         """Create personalized application based on real resume."""
         print(f"📋 Створюємо персональну заявку для {username}")
@@ -25,46 +38,25 @@ class CompleteApplicationSystem:
         print(f"✅ Резюме завантажено: {resume_data['candidate_name']}")
         print(f"📊 Досвід: {resume_data['experience_years']} років")
         
-        # AI промпт для створення заявки
-        application_prompt = f"""
-На основі РЕАЛЬНОГО резюме створи персональну заявку норвезькою мовою.
-
+        # Інструкції + резюме однакові для всіх вакансій (кешований префікс), вакансія - в кінці
+        application_request = f"""
 ВАКАНСІЯ:
 Посада: {job_title}
 Компанія: {company}
-Опис: {job_description[:800]}
+Опис: {fit_job_description(job_description, SHORT_JOB_TOKENS)}
 
-РЕАЛЬНЕ РЕЗЮМЕ КАНДИДАТА:
-{ai_prompt}
-
-ЗАВДАННЯ:
-Створи професійну заявку норвезькою мовою (150-250 слів) що:
-1. Підкреслює РЕАЛЬНИЙ досвід кандидата
-2. Показує як досвід підходить до вакансії
-3. Згадує конкретні навички з резюме
-4. Має професійний норвезький тон
-5. Персоналізована для {company}
-
-Поверни JSON:
-{{
-    "cover_letter": "повна заявка норвезькою мовою",
-    "key_skills_match": ["які навички з резюме підходять"],
-    "experience_highlight": "головний досвід що треба підкреслити",
-    "motivation": "чому цікава ця позиція"
-}}
+Персоналізуй заявку для {company}.
 """
         
         try:
-            response = self.client.chat.completions.create(
+            result = await acomplete_json(
+                "application_letter",
+                build_messages(APPLICATION_INSTRUCTIONS, f"РЕАЛЬНЕ РЕЗЮМЕ КАНДИДАТА:\n{ai_prompt}", application_request),
                 model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-                messages=[{"role": "user", "content": application_prompt}],
                 max_tokens=1500,
                 temperature=0.7
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
-            
             # Додаємо персональні дані з резюме
             result['personal_data'] = {
                 'first_name': 'Vitalii',
@@ -38,7 +38,7 @@ class CoverLetterGenerator:
     def generate_cover_letter(self, job_title, company, job_description):
         """Generate cover letter for job application."""
         try:
-            from openai import AzureOpenAI
+            from letter_templates import generate_letter
             
             # Load user profile
             user_profile = create_ai_prompt(self.username)
@@ -48,30 +48,17 @@ class CoverLetterGenerator:
             with open(prompt_file, "r", encoding="utf-8") as f:
                 prompt_template = f.read()
             
-            # Format prompt with job details
-            formatted_prompt = prompt_template.format(
-                job_title=job_title,
-                company=company,
-                job_description=job_description,
-                user_profile=user_profile
+            # The user's prompt becomes job-independent instructions; the profile and the
+            # vacancy are passed separately so the template is reused across jobs
+            instructions = prompt_template.format(
+                job_title="(see REQUEST)",
+                company="(see REQUEST)",
+                job_description="(see REQUEST)",
+                user_profile="(see CANDIDATE PROFILE)"
             )
+            job_request = f"Job title: {job_title}\nCompany: {company}\nDescription: {job_description}"
             
-            # Generate cover letter using Azure OpenAI
-            client = AzureOpenAI(
-                azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-                api_key=os.getenv("OPENAI_KEY"), 
-                api_version="2024-05-01-preview"
-            )
-            response = client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT"),
-                messages=[
-                    {"role": "user", "content": formatted_prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            cover_letter = response.choices[0].message.content
+            cover_letter, template_reused = generate_letter(instructions, user_profile, job_request)
             
             # Save cover letter
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -85,6 +72,7 @@ class CoverLetterGenerator:
             return {
                 "cover_letter": cover_letter,
                 "file_path": letter_path,
+                "template_reused": template_reused,
                 "status": "success"
             }
             
@@ -1,4 +1,5 @@
 """Deep job analysis - fetch full job descriptions and analyze relevance."""
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import time
@@ -6,15 +7,46 @@ import random
 from pathlib import Path
 import json
 from typing import List, Dict, Any
-from .ai_analyzer import analyze_job_relevance
+from .ai_analyzer import analyze_jobs_relevance_ranked
+from .token_budget import compress_job_text
+from .utils.async_http import create_async_client
 
 class DeepJobAnalyzer:
-    def __init__(self):
+    def __init__(self, request_delay: tuple = (2, 4), max_jobs: int = 10, prefilter: Dict[str, Any] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self._session = None
+        self.request_delay = request_delay
+        self.max_jobs = max_jobs
+        self.prefilter = prefilter
+    
+    @property
+    def session(self) -> requests.Session:
+        """requests session, created on first use (the async subclass never needs one)."""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+        return self._session
+    
+    def parse_job_links(self, content: bytes) -> List[str]:
+        """Extract unique job URLs from a search results page."""
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Find all job links - NAV specific
+        job_links = soup.find_all('a', href=lambda x: x and '/stilling/' in x)
+        
+        # Convert to full URLs
+        full_urls = []
+        for link in job_links:
+            href = link.get('href')
+            if href.startswith('http'):
+                full_urls.append(href)
+            else:
+                full_urls.append(f"https://arbeidsplassen.nav.no{href}")
+        
+        print(f"✅ Found {len(full_urls)} job links")
+        return list(set(full_urls))  # Remove duplicates
     
     def get_job_links_from_search_page(self, search_url: str) -> List[str]:
         """Extract all job links from search results page."""
@@ -23,22 +55,7 @@ class DeepJobAnalyzer:
             response = self.session.get(search_url, timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all job links - NAV specific
-            job_links = soup.find_all('a', href=lambda x: x and '/stilling/' in x)
-            
-            # Convert to full URLs
-            full_urls = []
-            for link in job_links:
-                href = link.get('href')
-                if href.startswith('http'):
-                    full_urls.append(href)
-                else:
-                    full_urls.append(f"https://arbeidsplassen.nav.no{href}")
-            
-            print(f"✅ Found {len(full_urls)} job links")
-            return list(set(full_urls))  # Remove duplicates
+            return self.parse_job_links(response.content)
             
         except Exception as e:
             print(f"❌ Error fetching job links: {e}")
@@ -50,83 +67,116 @@ class DeepJobAnalyzer:
             print(f"📖 Fetching job details: {job_url}")
             
             # Random delay to avoid being blocked
-            time.sleep(random.uniform(2, 4))
+            time.sleep(random.uniform(*self.request_delay))
             
             response = self.session.get(job_url, timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract job details - NAV specific selectors
-            title = ""
-            company = ""
-            description = ""
-            location = ""
-            
-            # Title
-            title_elem = (
-                soup.find('h1') or 
-                soup.find('h2') or
-                soup.find('title')
-            )
-            if title_elem:
-                title = title_elem.get_text(strip=True)
-            
-            # Company
-            company_elem = (
-                soup.find('span', class_='company') or
-                soup.find('div', class_='employer') or
-                soup.find(string=lambda x: x and 'arbeidsgiver' in x.lower())
-            )
-            if company_elem:
-                if hasattr(company_elem, 'get_text'):
-                    company = company_elem.get_text(strip=True)
-                else:
-                    company = str(company_elem).strip()
-            
-            # Description - look for main content
-            desc_elements = (
-                soup.find_all('div', class_=lambda x: x and ('description' in x.lower() or 'content' in x.lower())) or
-                soup.find_all('section') or
-                soup.find_all('div', class_=lambda x: x and 'job' in x.lower()) or
-                soup.find_all('p')
-            )
-            
-            description_parts = []
-            for elem in desc_elements:
-                text = elem.get_text(strip=True)
-                if len(text) > 50:  # Only meaningful text blocks
-                    description_parts.append(text)
-            
-            description = " ".join(description_parts)[:3000]  # Limit length
-            
-            # Location
-            location_elem = soup.find(string=lambda x: x and any(word in x.lower() for word in ['oslo', 'bergen', 'toten', 'innlandet']))
-            if location_elem:
-                location = str(location_elem).strip()
-            
-            job_data = {
-                'url': job_url,
-                'title': title,
-                'company': company,
-                'description': description,
-                'location': location,
-                'source': 'arbeidsplassen.nav.no'
-            }
-            
-            print(f"✅ Extracted: {title[:50]}...")
-            return job_data
+            return self.parse_job_page(job_url, response.content)
             
         except Exception as e:
             print(f"❌ Error fetching job {job_url}: {e}")
-            return {
-                'url': job_url,
-                'title': 'Error fetching',
-                'company': '',
-                'description': '',
-                'location': '',
-                'source': 'arbeidsplassen.nav.no'
-            }
+            return self._empty_job(job_url)
+    
+    def _empty_job(self, job_url: str) -> Dict[str, Any]:
+        return {
+            'url': job_url,
+            'title': 'Error fetching',
+            'company': '',
+            'description': '',
+            'location': '',
+            'source': 'arbeidsplassen.nav.no'
+        }
+    
+    def parse_job_page(self, job_url: str, content: bytes) -> Dict[str, Any]:
+        """Extract title, company, description and location from a job page."""
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Extract job details - NAV specific selectors
+        title = ""
+        company = ""
+        description = ""
+        location = ""
+        
+        # Title
+        title_elem = (
+            soup.find('h1') or 
+            soup.find('h2') or
+            soup.find('title')
+        )
+        if title_elem:
+            title = title_elem.get_text(strip=True)
+        
+        # Company
+        company_elem = (
+            soup.find('span', class_='company') or
+            soup.find('div', class_='employer') or
+            soup.find(string=lambda x: x and 'arbeidsgiver' in x.lower())
+        )
+        if company_elem:
+            if hasattr(company_elem, 'get_text'):
+                company = company_elem.get_text(strip=True)
+            else:
+                company = str(company_elem).strip()
+        
+        # Description - look for main content
+        desc_elements = (
+            soup.find_all('div', class_=lambda x: x and ('description' in x.lower() or 'content' in x.lower())) or
+            soup.find_all('section') or
+            soup.find_all('div', class_=lambda x: x and 'job' in x.lower()) or
+            soup.find_all('p')
+        )
+        
+        description_parts = []
+        for elem in desc_elements:
+            text = elem.get_text(strip=True)
+            if len(text) > 50:  # Only meaningful text blocks
+                description_parts.append(text)
+        
+        # Whole posting, one block per line; prompts trim it to their own token budgets
+        description = compress_job_text("\n".join(description_parts))
+        
+        # Location
+        location_elem = soup.find(string=lambda x: x and any(word in x.lower() for word in ['oslo', 'bergen', 'toten', 'innlandet']))
+        if location_elem:
+            location = str(location_elem).strip()
+        
+        job_data = {
+            'url': job_url,
+            'title': title,
+            'company': company,
+            'description': description,
+            'location': location,
+            'source': 'arbeidsplassen.nav.no'
+        }
+        
+        print(f"✅ Extracted: {title[:50]}...")
+        return job_data
+    
+    def score_jobs(self, jobs: List[Dict[str, Any]], user_skills: str, min_relevance: int) -> List[Dict[str, Any]]:
+        """Run batched AI relevance analysis on fetched jobs; return those meeting the threshold."""
+        if not jobs:
+            return []
+        
+        try:
+            analyses = analyze_jobs_relevance_ranked(jobs, user_skills, {"prefilter": self.prefilter}, min_relevance)
+        except Exception as e:
+            print(f"❌ AI analysis failed: {e}")
+            analyses = [{'error': str(e)} for _ in jobs]
+        
+        relevant_jobs = []
+        for job_data, analysis in zip(jobs, analyses):
+            relevance_score = analysis.get('relevance_score', 0)
+            job_data['relevance_score'] = relevance_score
+            job_data['ai_analysis'] = analysis
+            
+            print(f"🤖 {job_data['title'][:50]}: {relevance_score}% - {analysis.get('recommendation', 'UNKNOWN')}")
+            
+            # Add to relevant jobs if meets threshold
+            if relevance_score >= min_relevance:
+                relevant_jobs.append(job_data)
+        
+        return relevant_jobs
     
     def analyze_jobs_from_search_url(self, search_url: str, user_skills: str, min_relevance: int = 70) -> List[Dict[str, Any]]:
         """Complete analysis pipeline for jobs from search URL."""
@@ -138,11 +188,12 @@ class DeepJobAnalyzer:
             print("❌ No job links found")
             return []
         
-        # Step 2: Analyze each job
-        relevant_jobs = []
+        # Step 2: Fetch each job
+        jobs = []
+        job_links = job_links[:self.max_jobs]
         
-        for i, job_url in enumerate(job_links[:10]):  # Limit to first 10 for testing
-            print(f"\n--- Analyzing job {i+1}/{len(job_links[:10])} ---")
+        for i, job_url in enumerate(job_links):
+            print(f"\n--- Fetching job {i+1}/{len(job_links)} ---")
             
             # Fetch full job description
             job_data = self.fetch_full_job_description(job_url)
@@ -151,31 +202,85 @@ class DeepJobAnalyzer:
                 print("⚠️ No description found, skipping...")
                 continue
             
-            # AI analysis
+            jobs.append(job_data)
+        
+        # Step 3: AI analysis, several jobs per request
+        relevant_jobs = self.score_jobs(jobs, user_skills, min_relevance)
+        
+        print(f"\n🎯 Analysis complete: {len(relevant_jobs)} relevant jobs found")
+        return relevant_jobs
+
+class AsyncDeepJobAnalyzer(DeepJobAnalyzer):
+    """asyncio variant of DeepJobAnalyzer on a pooled httpx client (HTTP/2 when available).
+    
+    Job pages are fetched concurrently (up to `max_concurrency` at once), so one
+    slow detail page no longer stalls the whole run. Return shapes are the same
+    as the sync class.
+    """
+    
+    def __init__(self, request_delay: tuple = (2, 4), max_jobs: int = 10, max_concurrency: int = 4,
+                 prefilter: Dict[str, Any] = None):
+        super().__init__(request_delay, max_jobs, prefilter)
+        self.max_concurrency = max_concurrency
+        self.client = create_async_client(self.headers, max_connections=max_concurrency)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def aclose(self):
+        await self.client.aclose()
+    
+    async def get_job_links_from_search_page(self, search_url: str) -> List[str]:
+        """Extract all job links from search results page."""
+        try:
+            print(f"🔍 Fetching job links from: {search_url}")
+            response = await self.client.get(search_url)
+            response.raise_for_status()
+            
+            return self.parse_job_links(response.content)
+            
+        except Exception as e:
+            print(f"❌ Error fetching job links: {e}")
+            return []
+    
+    async def fetch_full_job_description(self, job_url: str) -> Dict[str, Any]:
+        """Fetch full job description from individual job page."""
+        async with self._semaphore:
             try:
-                analysis = analyze_job_relevance(
-                    job_data['title'],
-                    job_data['description'],
-                    user_skills
-                )
+                print(f"📖 Fetching job details: {job_url}")
                 
-                relevance_score = analysis.get('relevance_score', 0)
-                job_data['relevance_score'] = relevance_score
-                job_data['ai_analysis'] = analysis
+                # Random delay to avoid being blocked
+                await asyncio.sleep(random.uniform(*self.request_delay))
                 
-                print(f"🤖 AI Score: {relevance_score}% - {analysis.get('recommendation', 'UNKNOWN')}")
+                response = await self.client.get(job_url)
+                response.raise_for_status()
                 
-                # Add to relevant jobs if meets threshold
-                if relevance_score >= min_relevance:
-                    relevant_jobs.append(job_data)
-                    print(f"✅ Job added to relevant list!")
-                else:
-                    print(f"⏭️ Job below threshold ({min_relevance}%), skipping")
+                return self.parse_job_page(job_url, response.content)
                 
             except Exception as e:
-                print(f"❌ AI analysis failed: {e}")
-                job_data['relevance_score'] = 0
-                job_data['ai_analysis'] = {'error': str(e)}
+                print(f"❌ Error fetching job {job_url}: {e}")
+                return self._empty_job(job_url)
+    
+    async def analyze_jobs_from_search_url(self, search_url: str, user_skills: str, min_relevance: int = 70) -> List[Dict[str, Any]]:
+        """Complete analysis pipeline for jobs from search URL."""
+        print(f"🚀 Starting async deep analysis for: {search_url}")
+        
+        job_links = await self.get_job_links_from_search_page(search_url)
+        if not job_links:
+            print("❌ No job links found")
+            return []
+        
+        jobs = await asyncio.gather(*(
+            self.fetch_full_job_description(job_url) for job_url in job_links[:self.max_jobs]
+        ))
+        jobs = [job for job in jobs if job['description']]
+        
+        # AI client is blocking; keep it off the event loop
+        relevant_jobs = await asyncio.to_thread(self.score_jobs, jobs, user_skills, min_relevance)
         
         print(f"\n🎯 Analysis complete: {len(relevant_jobs)} relevant jobs found")
         return relevant_jobs
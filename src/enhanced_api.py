@@ -209,6 +209,9 @@ def get_stats():
             "total_applications": 0
         }
         
+        from utils.blob_store import get_blob_store
+        blobs = get_blob_store()
+        
         users_dir = '/app/data/users'
         if os.path.exists(users_dir):
             for username in os.listdir(users_dir):
@@ -217,10 +220,15 @@ def get_stats():
                     user_stats = {
                         "username": username,
                         "jobs_file_exists": os.path.exists(os.path.join(user_dir, "saved_jobs.json")),
-                        "letters_count": len(list(Path(user_dir).glob("letters/*.txt"))) if Path(user_dir).exists() else 0
+                        "letters_count": blobs.count(owner=username, kind="letter")
                     }
                     stats["users"].append(user_stats)
         
+        stats["storage"] = blobs.stats()
+        
+        from ai_form_analyzer import form_cache_stats
+        stats["form_cache"] = form_cache_stats()
+        
         return jsonify(stats)
         
     except Exception as e:
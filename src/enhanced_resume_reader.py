@@ -1,6 +1,8 @@
 import os
-import json
-from pathlib import Path
+try:
+    from .utils.profile_artifact import load_profile
+except ImportError:
+    from utils.profile_artifact import load_profile
 
 class EnhancedResumeReader:
     def __init__(self, username):
@@ -36,71 +38,15 @@ class EnhancedResumeReader:
     
     def merge_all_content(self):
         """Об'єднує контент з УСІХ файлів"""
-        files = self.scan_all_files()
-        
-        merged_profile = {
-            'name': self.username,
-            'skills': [],
-            'experience_years': 0,
-            'summaries': [],
-            'all_text': [],
-            'files_processed': []
+        compiled = load_profile(self.resumes_path)
+        return {
+            'name': compiled['name'] or self.username,
+            'skills': list(compiled['skills']),
+            'experience_years': compiled['experience_years'],
+            'summaries': list(compiled['summaries']),
+            'all_text': list(compiled['all_text']),
+            'files_processed': list(compiled['files_processed'])
         }
-        
-        # Читаємо всі TXT файли
-        for txt_file in files['txt_files']:
-            try:
-                file_path = os.path.join(self.resumes_path, txt_file)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    merged_profile['all_text'].append(f'=== {txt_file} ===\n{content}')
-                    merged_profile['files_processed'].append(txt_file)
-                print(f'✅ Прочитано: {txt_file}')
-            except Exception as e:
-                print(f'❌ Помилка {txt_file}: {e}')
-        
-        # Читаємо JSON файли
-        for json_file in files['json_files']:
-            try:
-                file_path = os.path.join(self.resumes_path, json_file)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    if 'unified_profile' in data:
-                        up = data['unified_profile']
-                        
-                        # Ім'я
-                        if 'personal_info' in up and 'name' in up['personal_info']:
-                            merged_profile['name'] = up['personal_info']['name']
-                        
-                        # Досвід
-                        if 'total_experience_years' in up:
-                            merged_profile['experience_years'] = up['total_experience_years']
-                        
-                        # Резюме
-                        if 'comprehensive_summary' in up:
-                            merged_profile['summaries'].append(up['comprehensive_summary'])
-                        
-                        # Навички
-                        if 'comprehensive_skills' in up:
-                            skills_data = up['comprehensive_skills']
-                            if 'technical' in skills_data:
-                                merged_profile['skills'].extend(skills_data['technical'])
-                            if 'soft_skills' in skills_data:
-                                merged_profile['skills'].extend(skills_data['soft_skills'])
-                    
-                    merged_profile['files_processed'].append(json_file)
-                    print(f'✅ Прочитано: {json_file}')
-                    
-            except Exception as e:
-                print(f'❌ Помилка {json_file}: {e}')
-        
-        # PDF файли
-        for pdf_file in files['pdf_files']:
-            merged_profile['all_text'].append(f'=== PDF: {pdf_file} ===\nPDF резюме файл')
-            merged_profile['files_processed'].append(pdf_file)
-        
-        return merged_profile
     
     def get_ai_analysis_text(self):
         """Створює оптимізований текст для AI аналізу"""
@@ -5,12 +5,19 @@ import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
+try:
+    from .skill_vectors import load_skill_profile, profile_vector
+    from .utils.profile_artifact import load_profile, skills_summary
+except ImportError:
+    from skill_vectors import load_skill_profile, profile_vector
+    from utils.profile_artifact import load_profile, skills_summary
 
 class EnhancedWorkflowIntegration:
     def __init__(self, username: str):
         self.username = username
         self.user_config = self._load_user_config()
         self.user_data = self._prepare_user_data()
+        self.scan_state = None  # set by _filter_new_jobs
         
         # Initialize components
         self._init_components()
@@ -28,7 +35,13 @@ class EnhancedWorkflowIntegration:
     def _prepare_user_data(self) -> Dict[str, Any]:
         """Prepare user data for form filling."""
         user_info = self.user_config.get("user_info", {})
-        profile = self.user_config.get("user_profile", {}).get("unified_resume", {}).get("unified_profile", {})
+        # The compiled artifact tracks the resume files; the copy in config.json is the fallback
+        self.compiled_profile = load_profile(f"~/jobbot/data/users/{self.username}/resumes")
+        profile = (self.compiled_profile["unified_profile"]
+                   or self.user_config.get("user_profile", {}).get("unified_resume", {}).get("unified_profile", {}))
+        # Skill taxonomy + vector next to config.json, recompiled only when the profile changes
+        self.skill_profile = (load_skill_profile(f"~/jobbot/data/users/{self.username}", profile)
+                              if profile else None)
         
         return {
             "username": self.username,
@@ -98,18 +111,25 @@ class EnhancedWorkflowIntegration:
             
             # Step 3: AI analysis for each job
             print("🤖 Step 3: AI analysis of job relevance...")
-            analyzed_jobs = []
+            from ai_analyzer import analyze_jobs_relevance_ranked, error_result
+            
+            user_skills = self._get_user_skills_summary()
+            try:
+                # Local pre-filter, then several jobs per request against the same skills summary
+                min_relevance = self.user_config.get("user_profile", {}).get("min_relevance_score", 30)
+                skill_vector = profile_vector(self.skill_profile) if self.skill_profile else None
+                ai_results = analyze_jobs_relevance_ranked(new_jobs, user_skills, self.user_config, min_relevance,
+                                                           skill_vector=skill_vector)
+            except Exception as e:
+                ai_results = [error_result(e) for _ in new_jobs]
             
-            for job in new_jobs:
+            analyzed_jobs = []
+            for job, ai_result in zip(new_jobs, ai_results):
+                if "error" in ai_result:
+                    # Not scored; left uncommitted in scan state so the next run retries it
+                    workflow_stats["errors"].append(f"AI analysis error for {job['title']}: {ai_result['error']}")
+                    continue
                 try:
-                    # AI relevance analysis
-                    user_skills = self._get_user_skills_summary()
-                    ai_result = analyze_job_relevance(
-                        job["title"], 
-                        job["description"], 
-                        user_skills
-                    )
-                    
                     job["ai_analysis"] = ai_result
                     job["relevance_score"] = ai_result.get("relevance_score", 0)
                     analyzed_jobs.append(job)
@@ -124,6 +144,12 @@ class EnhancedWorkflowIntegration:
                     workflow_stats["errors"].append(f"AI analysis error for {job['title']}: {e}")
                     continue
             
+            # Only analyzed postings are marked as seen; the rest come back next run
+            if self.scan_state:
+                analyzed_urls = {job.get("url") for job in analyzed_jobs}
+                self.scan_state.commit_peeked(
+                    exclude_urls=[job.get("url") for job in new_jobs if job.get("url") not in analyzed_urls])
+            
             # Step 4: Categorize jobs
             print("📋 Step 4: Categorizing jobs...")
             auto_apply_threshold = self.user_config.get("application_settings", {}).get("auto_apply_threshold", 85)
@@ -138,12 +164,19 @@ class EnhancedWorkflowIntegration:
             if auto_apply_jobs:
                 print(f"🚀 Step 5: Auto-applying to {len(auto_apply_jobs)} high-relevance jobs...")
                 
-                for job in auto_apply_jobs:
+                # Cover letters are generated concurrently through the LLM dispatcher;
+                # applications still go through the browser one at a time
+                cover_results = await asyncio.gather(*(
+                    self.cover_letter_generator.generate_cover_letter(
+                        self.username, job, self.user_data["resume_data"]
+                    )
+                    for job in auto_apply_jobs
+                ), return_exceptions=True)
+                
+                for job, cover_result in zip(auto_apply_jobs, cover_results):
                     try:
-                        # Generate cover letter
-                        cover_result = await self.cover_letter_generator.generate_cover_letter(
-                            self.username, job, self.user_data["resume_data"]
-                        )
+                        if isinstance(cover_result, Exception):
+                            raise cover_result
                         
                         if cover_result["success"]:
                             workflow_stats["cover_letters_generated"] += 1
@@ -193,26 +226,23 @@ class EnhancedWorkflowIntegration:
             await self.telegram_bot.send_message(f"❌ Workflow error for {self.username}: {e}")
             return workflow_stats
     
+    def _scan_state(self):
+        """Per-user scan state store."""
+        from utils.scan_state import ScanStateStore
+        return ScanStateStore(Path(f"~/jobbot/data/users/{self.username}/scan_state.db").expanduser())
+    
     def _filter_new_jobs(self, all_jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Filter jobs to only include new ones."""
-        # Simple implementation - check against saved jobs
-        # In production, this would check against database
-        saved_jobs_file = Path(f"~/jobbot/data/users/{self.username}/saved_jobs.json").expanduser()
-        
+        """Filter jobs to only include ones not committed by a previous scan of the same search URL."""
         try:
-            if saved_jobs_file.exists():
-                with open(saved_jobs_file, 'r') as f:
-                    saved_jobs = json.load(f)
-                saved_urls = {job["url"] for job in saved_jobs}
-            else:
-                saved_urls = set()
+            scan_state = self.scan_state = self._scan_state()
             
-            new_jobs = [job for job in all_jobs if job["url"] not in saved_urls]
+            jobs_by_search = {}
+            for job in all_jobs:
+                jobs_by_search.setdefault(job.get("search_url", job.get("source", "")), []).append(job)
             
-            # Save all jobs (new + old)
-            saved_jobs_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(saved_jobs_file, 'w') as f:
-                json.dump(all_jobs, f, indent=2)
+            new_jobs = []
+            for search_url, jobs in jobs_by_search.items():
+                new_jobs.extend(scan_state.peek_new(search_url, jobs))
             
             return new_jobs
             
@@ -222,15 +252,14 @@ class EnhancedWorkflowIntegration:
     
     def _get_user_skills_summary(self) -> str:
         """Get user skills summary for AI analysis."""
+        if self.compiled_profile["unified_profile"]:
+            return self.compiled_profile["skills_summary"]
         try:
             resume = self.user_data["resume_data"]
             summary = resume.get("comprehensive_summary", "")
             
             skills = resume.get("comprehensive_skills", {})
-            technical = ", ".join(skills.get("technical", [])[:10])
-            soft = ", ".join(skills.get("soft_skills", [])[:5])
-            
-            return f"{summary}\n\nTechnical skills: {technical}\nSoft skills: {soft}"
+            return skills_summary(summary, skills.get("technical", []), skills.get("soft_skills", []))
             
         except Exception as e:
             print(f"⚠️ Error getting skills summary: {e}")
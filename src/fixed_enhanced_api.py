@@ -8,6 +8,10 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 
 sys.path.append('/app/src')
+from utils.ai_cache import get_ai_cache, hash_text
+from llm_dispatcher import get_dispatcher
+from structured_output import StructuredOutputError, get_parse_stats, parse_structured
+
 app = Flask(__name__)
 
 def load_azure_config():
@@ -23,11 +27,25 @@ def load_azure_config():
     return config
 
 azure_config = load_azure_config()
+# The shared LLM client (see llm_client) reads its endpoint and key from the environment
+for name in ('OPENAI_ENDPOINT', 'OPENAI_KEY'):
+    if azure_config.get(name):
+        os.environ.setdefault(name, azure_config[name])
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "Fixed Enhanced JobBot API"})
 
+@app.route('/api/ai-parse-stats', methods=['GET'])
+def ai_parse_stats():
+    """Лічильники помилок парсингу структурованих відповідей AI по задачах"""
+    return jsonify({"status": "success", "stats": get_parse_stats()})
+
+@app.route('/api/llm-usage', methods=['GET'])
+def llm_usage():
+    """Використання токенів і частка закешованих токенів промпту по задачах"""
+    return jsonify({"status": "success", "usage": get_dispatcher().get_stats()})
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
     users_dir = '/app/data/users'
@@ -165,6 +183,15 @@ def analyze_job_with_ai(job, user_config, username):
     try:
         user_info = user_config.get('user_info', {})
         
+        # Повторно використати оцінку, якщо ні профіль, ні вакансія не змінилися
+        cache = get_ai_cache()
+        profile_hash = hash_text(username, json.dumps(user_info, sort_keys=True, ensure_ascii=False))
+        content_hash = hash_text(job['title'], job['company'], job['location'])
+        if cache:
+            cached = cache.get("fixed_api_relevance", profile_hash, content_hash)
+            if cached is not None:
+                return cached
+        
         # Prompt для Azure OpenAI
         prompt = f"""Проаналізуйте релевантність вакансії для кандидата в Норвегії:
 
@@ -192,27 +219,24 @@ def analyze_job_with_ai(job, user_config, username):
   "recommendation": "APPLY"
 }}"""
 
-        # Викликати Azure OpenAI
+        # Викликати Azure OpenAI (помилки API/конфігу піднімаються і обробляються нижче)
         ai_response = call_azure_openai(prompt)
         
         try:
-            # Очистити відповідь від можливих markdown блоків
-            clean_response = ai_response.strip()
-            if clean_response.startswith('```json'):
-                clean_response = clean_response[7:]
-            if clean_response.endswith('```'):
-                clean_response = clean_response[:-3]
-            
-            result = json.loads(clean_response)
-            return {
+            # Одна спроба виправити невалідну відповідь замість відкидання
+            result = parse_structured("fixed_api_relevance", ai_response,
+                                      repair=lambda messages: call_azure_openai(messages=messages))
+            analysis = {
                 'relevance_score': result.get('relevance_score', 50),
                 'ai_reasoning': result.get('reasoning', 'AI analysis completed'),
                 'key_matches': result.get('key_matches', []),
                 'recommendation': result.get('recommendation', 'REVIEW')
             }
-        except Exception as parse_error:
+            if cache:
+                cache.put("fixed_api_relevance", profile_hash, content_hash, analysis)
+            return analysis
+        except StructuredOutputError as parse_error:
             print(f"⚠️ JSON parse error: {parse_error}")
-            print(f"Raw AI response: {ai_response[:200]}...")
             # Fallback аналіз
             return {
                 'relevance_score': 60,
@@ -230,44 +254,28 @@ def analyze_job_with_ai(job, user_config, username):
             'recommendation': 'REVIEW'
         }
 
-def call_azure_openai(prompt):
-    """Викликати Azure OpenAI API"""
-    try:
-        endpoint = azure_config.get('OPENAI_ENDPOINT', '').rstrip('/')
-        key = azure_config.get('OPENAI_KEY', '')
-        deployment = azure_config.get('AZURE_OPENAI_DEPLOYMENT_CHAT', '')
-        
-        if not all([endpoint, key, deployment]):
-            return '{"relevance_score": 50, "reasoning": "Azure config missing"}'
-        
-        url = f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version=2024-02-01"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": key
-        }
-        
-        payload = {
-            "messages": [
-                {"role": "system", "content": "Ви експерт з аналізу релевантності вакансій в Норвегії. Відповідайте тільки JSON без додаткового тексту."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 500,
-            "temperature": 0.3
-        }
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data['choices'][0]['message']['content'].strip()
-        else:
-            print(f"❌ Azure API error: {response.status_code}")
-            return '{"relevance_score": 50, "reasoning": "API error"}'
-            
-    except Exception as e:
-        print(f"❌ Azure API exception: {e}")
-        return f'{{"relevance_score": 50, "reasoning": "Exception: {str(e)}"}}'
+def call_azure_openai(prompt=None, messages=None):
+    """Викликати Azure OpenAI через спільний LLM dispatcher в режимі JSON; піднімає RuntimeError при помилці конфігу"""
+    endpoint = azure_config.get('OPENAI_ENDPOINT', '').rstrip('/')
+    key = azure_config.get('OPENAI_KEY', '')
+    deployment = azure_config.get('AZURE_OPENAI_DEPLOYMENT_CHAT', '')
+    
+    if not all([endpoint, key, deployment]):
+        raise RuntimeError("Azure config missing")
+    
+    # Ліміти, повтори на 429 і статистика токенів — спільні з рештою викликів LLM
+    response = get_dispatcher().complete(
+        endpoint, "2024-02-01", label="fixed_api_relevance",
+        model=deployment,
+        messages=messages or [
+            {"role": "system", "content": "Ви експерт з аналізу релевантності вакансій в Норвегії. Відповідайте тільки JSON без додаткового тексту."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=500,
+        temperature=0.3
+    )
+    return response.choices[0].message.content.strip()
 
 def save_to_sheets_log(username, jobs):
     """Зберегти результати в локальний лог"""
@@ -1,17 +1,51 @@
 import os
 import json
-from openai import AzureOpenAI
+from llm_client import get_llm_client
+
+# fill_with per control type of a distilled form schema (text inputs go by name/label)
+SCHEMA_FILL = {"email": "email", "tel": "phone", "file": "cv_file", "textarea": "cover_letter_text"}
+NAME_HINTS = ("name", "navn")
 
 class FormAnalyzer:
     def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-            api_key=os.getenv("OPENAI_KEY"),
-            api_version="2024-05-01-preview"
-        )
+        self.client = get_llm_client()
     
-    async def analyze_form(self, screenshot_path, html_content, job_title, company):
+    def _schema_fields(self, form_schema):
+        """Fields from the controls of a distilled form schema (utils.form_structure),
+        with their real selectors and the frame (path and URL) they live in."""
+        fields = []
+        for frame in form_schema.get("frames", []):
+            for control in frame["fields"]:
+                field_type = control["type"]
+                fill_with = SCHEMA_FILL.get(field_type)
+                text = f"{control.get('name', '')} {control.get('label', '')}".lower()
+                if field_type == "text" and any(hint in text for hint in NAME_HINTS):
+                    fill_with = "full_name"
+                elif field_type == "checkbox" and control.get("required"):
+                    fill_with = "agree_terms"
+                if not fill_with:
+                    continue
+                fields.append({
+                    "field_type": field_type,
+                    "selector": control["selector"],
+                    "label": control.get("label") or control.get("name", ""),
+                    "fill_with": fill_with,
+                    "frame": frame["frame"],
+                    "frame_url": frame.get("url")
+                })
+        return fields
+    
+    async def analyze_form(self, screenshot_path, html_content, job_title, company, form_schema=None):
         try:
+            fields = self._schema_fields(form_schema) if form_schema else []
+            if fields:
+                instructions = {
+                    "form_fields": fields,
+                    "submit_button": "button[type='submit']",
+                    "notes": f"Form schema analysis found {len(fields)} fields"
+                }
+                return {"instructions": instructions, "success": True}
+            
             # Simple HTML analysis
             has_name_field = "name" in html_content.lower()
             has_email_field = "email" in html_content.lower() or "@" in html_content
@@ -1,9 +1,17 @@
 """Enhanced form filling with better field detection."""
 import os
 import asyncio
-from datetime import datetime
 from playwright.async_api import async_playwright
 
+try:
+    from .utils.blob_store import get_blob_store
+    from .utils.form_structure import resolve_frame
+    from .utils.screenshots import capture_page
+except ImportError:
+    from utils.blob_store import get_blob_store
+    from utils.form_structure import resolve_frame
+    from utils.screenshots import capture_page
+
 class FormFiller:
     def __init__(self):
         self.fill_delay = 1000  # Increased delay
@@ -26,10 +34,14 @@ class FormFiller:
                     if file.endswith(('.pdf', '.doc', '.docx')):
                         cv_files.append(os.path.join(resumes_dir, file))
             
-            # Find cover letter
+            # Find cover letter: the one generated for this job, else the latest legacy file
             cover_letter_text = ''
             letters_dir = f'/app/data/users/{username}/letters'
-            if os.path.exists(letters_dir):
+            letter_path = get_blob_store().lookup(username, job_data, 'cover_letter').get('cover_letter')
+            if letter_path:
+                with open(letter_path, 'r', encoding='utf-8') as f:
+                    cover_letter_text = f.read()
+            elif os.path.exists(letters_dir):
                 letter_files = [f for f in os.listdir(letters_dir) if f.endswith('.txt')]
                 if letter_files:
                     latest_letter = sorted(letter_files)[-1]
@@ -63,14 +75,19 @@ class FormFiller:
             return {'error': str(e)}
     
     async def smart_fill_field(self, page, field, value):
-        """Smart field filling with multiple attempts."""
+        """Smart field filling with multiple attempts.
+
+        Fields from the form analysis name the frame they live in ("main/0", ...) and its
+        URL; the selector is looked up in that frame.
+        """
         selector = field['selector']
         field_type = field['field_type']
+        frame = resolve_frame(page, field.get('frame'), field.get('frame_url'))
         
         try:
             # Wait for element
-            await page.wait_for_selector(selector, timeout=5000)
-            element = await page.query_selector(selector)
+            await frame.wait_for_selector(selector, timeout=5000)
+            element = await frame.query_selector(selector)
             
             if not element:
                 return False
@@ -105,7 +122,7 @@ class FormFiller:
                     return True
                     
             elif field_type == 'select':
-                options = await page.query_selector_all(f'{selector} option')
+                options = await frame.query_selector_all(f'{selector} option')
                 if options and len(options) > 1:
                     await element.select_option(index=1)
                     return True
@@ -116,8 +133,8 @@ class FormFiller:
             print(f'Error filling field {field.get("label", "unknown")}: {e}')
             return False
     
-    async def fill_form_universally(self, employer_url, instructions, user_data, username):
-        """Enhanced universal form filling."""
+    async def fill_form_universally(self, employer_url, instructions, user_data, username, job=None):
+        """Enhanced universal form filling; the final screenshot is stored for `job` (default: employer_url)."""
         try:
             async with async_playwright() as p:
                 browser = await p.chromium.launch(headless=True)
@@ -164,9 +181,7 @@ class FormFiller:
                     await page.wait_for_timeout(self.fill_delay)
                 
                 # Take final screenshot
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                screenshot_path = f'/app/data/screenshots/{username}_filled_form_{timestamp}.png'
-                await page.screenshot(path=screenshot_path, full_page=True)
+                screenshot_path = await capture_page(page, username, job or employer_url, 'filled_form')
                 
                 print(f'Form filling completed: {filled_fields}/{total_fields} fields filled')
                 
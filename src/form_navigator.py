@@ -1,14 +1,14 @@
 """Enhanced navigation with cookie handling."""
 import asyncio
-import os
-from datetime import datetime
 from playwright.async_api import async_playwright
+try:
+    from .utils.form_structure import distill_form
+    from .utils.screenshots import capture_form, capture_page
+except ImportError:
+    from utils.form_structure import distill_form
+    from utils.screenshots import capture_form, capture_page
 
 class FormNavigator:
-    def __init__(self):
-        self.screenshots_dir = '/app/data/screenshots'
-        os.makedirs(self.screenshots_dir, exist_ok=True)
-    
     async def handle_cookies(self, page):
         """Handle cookie consent dialogs."""
         cookie_selectors = [
@@ -48,10 +48,8 @@ class FormNavigator:
                 await page.goto(job_url, timeout=30000)
                 await page.wait_for_timeout(2000)
                 
-                # Take job page screenshot
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                job_screenshot = f'{self.screenshots_dir}/{username}_job_page_{timestamp}.png'
-                await page.screenshot(path=job_screenshot, full_page=True)
+                # Take job page screenshot (compressed, content-addressed, referenced by user + job)
+                job_screenshot = await capture_page(page, username, job_url, 'job_page')
                 
                 # Find application button
                 apply_selectors = [
@@ -95,19 +93,22 @@ class FormNavigator:
                 await page.wait_for_timeout(2000)
                 
                 # Take form screenshot after cookies
-                form_screenshot = f'{self.screenshots_dir}/{username}_employer_form_{timestamp}.png'
-                await page.screenshot(path=form_screenshot, full_page=True)
+                # (full page for audit, plus a cropped and downscaled variant for the vision model)
+                form_screenshots = await capture_form(page, username, job_url)
                 
-                # Get clean HTML content
+                # Get clean HTML content, plus the form controls of every frame for the AI analyzer
                 html_content = await page.content()
+                form_schema = await distill_form(page)
                 
                 await browser.close()
                 
                 return {
                     'employer_url': employer_url,
                     'job_screenshot': job_screenshot,
-                    'form_screenshot': form_screenshot,
+                    'form_screenshot': form_screenshots['original'],
+                    'form_screenshot_vision': form_screenshots['vision'],
                     'html_content': html_content,
+                    'form_schema': form_schema,
                     'success': True
                 }
                 
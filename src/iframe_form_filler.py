@@ -3,6 +3,7 @@ import asyncio
 from playwright.async_api import async_playwright
 from improved_ai_form_analyzer import ImprovedAIFormAnalyzer
 from improved_smart_filler import ImprovedSmartFiller
+from utils.blob_store import get_blob_store
 
 
 class IframeFormFiller:
@@ -135,7 +136,8 @@ class IframeFormFiller:
             
             try:
                 print("🔍 Переходим на форму заявки...")
-                await page.goto('https://killnoi.se/?dest=application&country=no', timeout=30000)
+                application_url = 'https://killnoi.se/?dest=application&country=no'
+                await page.goto(application_url, timeout=30000)
                 await page.wait_for_timeout(8000)  # Ждем загрузки
                 
                 # Ищем iframe с формой
@@ -172,20 +174,22 @@ class IframeFormFiller:
                         pass
                 
                 # Финальный скриншот
-                await page.screenshot(path='/app/data/screenshots/iframe_filled_form.png', full_page=True)
+                screenshot_path = get_blob_store().store(await page.screenshot(full_page=True), user_data['email'],
+                                                         application_url, 'filled_form', ext='.png', kind='screenshot')
                 
                 print(f"\n📊 РЕЗУЛЬТАТ")
                 print("-" * 15)
                 print(f"✅ Заполнено полей: {filled_count}")
                 print(f"📝 Всего полей: {total_fields}")
                 print(f"📈 Успешность: {(filled_count/total_fields)*100:.1f}%")
-                print(f"📸 Скриншот: iframe_filled_form.png")
+                print(f"📸 Скриншот: {screenshot_path}")
                 
                 print(f"\n⚠️ Форма НЕ отправлена (только тестирование)")
                 
             except Exception as e:
                 print(f"❌ Ошибка: {e}")
-                await page.screenshot(path='/app/data/screenshots/iframe_error.png')
+                get_blob_store().store(await page.screenshot(), user_data['email'], application_url,
+                                       'error', ext='.png', kind='screenshot')
             
             finally:
                 await browser.close()
@@ -3,16 +3,12 @@ import os
 import json
 import base64
 from typing import Dict, List, Any
-from openai import AzureOpenAI
+from llm_client import get_llm_client
 
 
 class ImprovedAIFormAnalyzer:
     def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-            api_key=os.getenv("OPENAI_KEY"),
-            api_version="2024-05-01-preview"
-        )
+        self.client = get_llm_client()
 
     async def analyze_application_form(self, screenshot_path: str, html_content: str,
                                      job_title: str, company: str) -> Dict[str, Any]:
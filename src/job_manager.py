@@ -5,6 +5,11 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 import json
 
+try:
+    from .utils.blob_store import get_blob_store
+except ImportError:
+    from utils.blob_store import get_blob_store
+
 DB_PATH = Path("/app/data/app.db")
 
 class JobManager:
@@ -99,6 +104,39 @@ class JobManager:
         except Exception as e:
             print(f"Error updating job status: {e}")
     
+    def _release_artifacts(self, job_id: int, url: Optional[str]):
+        """Drop blob-store references (letters, PDFs, screenshots) kept for a job."""
+        try:
+            blobs = get_blob_store()
+            blobs.release_job(job_id)
+            if url:
+                blobs.release_job(url)
+        except Exception as e:
+            print(f"Error releasing artifacts of job {job_id}: {e}")
+    
+    def archive_job(self, job_id: int, status: str = 'ARCHIVED'):
+        """Move a job to a final status; its stored artifacts become eligible for cleanup."""
+        job = self.get_job(job_id)
+        if not job:
+            return
+        self.update_job_status(job_id, status)
+        self._release_artifacts(job_id, job.get('url'))
+    
+    def delete_job(self, job_id: int):
+        """Delete a job with its application records and release its stored artifacts."""
+        job = self.get_job(job_id)
+        if not job:
+            return
+        try:
+            with sqlite3.connect(DB_PATH) as conn:
+                conn.execute("DELETE FROM applications WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                conn.commit()
+        except Exception as e:
+            print(f"Error deleting job: {e}")
+            return
+        self._release_artifacts(job_id, job.get('url'))
+    
     def get_pending_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get jobs pending for processing."""
         try:
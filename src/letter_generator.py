@@ -1,29 +1,25 @@
 """Generate personalized cover letters using Azure OpenAI."""
 import os
 import json
-from openai import AzureOpenAI
+try:
+    from .letter_templates import generate_letter
+    from .token_budget import SHORT_JOB_TOKENS, fit_job_description
+    from .utils.blob_store import get_blob_store
+except ImportError:
+    from letter_templates import generate_letter
+    from token_budget import SHORT_JOB_TOKENS, fit_job_description
+    from utils.blob_store import get_blob_store
 from pathlib import Path
+from typing import Optional
 from datetime import datetime
 
 def generate_cover_letter(job_title: str, company: str, job_description: str, user_skills: str) -> str:
     """Generate personalized cover letter."""
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-        api_key=os.getenv("OPENAI_KEY"),
-        api_version="2024-05-01-preview"
-    )
     
     user_name = os.getenv("NAME", "Vitalii Berbeha")
     
-    prompt = f"""
-    Skriv et kort og profesjonelt søknadsbrev på norsk for denne stillingen:
-    
-    Stilling: {job_title}
-    Bedrift: {company}
-    Beskrivelse: {job_description[:1000]}
-    
-    Søkerens ferdigheter: {user_skills}
-    Søkerens navn: {user_name}
+    instructions = """
+    Skriv et kort og profesjonelt søknadsbrev på norsk.
     
     Krav:
     - Maksimum 150 ord
@@ -32,29 +28,32 @@ def generate_cover_letter(job_title: str, company: str, job_description: str, us
     - Fokuser på relevante ferdigheter
     - Ikke bruk "Kjære" - start direkt med "Hei"
     """
+    candidate = f"Søkerens ferdigheter: {user_skills}\nSøkerens navn: {user_name}"
+    job_request = f"""
+    Stilling: {job_title}
+    Bedrift: {company}
+    Beskrivelse: {fit_job_description(job_description, SHORT_JOB_TOKENS)}
+    """
     
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        return response.choices[0].message.content.strip()
+        letter, _ = generate_letter(instructions, candidate, job_request)
+        return letter
     except Exception as e:
         print(f"Error generating letter: {e}")
         return f"Hei,\n\nJeg søker herved på stillingen som {job_title}. Med mine ferdigheter innen {user_skills} mener jeg å være en god kandidat.\n\nMed vennlig hilsen,\n{user_name}"
 
+# Owner of artifacts from the single-user workflows (multi-user flows use the username)
+WORKFLOW_OWNER = "workflow"
+
 def save_letter(job_id: int, letter_text: str) -> Path:
-    """Save generated letter to file."""
-    letters_dir = Path("/app/data/letters")
-    letters_dir.mkdir(exist_ok=True)
-    
-    letter_file = letters_dir / f"{job_id}.txt"
-    letter_file.write_text(letter_text, encoding='utf-8')
-    
-    return letter_file
+    """Save generated letter to the blob store, referenced by the job's database id."""
+    return Path(get_blob_store().store(letter_text, WORKFLOW_OWNER, job_id, "cover_letter",
+                                       ext=".txt", kind="letter"))
+
+def load_letter(job_id: int) -> Optional[str]:
+    """Letter saved by `save_letter`, or None."""
+    path = get_blob_store().lookup(WORKFLOW_OWNER, job_id, "cover_letter").get("cover_letter")
+    return Path(path).read_text(encoding='utf-8') if path else None
 
 if __name__ == "__main__":
     # Test letter generation
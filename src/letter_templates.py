@@ -0,0 +1,212 @@
+"""Two-stage cover letters: cached profile paragraphs + a short per-job delta.
+
+Every letter used to be generated from scratch, although most of it (who
+the candidate is, their experience, the closing) is the same for every job
+of one user. Now:
+
+    stage 1  letter template   greeting, about, experience, closing
+             generated once per (instructions, candidate profile, model) and
+             stored in the AI result cache; a changed resume or prompt gives a
+             new key and a new template
+    stage 2  job delta         intro + fit, a few sentences per vacancy,
+             written with the template in the (cacheable) prompt prefix so it
+             doesn't repeat it
+
+`assemble_letter` joins the parts. Per-job output drops from a full letter
+to ~100 tokens, and concurrent letters for one user share a single stage-1
+request.
+
+A word limit in the instructions ("Maksimum 150 ord", "200-400 слів", ...)
+is honoured across the stages: stage 2 is told how many words are left after
+the template, and `assemble_letter` drops trailing sentences of the generic
+experience paragraph (then of the job fit) if the letter still runs over.
+"""
+import asyncio
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from .prompt_builder import build_messages
+    from .structured_output import acomplete_json, complete_json
+    from .utils.ai_cache import get_ai_cache, hash_text
+except ImportError:
+    from prompt_builder import build_messages
+    from structured_output import acomplete_json, complete_json
+    from utils.ai_cache import get_ai_cache, hash_text
+
+TEMPLATE_NAMESPACE = "letter_template"
+TEMPLATE_VERSION = "template-v1"
+
+TEMPLATE_INSTRUCTIONS = """
+Write the reusable, job-independent parts of a cover letter for the candidate below.
+Follow the user's instructions for language, tone, length, greeting and sign-off.
+These parts will be combined with a short job-specific paragraph written later, so do
+not mention any specific position, company or vacancy.
+
+Return JSON with:
+- "greeting": the opening salutation line
+- "about": 1-2 sentences introducing the candidate
+- "experience": one paragraph on the candidate's most relevant experience and skills
+- "closing": motivation and closing lines, including the sign-off
+"""
+
+TAILOR_INSTRUCTIONS = """
+The body of this candidate's cover letter is already written (LETTER BODY below).
+For the vacancy in the request, write only the job-specific parts, in the same language
+and tone, without repeating the body.
+
+Return JSON with:
+- "intro": 1-2 sentences saying which position at which company the candidate applies for
+- "fit": 2-4 sentences linking the candidate's experience to this vacancy's requirements
+"""
+
+# "Maksimum 150 ord", "max 200 words", "не більше 300 слів", "200-400 слів": the upper bound
+WORD_LIMIT_RE = re.compile(
+    r"(?:(?:maks(?:imum|imalt)?|max(?:imum)?|максимум|не більше|не более|до|under|høyst)\s*:?\s*|\d+\s*[-–]\s*)"
+    r"(\d{2,4})\s*(?:ord|words|слів|слов)\b",
+    re.I,
+)
+# Words the job-specific part always gets, even when the template alone fills the budget
+MIN_TAILOR_WORDS = 30
+TEMPLATE_PARTS = ("greeting", "about", "experience", "closing")
+
+_templates: Dict[str, Dict[str, str]] = {}
+_templates_lock = threading.Lock()
+_key_locks: Dict[str, threading.Lock] = {}
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+def _model() -> str:
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4")
+
+def word_limit(instructions: str) -> Optional[int]:
+    """Maximum letter length in words requested by the instructions, if any."""
+    limits = [int(match.group(1)) for match in WORD_LIMIT_RE.finditer(instructions or "")]
+    return min(limits) if limits else None
+
+def _count_words(text: str) -> int:
+    return len((text or "").split())
+
+def _leading_sentences(text: str, max_words: int) -> str:
+    """The longest run of whole leading sentences within max_words."""
+    kept, used = [], 0
+    for sentence in re.split(r"(?<=[.!?])\s+", (text or "").strip()):
+        used += _count_words(sentence)
+        if used > max_words:
+            break
+        kept.append(sentence)
+    return " ".join(kept)
+
+def template_key(instructions: str, candidate: str) -> str:
+    return hash_text(TEMPLATE_VERSION, _model(), instructions, candidate)
+
+def _template_messages(instructions: str, candidate: str):
+    return build_messages(f"{instructions}\n\n{TEMPLATE_INSTRUCTIONS}", candidate,
+                          "Write the reusable letter parts now.")
+
+def _tailor_messages(instructions: str, candidate: str, template: Dict[str, str], job_request: str):
+    body = "\n\n".join(template[part] for part in TEMPLATE_PARTS)
+    limit = word_limit(instructions)
+    if limit:
+        budget = max(limit - _count_words(body), MIN_TAILOR_WORDS)
+        job_request = f"{job_request}\n\nWrite at most {budget} words for intro and fit together."
+    return build_messages(f"{instructions}\n\n{TAILOR_INSTRUCTIONS}",
+                          f"{candidate}\n\nLETTER BODY:\n{body}", job_request)
+
+def _cached_template(key: str) -> Dict[str, str]:
+    with _templates_lock:
+        template = _templates.get(key)
+    if template is None:
+        cache = get_ai_cache()
+        template = cache.get(TEMPLATE_NAMESPACE, key, TEMPLATE_VERSION) if cache else None
+        if template is not None:
+            with _templates_lock:
+                _templates[key] = template
+    return template
+
+def _store_template(key: str, template: Dict[str, str]):
+    with _templates_lock:
+        _templates[key] = template
+    cache = get_ai_cache()
+    if cache:
+        cache.put(TEMPLATE_NAMESPACE, key, TEMPLATE_VERSION, template)
+
+def get_letter_template(instructions: str, candidate: str) -> Tuple[Dict[str, str], bool]:
+    """(template, reused) for this user's prompt and profile; generated at most once per key."""
+    key = template_key(instructions, candidate)
+    template = _cached_template(key)
+    if template is not None:
+        return template, True
+
+    with _templates_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        template = _cached_template(key)
+        if template is not None:
+            return template, True
+        template = complete_json("letter_template", _template_messages(instructions, candidate),
+                                 model=_model(), temperature=0.7, max_tokens=800)
+        _store_template(key, template)
+        return template, False
+
+async def aget_letter_template(instructions: str, candidate: str) -> Tuple[Dict[str, str], bool]:
+    """Awaitable `get_letter_template`; concurrent callers share one stage-1 request."""
+    key = template_key(instructions, candidate)
+    template = _cached_template(key)
+    if template is not None:
+        return template, True
+
+    loop = asyncio.get_running_loop()
+    future = _inflight.get(key)
+    if future is None or future.get_loop() is not loop:
+        async def build():
+            result = await acomplete_json("letter_template", _template_messages(instructions, candidate),
+                                          model=_model(), temperature=0.7, max_tokens=800)
+            _store_template(key, result)
+            return result
+        future = asyncio.ensure_future(build())
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+        # shield: a cancelled caller must not cancel the request the others are waiting on
+        return await asyncio.shield(future), False
+    return await asyncio.shield(future), True
+
+def tailor_letter(instructions: str, candidate: str, template: Dict[str, str], job_request: str) -> Dict[str, str]:
+    return complete_json("letter_tailoring", _tailor_messages(instructions, candidate, template, job_request),
+                         model=_model(), temperature=0.7, max_tokens=300)
+
+async def atailor_letter(instructions: str, candidate: str, template: Dict[str, str],
+                         job_request: str) -> Dict[str, str]:
+    return await acomplete_json("letter_tailoring", _tailor_messages(instructions, candidate, template, job_request),
+                                model=_model(), temperature=0.7, max_tokens=300)
+
+def assemble_letter(template: Dict[str, str], delta: Dict[str, str], max_words: Optional[int] = None) -> str:
+    """Join template and job delta; with max_words, trailing sentences of the experience
+    paragraph, then of the fit, are dropped until the letter fits (greeting and sign-off stay)."""
+    parts = {
+        "greeting": template["greeting"],
+        "intro": f"{delta['intro']} {template['about']}",
+        "experience": template["experience"],
+        "fit": delta["fit"],
+        "closing": template["closing"],
+    }
+    if max_words:
+        for name in ("experience", "fit"):
+            over = sum(_count_words(part) for part in parts.values()) - max_words
+            if over <= 0:
+                break
+            parts[name] = _leading_sentences(parts[name], max(_count_words(parts[name]) - over, 0))
+    return "\n\n".join(part.strip() for part in parts.values() if part and part.strip())
+
+def generate_letter(instructions: str, candidate: str, job_request: str) -> Tuple[str, bool]:
+    """Blocking two-stage letter; returns (text, template_reused)."""
+    template, reused = get_letter_template(instructions, candidate)
+    delta = tailor_letter(instructions, candidate, template, job_request)
+    return assemble_letter(template, delta, word_limit(instructions)), reused
+
+async def agenerate_letter(instructions: str, candidate: str, job_request: str) -> Tuple[str, bool]:
+    """Awaitable `generate_letter`."""
+    template, reused = await aget_letter_template(instructions, candidate)
+    delta = await atailor_letter(instructions, candidate, template, job_request)
+    return assemble_letter(template, delta, word_limit(instructions)), reused
@@ -0,0 +1,66 @@
+"""Process-wide Azure OpenAI client provider.
+
+Every AI module used to build its own `AzureOpenAI(...)` client, often once
+per call, which meant a fresh HTTP connection pool and TLS handshake for
+every job. `get_llm_client()` lazily creates one client per
+(endpoint, api_version) and hands the same instance to every caller, so
+connections are pooled and reused across a whole analysis batch.
+
+Tuning (environment variables):
+    LLM_TIMEOUT           total request timeout in seconds (default 60)
+    LLM_CONNECT_TIMEOUT   connect timeout in seconds (default 10)
+    LLM_MAX_CONNECTIONS   connection pool size (default 20)
+    LLM_MAX_RETRIES       SDK-level retries on transient errors (default 2)
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import AzureOpenAI
+
+DEFAULT_API_VERSION = "2024-05-01-preview"
+
+_clients: Dict[Tuple[str, str], AzureOpenAI] = {}
+_lock = threading.Lock()
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def _http_client() -> httpx.Client:
+    max_connections = int(_env_float("LLM_MAX_CONNECTIONS", 20))
+    return httpx.Client(
+        timeout=httpx.Timeout(_env_float("LLM_TIMEOUT", 60), connect=_env_float("LLM_CONNECT_TIMEOUT", 10)),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+
+def get_llm_client(endpoint: Optional[str] = None, api_version: Optional[str] = None) -> AzureOpenAI:
+    """Return the shared client for an Azure endpoint, creating it on first use."""
+    endpoint = endpoint or os.getenv("OPENAI_ENDPOINT")
+    api_version = api_version or os.getenv("AZURE_OPENAI_API_VERSION", DEFAULT_API_VERSION)
+    key = (endpoint, api_version)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        if key not in _clients:
+            _clients[key] = AzureOpenAI(
+                azure_endpoint=endpoint,
+                api_key=os.getenv("OPENAI_KEY"),
+                api_version=api_version,
+                max_retries=int(_env_float("LLM_MAX_RETRIES", 2)),
+                http_client=_http_client(),
+            )
+        return _clients[key]
+
+def close_llm_clients():
+    """Close all pooled connections (for tests and clean shutdown)."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,234 @@
+"""Rate-limit-aware dispatcher for chat completion calls.
+
+All AI modules submit their requests here instead of calling the client
+directly. The dispatcher
+    - runs at most LLM_CONCURRENCY requests at once (a bounded worker pool
+      shared by sync and async callers),
+    - keeps rolling one-minute request and token budgets (LLM_RPM_LIMIT,
+      LLM_TPM_LIMIT) and waits for room before sending,
+    - retries 429 responses with exponential backoff plus jitter, honouring
+      the Retry-After header when Azure sends one.
+
+Async callers `await dispatcher.acomplete(...)` and can gather many requests;
+the event loop is never blocked by the underlying HTTP call. Sync callers use
+`dispatcher.complete(...)` and get the same limits.
+
+Token usage, including provider-side cached prompt tokens, is tallied per
+`label` (usually the task name) in `get_stats()["by_label"]`.
+
+Tuning (environment variables):
+    LLM_CONCURRENCY       max requests in flight (default 8)
+    LLM_RPM_LIMIT         requests per minute, 0 = unlimited (default 0)
+    LLM_TPM_LIMIT         tokens per minute, 0 = unlimited (default 0)
+    LLM_RATE_RETRIES      retries after a 429 (default 5)
+    LLM_LOG_USAGE         1 = print input/cached/output tokens for every call
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from openai import RateLimitError
+
+try:
+    from .llm_client import get_llm_client
+    from .token_budget import count_tokens
+except ImportError:
+    from llm_client import get_llm_client
+    from token_budget import count_tokens
+
+WINDOW_SECONDS = 60.0
+IMAGE_TOKEN_ESTIMATE = 1000
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> int:
+    """Token count for budgeting: prompt text, a flat allowance per image, plus the completion allowance."""
+    tokens = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            tokens += count_tokens(content)
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                tokens += count_tokens(part.get("text", ""))
+            else:
+                tokens += IMAGE_TOKEN_ESTIMATE
+    return tokens + (max_tokens or 0)
+
+class RateBudget:
+    """Rolling one-minute request and token budget shared by all threads."""
+
+    def __init__(self, rpm_limit: int = 0, tpm_limit: int = 0):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self._events = deque()  # [timestamp, tokens]
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_reserve(self, tokens: int) -> Tuple[float, Optional[list]]:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now, None
+
+            while self._events and now - self._events[0][0] >= WINDOW_SECONDS:
+                self._events.popleft()
+
+            used_tokens = sum(event[1] for event in self._events)
+            over_rpm = self.rpm_limit and len(self._events) >= self.rpm_limit
+            # A single request larger than the whole budget is let through on an empty window
+            over_tpm = self.tpm_limit and self._events and used_tokens + tokens > self.tpm_limit
+            if over_rpm or over_tpm:
+                return max(self._events[0][0] + WINDOW_SECONDS - now, 0.05), None
+
+            event = [now, tokens]
+            self._events.append(event)
+            return 0.0, event
+
+    def acquire(self, tokens: int) -> Tuple[list, float]:
+        """Block until the request fits the budget; return (reservation, seconds waited)."""
+        waited = 0.0
+        while True:
+            wait, event = self._try_reserve(tokens)
+            if event is not None:
+                return event, waited
+            time.sleep(wait)
+            waited += wait
+
+    def correct(self, reservation: list, actual_tokens: int):
+        """Replace a reservation's estimate with the real token usage."""
+        with self._lock:
+            reservation[1] = actual_tokens
+
+    def pause(self, seconds: float):
+        """Hold back all new requests after the provider rate-limited us."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class LLMDispatcher:
+    def __init__(self, max_concurrency: int = 8, rpm_limit: int = 0, tpm_limit: int = 0, max_retries: int = 5):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.budget = RateBudget(rpm_limit, tpm_limit)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "retries": 0, "failed": 0,
+                      "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "wait_seconds": 0.0}
+        self.by_label: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _record_usage(self, label: str, usage):
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        self._count(prompt_tokens=usage.prompt_tokens, cached_tokens=cached,
+                    completion_tokens=usage.completion_tokens)
+        with self._stats_lock:
+            counter = self.by_label.setdefault(label, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            counter["requests"] += 1
+            counter["prompt_tokens"] += usage.prompt_tokens
+            counter["cached_tokens"] += cached
+        if os.getenv("LLM_LOG_USAGE") == "1":
+            print(f"🧮 {label}: {usage.prompt_tokens} input tokens ({cached} cached), "
+                  f"{usage.completion_tokens} output tokens")
+
+    def _backoff(self, attempt: int, error: RateLimitError) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        base = retry_after if retry_after is not None else min(2 ** attempt, 30)
+        return base + random.uniform(0, base * 0.5 + 0.5)
+
+    def _call(self, endpoint: Optional[str], api_version: Optional[str], label: str, kwargs: Dict[str, Any]):
+        # The dispatcher owns retries on 429 so SDK retries would only double-count
+        client = get_llm_client(endpoint, api_version).with_options(max_retries=0)
+        estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+
+        for attempt in range(self.max_retries + 1):
+            reservation, waited = self.budget.acquire(estimated)
+            self._count(wait_seconds=waited)
+
+            try:
+                response = client.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                self._count(rate_limited=1)
+                if attempt == self.max_retries:
+                    self._count(failed=1)
+                    raise
+                delay = self._backoff(attempt, e)
+                self.budget.pause(delay)
+                self._count(retries=1)
+                print(f"⏳ LLM rate limited, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                continue
+            except Exception:
+                self._count(failed=1)
+                raise
+
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.budget.correct(reservation, usage.total_tokens)
+                self._record_usage(label, usage)
+            self._count(requests=1)
+            return response
+
+    def complete(self, endpoint: Optional[str] = None, api_version: Optional[str] = None,
+                 label: str = "default", **kwargs):
+        """Blocking chat completion; kwargs go to `chat.completions.create`."""
+        return self._executor.submit(self._call, endpoint, api_version, label, kwargs).result()
+
+    async def acomplete(self, endpoint: Optional[str] = None, api_version: Optional[str] = None,
+                        label: str = "default", **kwargs):
+        """Awaitable chat completion; many can be gathered and run up to max_concurrency at once."""
+        return await asyncio.wrap_future(self._executor.submit(self._call, endpoint, api_version, label, kwargs))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus cached-token ratios (share of prompt tokens served from the provider cache)."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats["by_label"] = {label: dict(counter) for label, counter in self.by_label.items()}
+
+        for counter in [stats] + list(stats["by_label"].values()):
+            prompt_tokens = counter["prompt_tokens"]
+            counter["cached_token_ratio"] = round(counter["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0
+            counter["avg_input_tokens"] = round(prompt_tokens / counter["requests"]) if counter["requests"] else 0
+        return stats
+
+_dispatcher: Optional[LLMDispatcher] = None
+_lock = threading.Lock()
+
+def get_dispatcher() -> LLMDispatcher:
+    """Return the process-wide dispatcher, configured from the environment on first use."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _lock:
+            if _dispatcher is None:
+                _dispatcher = LLMDispatcher(
+                    max_concurrency=max(_env_int("LLM_CONCURRENCY", 8), 1),
+                    rpm_limit=_env_int("LLM_RPM_LIMIT", 0),
+                    tpm_limit=_env_int("LLM_TPM_LIMIT", 0),
+                    max_retries=_env_int("LLM_RATE_RETRIES", 5),
+                )
+    return _dispatcher
+
+def set_dispatcher(dispatcher: LLMDispatcher):
+    """Replace the process-wide dispatcher (benchmarks, tests with a different concurrency)."""
+    global _dispatcher
+    with _lock:
+        _dispatcher = dispatcher
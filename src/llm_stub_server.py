@@ -0,0 +1,269 @@
+"""Local OpenAI/Azure-compatible chat completions stub for offline runs and benchmarks.
+
+Answers `POST .../chat/completions` (any deployment path, any api-version)
+with canned replies shaped by the request's `response_format` schema name,
+so every structured task (relevance, batched relevance, resume analysis,
+profile merge, form analysis, application letter) gets a valid reply and
+plain requests get a cover-letter text. Usage includes simulated cached
+prompt tokens for repeated system prefixes.
+
+Failure modes to exercise the dispatcher:
+    --latency / --jitter     seconds per request
+    --capacity N             429 when more than N requests are in flight
+    --rate-limit-rate P      additionally 429 a random fraction P of requests
+    --malformed-rate P       return broken JSON for a fraction P of structured replies
+
+    python -m src.llm_stub_server --port 8011 --latency 0.5 --capacity 4
+    OPENAI_ENDPOINT=http://127.0.0.1:8011 ANALYZER_ENDPOINT=http://127.0.0.1:8011 OPENAI_KEY=stub ...
+
+`GET /stats` returns request counters.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+CANNED = {
+    "resume_analysis": {
+        "personal_info": {"name": "Test Kandidat", "email": "test@example.com", "phone": "+47 000 00 000", "location": "Gjøvik"},
+        "professional_summary": "Erfaren lagermedarbeider med kundeservicebakgrunn.",
+        "work_experience": [{"company": "Lager AS", "position": "Lagermedarbeider", "duration": "2020-2024",
+                             "responsibilities": ["Plukk og pakk", "Truckkjøring"]}],
+        "education": [{"degree": "Fagbrev logistikk", "institution": "Gjøvik vgs", "year": "2019"}],
+        "skills": {"technical": ["truck T1-T4", "WMS"], "languages": ["Norwegian", "English"], "soft_skills": ["teamwork"]},
+        "certifications": ["Truckførerbevis"],
+        "career_objective": "Lager og logistikk",
+    },
+    "unified_profile": {
+        "unified_profile": {
+            "personal_info": {"name": "Test Kandidat", "email": "test@example.com", "phone": "+47 000 00 000", "location": "Gjøvik"},
+            "comprehensive_summary": "Erfaren lagermedarbeider med kundeservicebakgrunn.",
+            "total_experience_years": 4,
+            "all_work_experience": [],
+            "all_education": [],
+            "comprehensive_skills": {"technical": ["truck T1-T4"], "languages": ["Norwegian"], "soft_skills": ["teamwork"]},
+            "all_certifications": [],
+            "career_preferences": "Lager og logistikk",
+            "key_strengths": ["pålitelig"],
+            "adaptability_areas": ["butikk"],
+        },
+        "resume_sources": ["cv.pdf"],
+        "analysis_confidence": "high",
+    },
+    "form_analysis": {
+        "form_fields": [
+            {"field_type": "text", "selector": "input[name='name']", "label": "Navn", "required": True, "suggested_value": "full_name"},
+            {"field_type": "email", "selector": "input[type='email']", "label": "E-post", "required": True, "suggested_value": "email"},
+        ],
+        "submit_button": {"selector": "button[type='submit']", "text": "Send søknad"},
+        "cookies_accept": {"found": False, "selector": ""},
+        "special_instructions": [],
+    },
+    "application_letter": {
+        "cover_letter": "Hei,\n\nJeg søker herved på stillingen.\n\nJeg ser frem til å høre fra dere.",
+        "key_skills_match": ["truck"],
+        "experience_highlight": "Fire år på lager",
+        "motivation": "Stabil jobb i nærområdet",
+    },
+    "letter_template": {
+        "greeting": "Hei,",
+        "about": "Jeg er en pålitelig lagermedarbeider med fire års erfaring.",
+        "experience": "Hos Lager AS har jeg jobbet med plukk, pakking og truckkjøring (T1-T4).",
+        "closing": "Jeg ser frem til å høre fra dere.\n\nMed vennlig hilsen\nTest Kandidat",
+    },
+    "letter_tailoring": {
+        "intro": "Jeg søker herved på stillingen hos dere.",
+        "fit": "Erfaringen min med truck og vareflyt passer godt til oppgavene dere beskriver.",
+    },
+}
+
+LETTER_TEXT = "Hei,\n\nJeg søker herved på stillingen og har relevant erfaring fra lager og kundeservice.\n\nJeg ser frem til å høre fra dere."
+
+def _text(messages: List[Dict[str, Any]]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(part.get("text", "") for part in content if part.get("type") == "text")
+    return "\n".join(parts)
+
+def _relevance(seed: str) -> Dict[str, Any]:
+    score = int(hashlib.sha256(seed.encode("utf-8")).hexdigest(), 16) % 101
+    return {
+        "relevance_score": score,
+        "is_relevant": score >= 50,
+        "match_reasons": ["stub match"],
+        "concerns": [],
+        "recommendation": "APPLY" if score >= 80 else "REVIEW" if score >= 40 else "SKIP",
+    }
+
+def canned_reply(request: Dict[str, Any]) -> str:
+    messages = request.get("messages", [])
+    response_format = request.get("response_format") or {}
+    if not response_format:
+        return LETTER_TEXT
+
+    task = (response_format.get("json_schema") or {}).get("name", "")
+    request_text = messages[-1].get("content") if messages else ""
+    request_text = request_text if isinstance(request_text, str) else _text(messages[-1:])
+
+    job_ids = re.findall(r"job_id: (\S+)", request_text)
+    if task == "job_relevance_batch" or (not task and job_ids):
+        return json.dumps({"results": [{"job_id": job_id, **_relevance(f"{job_id}{request_text}")} for job_id in job_ids]})
+    if task in CANNED:
+        return json.dumps(CANNED[task], ensure_ascii=False)
+    # job_relevance, fixed_api_relevance and json_object mode
+    result = _relevance(request_text)
+    result["reasoning"] = "stub"
+    return json.dumps(result)
+
+class StubState:
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, capacity: int = 0,
+                 rate_limit_rate: float = 0.0, malformed_rate: float = 0.0, retry_after: float = 1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.capacity = capacity
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.seen_prefixes = set()
+        self.stats = {"requests": 0, "completed": 0, "rate_limited": 0, "malformed": 0, "max_in_flight": 0}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.stats, in_flight=self.in_flight)
+
+    def reset(self):
+        with self.lock:
+            self.seen_prefixes.clear()
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def usage(self, messages: List[Dict[str, Any]], completion: str) -> Dict[str, Any]:
+        prompt_tokens = len(_text(messages)) // 4 + 10
+        prefix = messages[0].get("content") if messages and messages[0].get("role") == "system" else None
+        cached = 0
+        if isinstance(prefix, str):
+            prefix_tokens = len(prefix) // 4
+            with self.lock:
+                hit = prefix in self.seen_prefixes
+                self.seen_prefixes.add(prefix)
+            if hit and prefix_tokens >= CACHE_MIN_TOKENS:
+                cached = prefix_tokens // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+        completion_tokens = len(completion) // 4 + 1
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.startswith("/stats"):
+                self._send_json(200, state.snapshot())
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if "/chat/completions" not in self.path:
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            with state.lock:
+                state.stats["requests"] += 1
+                over_capacity = state.capacity and state.in_flight >= state.capacity
+                throttled = over_capacity or random.random() < state.rate_limit_rate
+                if throttled:
+                    state.stats["rate_limited"] += 1
+                else:
+                    state.in_flight += 1
+                    state.stats["max_in_flight"] = max(state.stats["max_in_flight"], state.in_flight)
+
+            if throttled:
+                self._send_json(429, {"error": {"code": "429", "message": "Rate limit exceeded (stub)"}},
+                                {"Retry-After": str(state.retry_after)})
+                return
+
+            try:
+                time.sleep(max(state.latency + random.uniform(-state.jitter, state.jitter), 0))
+                content = canned_reply(request)
+                if request.get("response_format") and random.random() < state.malformed_rate:
+                    content = content[: len(content) // 2]
+                    with state.lock:
+                        state.stats["malformed"] += 1
+
+                messages = request.get("messages", [])
+                self._send_json(200, {
+                    "id": f"chatcmpl-stub-{state.stats['requests']}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model") or "stub",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": state.usage(messages, content),
+                })
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+                    state.stats["completed"] += 1
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start_stub_server(state: StubState, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve the stub in a background thread; the caller shuts it down."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--capacity", type=int, default=0, help="max concurrent requests before 429 (0 = unlimited)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    state = StubState(args.latency, args.jitter, args.capacity, args.rate_limit_rate, args.malformed_rate, args.retry_after)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"🧪 LLM stub listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
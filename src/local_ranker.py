@@ -0,0 +1,183 @@
+"""Cheap local first-stage ranking of jobs before LLM relevance scoring.
+
+Every scraped job used to go straight to Azure OpenAI, including obvious
+mismatches. `prefilter_jobs` ranks jobs against the user's skills text with
+BM25 (pure Python, no extra dependencies) and only lets the top candidates
+through to the LLM. With `"method": "vector"` jobs are instead scored by
+cosine similarity to the user's compiled skill vector (see skill_vectors).
+
+Settings come from the `prefilter` block of the search/user config:
+    {
+        "enabled": true,
+        "method": "bm25",       # or "vector"
+        "top_k": 25,            # at most this many jobs go to the LLM
+        "min_score": 0.5,       # and only those scoring at least this much (BM25)
+        "min_similarity": 0.1,  # same for the vector method (cosine, 0..1)
+        "shadow_mode": false    # rank and log, but still send every job to the LLM
+    }
+
+In shadow mode the jobs the ranker would have cut are still scored by the
+LLM, and `log_shadow_stats` records how many of them the LLM considered
+relevant, so the cutoff can be tuned before it is switched on for real.
+"""
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SHADOW_LOG = Path("/app/data/prefilter_shadow.jsonl")
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "method": "bm25",
+    "top_k": 25,
+    "min_score": 0.5,
+    "min_similarity": 0.1,
+    "shadow_mode": False,
+}
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents (å -> a; ø and æ have no decomposition and stay)."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+# Folded like the tokens they are compared with ("på" -> "pa")
+STOPWORDS = {_fold(word) for word in {
+    # Norwegian
+    "og", "i", "på", "til", "for", "med", "av", "som", "er", "en", "et", "ei", "det", "den", "de",
+    "vi", "du", "har", "skal", "kan", "vil", "om", "fra", "eller", "ikke", "hos", "oss", "deg",
+    "din", "ditt", "dine", "våre", "vår", "sin", "seg", "også", "etter", "mer", "samt",
+    # English
+    "and", "or", "the", "a", "an", "of", "to", "in", "on", "for", "with", "is", "are", "be",
+    "we", "you", "our", "your", "as", "at", "by", "from", "this", "that", "will", "experience",
+}}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-fold and split text; drop stopwords and 1-char tokens.
+
+    Dots are kept inside tokens (node.js, asp.net) but not at their ends, so
+    sentence punctuation doesn't hide a skill:
+
+    >>> tokenize("Vi søker en utvikler med Python. Node.js er et pluss...")
+    ['søker', 'utvikler', 'python', 'node.js', 'pluss']
+    >>> tokenize("Også våre kunder på lageret")
+    ['kunder', 'lageret']
+    """
+    text = _fold(text)
+    tokens = (t.strip(".") for t in re.findall(r"[a-z0-9æøå+#.]+", text))
+    return [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+def job_text(job: Dict[str, Any]) -> str:
+    # Title counts double: it is the strongest signal in short listings
+    return " ".join([job.get("title", "")] * 2 + [job.get("company", ""), job.get("description") or ""])
+
+class BM25Ranker:
+    """Okapi BM25 over a batch of job postings, with the skills text as query."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query: str, documents: List[str]) -> List[float]:
+        docs = [tokenize(doc) for doc in documents]
+        if not docs:
+            return []
+
+        avg_len = sum(len(doc) for doc in docs) / len(docs) or 1.0
+        doc_freq = Counter(term for doc in docs for term in set(doc))
+        n_docs = len(docs)
+        query_terms = set(tokenize(query))
+
+        scores = []
+        for doc in docs:
+            tf = Counter(doc)
+            norm = self.k1 * (1 - self.b + self.b * len(doc) / avg_len)
+            score = 0.0
+            for term in query_terms:
+                if term not in tf:
+                    continue
+                idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                score += idf * tf[term] * (self.k1 + 1) / (tf[term] + norm)
+            scores.append(round(score, 4))
+        return scores
+
+def prefilter_settings(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the config's `prefilter` block over the defaults."""
+    return {**DEFAULT_SETTINGS, **((config or {}).get("prefilter") or {})}
+
+def vector_scores(jobs: List[Dict[str, Any]], user_skills: str, skill_vector=None) -> List[float]:
+    """Cosine similarity of each job to the skill vector (built from user_skills if not given)."""
+    try:
+        from .skill_vectors import score_jobs, text_vector
+    except ImportError:
+        from skill_vectors import score_jobs, text_vector
+    vector = skill_vector if skill_vector is not None else text_vector(user_skills)
+    return [round(float(score), 4) for score in score_jobs(vector, jobs)]
+
+def prefilter_jobs(jobs: List[Dict[str, Any]], user_skills: str, settings: Dict[str, Any],
+                   skill_vector=None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split jobs into (send to LLM, cut locally).
+
+    Every job gets a `prefilter_score`. In shadow mode nothing is cut; jobs
+    that would have been are flagged with `prefilter_would_cut`.
+    `skill_vector` is the user's precompiled vector for the vector method.
+    """
+    if not settings.get("enabled") or not jobs:
+        return jobs, []
+
+    if settings.get("method") == "vector":
+        scores = vector_scores(jobs, user_skills, skill_vector)
+        min_score = settings.get("min_similarity", 0)
+    else:
+        scores = BM25Ranker().score(user_skills, [job_text(job) for job in jobs])
+        min_score = settings.get("min_score", 0)
+    for job, score in zip(jobs, scores):
+        job["prefilter_score"] = score
+
+    ranked = sorted(jobs, key=lambda job: job["prefilter_score"], reverse=True)
+    top_k = settings.get("top_k") or len(ranked)
+    keep_ids = {id(job) for job in ranked[:top_k] if job["prefilter_score"] >= min_score}
+
+    kept = [job for job in jobs if id(job) in keep_ids]
+    cut = [job for job in jobs if id(job) not in keep_ids]
+
+    if settings.get("shadow_mode"):
+        for job in cut:
+            job["prefilter_would_cut"] = True
+        print(f"👥 Pre-filter (shadow): would send {len(kept)}/{len(jobs)} jobs to the LLM")
+        return jobs, []
+
+    print(f"🧮 Pre-filter: sending {len(kept)}/{len(jobs)} jobs to the LLM")
+    return kept, cut
+
+def log_shadow_stats(jobs: List[Dict[str, Any]], results: List[Dict[str, Any]], min_relevance: int,
+                     log_file: Path = SHADOW_LOG) -> Dict[str, Any]:
+    """After LLM scoring in shadow mode, record how good the cutoff would have been.
+
+    `results` are the LLM analyses for `jobs`, in the same order.
+    """
+    would_cut = [(job, result) for job, result in zip(jobs, results) if job.get("prefilter_would_cut")]
+    missed = [job for job, result in would_cut if result.get("relevance_score", 0) >= min_relevance]
+    stats = {
+        "timestamp": datetime.now().isoformat(),
+        "total": len(jobs),
+        "would_cut": len(would_cut),
+        "would_cut_but_relevant": len(missed),
+        "llm_calls_saved_pct": round(100 * len(would_cut) / len(jobs), 1) if jobs else 0.0,
+        "missed_titles": [job.get("title", "") for job in missed][:10],
+    }
+    print(f"👥 Pre-filter shadow stats: {stats['would_cut']}/{stats['total']} would be cut, "
+          f"{stats['would_cut_but_relevant']} of those scored >= {min_relevance}")
+
+    try:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(stats, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write shadow stats: {e}")
+
+    return stats
@@ -7,7 +7,8 @@ from typing import List, Dict, Any
 
 # Import our modules
 from .scrapers.config_based_scraper import fetch_all_jobs_config
-from .ai_analyzer import analyze_job_relevance
+from .utils.scan_state import ScanStateStore
+from .ai_analyzer import analyze_jobs_relevance_ranked
 from .letter_generator import generate_cover_letter, save_letter
 from .job_manager import JobManager
 from .telegram_bot import TelegramBot
@@ -19,6 +20,8 @@ class JobBotWorkflow:
         self.telegram_bot = TelegramBot()
         self.sheets_tracker = SheetsTracker()
         self.config = self.load_config()
+        self.scan_state = ScanStateStore()
+        self.failed_urls = set()
     
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
@@ -35,7 +38,7 @@ class JobBotWorkflow:
         print("🔍 Step 1: Fetching jobs from all sources...")
         
         try:
-            jobs = fetch_all_jobs_config()
+            jobs = fetch_all_jobs_config(scan_state=self.scan_state)
             print(f"✅ Found {len(jobs)} jobs total")
             return jobs
         except Exception as e:
@@ -60,32 +63,46 @@ class JobBotWorkflow:
         print("🤖 Step 3: Analyzing job relevance...")
         
         user_skills = self.config.get("user_profile", {}).get("skills", "")
+        min_score = self.config.get("user_profile", {}).get("min_relevance_score", 70)
         analyzed_jobs = []
         
+        jobs = []
         for job_id in job_ids:
+            job = self.job_manager.get_job(job_id)
+            if job:
+                job['id'] = job_id
+                jobs.append(job)
+        
+        # Local pre-filter, then AI analysis with several jobs per request
+        try:
+            analyses = analyze_jobs_relevance_ranked(jobs, user_skills, self.config, min_score)
+        except Exception as e:
+            print(f"❌ Error analyzing jobs: {e}")
+            for job in jobs:
+                self.job_manager.update_job_status(job['id'], 'ERROR_ANALYSIS')
+            self.failed_urls.update(job['url'] for job in jobs)
+            return []
+        
+        for job, analysis in zip(jobs, analyses):
+            if 'error' in analysis:
+                # Not scored (API outage, unparseable reply): retried on the next run
+                self.job_manager.update_job_status(job['id'], 'ERROR_ANALYSIS', analysis['error'])
+                self.failed_urls.add(job['url'])
+                continue
             try:
-                job = self.job_manager.get_job(job_id)
-                if not job:
-                    continue
-                
-                # AI analysis
-                analysis = analyze_job_relevance(
-                    job['title'],
-                    job.get('description', ''),
-                    user_skills
-                )
-                
                 # Update job with relevance score
                 relevance_score = analysis.get('relevance_score', 0)
                 
                 # Update status based on score
-                min_score = self.config.get("user_profile", {}).get("min_relevance_score", 70)
                 if relevance_score >= min_score:
                     status = 'ANALYZED_RELEVANT'
                 else:
                     status = 'ANALYZED_IRRELEVANT'
                 
-                self.job_manager.update_job_status(job_id, status)
+                if status == 'ANALYZED_IRRELEVANT':
+                    self.job_manager.archive_job(job['id'], status)
+                else:
+                    self.job_manager.update_job_status(job['id'], status)
                 
                 if status == 'ANALYZED_RELEVANT':
                     job['relevance_score'] = relevance_score
@@ -95,8 +112,8 @@ class JobBotWorkflow:
                 print(f"  📊 {job['title']}: {relevance_score}% relevance")
                 
             except Exception as e:
-                print(f"❌ Error analyzing job {job_id}: {e}")
-                self.job_manager.update_job_status(job_id, 'ERROR_ANALYSIS')
+                print(f"❌ Error analyzing job {job['id']}: {e}")
+                self.job_manager.update_job_status(job['id'], 'ERROR_ANALYSIS')
         
         print(f"✅ {len(analyzed_jobs)} jobs are relevant")
         return analyzed_jobs
@@ -204,11 +221,15 @@ class JobBotWorkflow:
             # Step 2: Store jobs
             new_job_ids = self.step_2_store_jobs(jobs)
             if not new_job_ids:
+                self.scan_state.commit_peeked()
                 print("ℹ️ No new jobs to process. Workflow complete.")
                 return
             
-            # Step 3: Analyze relevance
+            # Step 3: Analyze relevance; postings are marked as seen only once analyzed,
+            # so a failed run picks them up again
+            self.failed_urls = set()
             relevant_jobs = self.step_3_analyze_jobs(new_job_ids)
+            self.scan_state.commit_peeked(exclude_urls=self.failed_urls)
             if not relevant_jobs:
                 print("ℹ️ No relevant jobs found. Workflow complete.")
                 return
@@ -1,22 +1,31 @@
-"""Enhanced main workflow using deep job analyzer."""
+"""Enhanced main workflow using deep job analyzer.
+
+Run with `--async` (or JOBBOT_ASYNC_HTTP=1) to fetch job pages concurrently
+through AsyncDeepJobAnalyzer instead of the blocking requests session.
+"""
 import sys
+import os
 import json
+import asyncio
 from pathlib import Path
 from typing import List, Dict, Any
 
-from .deep_job_analyzer import DeepJobAnalyzer
+from .deep_job_analyzer import DeepJobAnalyzer, AsyncDeepJobAnalyzer
 from .job_manager import JobManager
 from .telegram_bot import TelegramBot
 from .sheets_integration import SheetsTracker
 from .letter_generator import generate_cover_letter, save_letter
 
 class EnhancedJobBotWorkflow:
-    def __init__(self):
+    def __init__(self, async_mode: bool = None):
+        if async_mode is None:
+            async_mode = os.getenv("JOBBOT_ASYNC_HTTP", "0") == "1"
+        self.async_mode = async_mode
         self.job_manager = JobManager()
         self.telegram_bot = TelegramBot()
         self.sheets_tracker = SheetsTracker()
-        self.deep_analyzer = DeepJobAnalyzer()
         self.config = self.load_config()
+        self.deep_analyzer = DeepJobAnalyzer(prefilter=self.config.get("prefilter"))
 
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
@@ -28,6 +37,18 @@ class EnhancedJobBotWorkflow:
             print(f"❌ Error loading config: {e}")
             return {}
 
+    async def analyze_search_urls_async(self, search_urls: List[str], user_skills: str,
+                                        min_relevance: int) -> List[Dict[str, Any]]:
+        """Analyze all search URLs concurrently on one pooled async client."""
+        print(f"⚡ Async mode: processing {len(search_urls)} search URLs concurrently")
+        async with AsyncDeepJobAnalyzer(max_jobs=self.deep_analyzer.max_jobs,
+                                        prefilter=self.deep_analyzer.prefilter) as analyzer:
+            results = await asyncio.gather(*(
+                analyzer.analyze_jobs_from_search_url(search_url, user_skills, min_relevance)
+                for search_url in search_urls
+            ))
+        return [job for jobs in results for job in jobs]
+
     def run_enhanced_workflow(self):
         """Run enhanced workflow with deep analysis."""
         print("🚀 Starting Enhanced JobBot Workflow")
@@ -50,15 +71,20 @@ class EnhancedJobBotWorkflow:
 
             all_relevant_jobs = []
 
-            # Process each search URL
-            for search_url in search_urls:
-                print(f"\n🔍 Processing: {search_url}")
-                
-                relevant_jobs = self.deep_analyzer.analyze_jobs_from_search_url(
-                    search_url, user_skills, min_relevance
+            if self.async_mode:
+                all_relevant_jobs = asyncio.run(
+                    self.analyze_search_urls_async(search_urls, user_skills, min_relevance)
                 )
-                
-                all_relevant_jobs.extend(relevant_jobs)
+            else:
+                # Process each search URL
+                for search_url in search_urls:
+                    print(f"\n🔍 Processing: {search_url}")
+                    
+                    relevant_jobs = self.deep_analyzer.analyze_jobs_from_search_url(
+                        search_url, user_skills, min_relevance
+                    )
+                    
+                    all_relevant_jobs.extend(relevant_jobs)
 
             print(f"\n📊 Total relevant jobs found: {len(all_relevant_jobs)}")
 
@@ -124,5 +150,5 @@ class EnhancedJobBotWorkflow:
             self.telegram_bot.send_message(f"❌ Enhanced JobBot workflow failed: {e}")
 
 if __name__ == "__main__":
-    workflow = EnhancedJobBotWorkflow()
+    workflow = EnhancedJobBotWorkflow(async_mode=True if "--async" in sys.argv else None)
     workflow.run_enhanced_workflow()
@@ -5,6 +5,10 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 from playwright.async_api import async_playwright, Page
+try:
+    from .token_budget import compress_job_text
+except ImportError:
+    from token_budget import compress_job_text
 
 class MultiSiteScraper:
     def __init__(self):
@@ -92,6 +96,7 @@ class MultiSiteScraper:
                         job_data = await self._extract_arbeidsplassen_job(page, card)
                         if job_data:
                             job_data["source"] = "arbeidsplassen"
+                            job_data["search_url"] = search_url
                             job_data["scraped_date"] = datetime.now().isoformat()
                             jobs.append(job_data)
                     except Exception as e:
@@ -189,7 +194,8 @@ class MultiSiteScraper:
                     continue
             
             await job_page.close()
-            return description[:2000]  # Limit description length
+            # Keep the whole posting; prompts trim it to their own token budgets
+            return compress_job_text(description)
             
         except Exception as e:
             print(f"⚠️ Could not get job description for {job_url}: {e}")
@@ -201,6 +207,8 @@ class MultiSiteScraper:
         try:
             from .ai_form_analyzer import AIFormAnalyzer
             from .universal_form_filler import UniversalFormFiller
+            from .utils.form_structure import distill_form
+            from .utils.screenshots import capture_form
             
             async with async_playwright() as p:
                 browser = await p.chromium.launch(headless=False)  # Visible for debugging
@@ -231,9 +239,9 @@ class MultiSiteScraper:
                 await apply_button.click()
                 await page.wait_for_load_state("networkidle")
                 
-                # Take screenshot for AI analysis
-                screenshot_path = f"/tmp/form_screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                await page.screenshot(path=screenshot_path, full_page=True)
+                # Take screenshot for AI analysis (original kept for audit, cropped variant for the model)
+                screenshots = await capture_form(page, user_data.get("email", ""), job_data)
+                screenshot_path = screenshots["vision"]
                 
                 # Get page HTML
                 html_content = await page.content()
@@ -242,7 +250,8 @@ class MultiSiteScraper:
                 analyzer = AIFormAnalyzer()
                 form_analysis = await analyzer.analyze_application_form(
                     screenshot_path, html_content, 
-                    job_data["title"], job_data["company"]
+                    job_data["title"], job_data["company"], page_url=page.url,
+                    form_schema=await distill_form(page)
                 )
                 
                 # Fill form
@@ -5,6 +5,9 @@ import sqlite3
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from resume_analyzer import ResumeAnalyzer
+from skill_vectors import load_skill_profile, profile_vector
+from batch_ranker import DEFAULT_MIN_SIMILARITY, DEFAULT_TOP_K, rank_users_jobs
+from utils.profile_artifact import skills_summary
 
 class MultiUserJobSystem:
     def __init__(self, base_data_dir: str = "/app/data"):
@@ -181,10 +184,44 @@ class MultiUserJobSystem:
             if config:
                 config['user_profile']['unified_resume'] = unified_profile
                 self.update_user_config(username, config)
+                load_skill_profile(user_dir, unified_profile.get('unified_profile', {}))
                 print(f"✅ Updated {username}'s profile with unified resume")
         
         return unified_profile
 
+    def get_unified_profile(self, username: str) -> Dict[str, Any]:
+        config = self.get_user_config(username) or {}
+        return (config.get('user_profile', {}).get('unified_resume') or {}).get('unified_profile', {})
+
+    def rank_jobs_for_all_users(self, jobs: List[Dict[str, Any]], top_k: int = DEFAULT_TOP_K,
+                                min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Dict[str, List[Dict[str, Any]]]:
+        """Score one shared batch of postings against every analyzed user in one matrix product."""
+        vectors = {}
+        for username in self.get_user_list():
+            profile = self.get_unified_profile(username)
+            if profile:
+                vectors[username] = profile_vector(load_skill_profile(self.users_dir / username, profile))
+        return rank_users_jobs(vectors, jobs, top_k, min_similarity)
+
+    def analyze_jobs_for_all_users(self, jobs: List[Dict[str, Any]], top_k: int = DEFAULT_TOP_K,
+                                   min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Dict[str, List[Dict[str, Any]]]:
+        """Batch-rank postings for all users, then confirm each user's top-K with the LLM."""
+        from ai_analyzer import analyze_jobs_relevance_batch
+
+        results = {}
+        for username, candidates in self.rank_jobs_for_all_users(jobs, top_k, min_similarity).items():
+            profile = self.get_unified_profile(username)
+            skills = profile.get('comprehensive_skills', {})
+            user_skills = skills_summary(profile.get('comprehensive_summary', ''),
+                                         skills.get('technical', []), skills.get('soft_skills', []))
+            analyses = analyze_jobs_relevance_batch(candidates, user_skills) if candidates else []
+            for job, analysis in zip(candidates, analyses):
+                job['ai_analysis'] = analysis
+                job['relevance_score'] = analysis.get('relevance_score', 0)
+            results[username] = candidates
+            print(f"✅ {username}: {len(candidates)} candidates confirmed by AI")
+        return results
+
     def list_users_with_status(self) -> Dict[str, Dict[str, Any]]:
         """Get status of all users."""
         users_status = {}
@@ -224,7 +261,23 @@ class MultiUserJobSystem:
         return users_status
 
 if __name__ == "__main__":
+    import sys
     system = MultiUserJobSystem()
+
+    if len(sys.argv) > 2 and sys.argv[1] == "rank":
+        # python multi_user_system.py rank /app/data/latest_jobs.ndjson [top_k]
+        from utils.job_output import iter_jobs_ndjson
+        jobs_path = Path(sys.argv[2])
+        if ".ndjson" in jobs_path.suffixes:
+            jobs = list(iter_jobs_ndjson(jobs_path))
+        else:
+            jobs = json.loads(jobs_path.read_text(encoding='utf-8'))
+        top_k = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_TOP_K
+        ranking = system.rank_jobs_for_all_users(jobs, top_k)
+        print(json.dumps({user: [{"url": job.get("url"), "title": job.get("title"), "score": job["prefilter_score"]}
+                                 for job in candidates] for user, candidates in ranking.items()},
+                         indent=2, ensure_ascii=False))
+        sys.exit(0)
     
     print("👥 MULTI-USER JOB SEARCH SYSTEM")
     print("=" * 40)
@@ -0,0 +1,198 @@
+"""Background, content-addressed PDF rendering for cover letters.
+
+Cover-letter PDFs used to be laid out synchronously inside the workflow,
+rebuilding ReportLab stylesheets (and fonts) for every letter, under a new
+timestamped name each time. Now:
+
+    submit_pdf(text, title)   -> (path, future)   queue a render in the process pool
+    render_pdf(text, title)   -> path             same, waiting for the file
+    arender_pdf(text, title)  -> path             awaitable
+
+The path is derived from a hash of the layout, title and text
+(`<PDF_DIR>/<ab>/<hash>.pdf`). It is known before rendering starts, so a
+workflow can record it and move on. Identical letters are never rendered
+twice: an existing file is returned immediately, and concurrent submissions
+of the same letter share one render. Each worker process builds the
+stylesheets and registers fonts once (`_styles`, `_fonts`).
+
+Tuning (environment variables):
+    PDF_DIR        output directory (default ~/jobbot/data/pdf)
+    PDF_WORKERS    render processes (default 2; 0 or 1 = render in a background thread)
+    PDF_FONT_PATH  optional TTF font (e.g. DejaVuSans.ttf) for non-Latin text
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from xml.sax.saxutils import escape
+
+RENDER_VERSION = "pdf-v1"
+PDF_DIR = Path(os.getenv("PDF_DIR", "~/jobbot/data/pdf")).expanduser()
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+
+# Page and paragraph settings per letter layout, in points
+LAYOUTS: Dict[str, Dict[str, Any]] = {
+    # AICoverLetterGenerator: "Cover Letter - <job title>", 2 cm margins
+    "letter": {"margin": 56.69, "title_size": 16, "title_after": 30, "body_size": 10,
+               "body_leading": 12, "body_after": 0, "gap": 12},
+    # PDFGenerator: "Søknadsbrev" heading, default margins, 11 pt body
+    "classic": {"margin": 72.0, "title_size": 16, "title_after": 30, "body_size": 11,
+                "body_leading": 14, "body_after": 12, "gap": 6},
+}
+
+@lru_cache(maxsize=None)
+def _fonts() -> Tuple[str, str]:
+    """(body font, title font), registered once per process."""
+    font_path = os.getenv("PDF_FONT_PATH", "")
+    if font_path and Path(font_path).exists():
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        pdfmetrics.registerFont(TTFont("LetterFont", font_path))
+        return "LetterFont", "LetterFont"
+    return "Helvetica", "Helvetica-Bold"
+
+@lru_cache(maxsize=None)
+def _styles(layout: str):
+    """(title style, body style) for a layout, built once per process."""
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    settings = LAYOUTS[layout]
+    body_font, title_font = _fonts()
+    sheet = getSampleStyleSheet()
+    title = ParagraphStyle(f"{layout}-title", parent=sheet["Heading1"], fontName=title_font,
+                           fontSize=settings["title_size"], spaceAfter=settings["title_after"])
+    body = ParagraphStyle(f"{layout}-body", parent=sheet["Normal"], fontName=body_font,
+                          fontSize=settings["body_size"], leading=settings["body_leading"],
+                          spaceAfter=settings["body_after"])
+    return title, body
+
+def pdf_key(text: str, title: str, layout: str = "letter") -> str:
+    return hashlib.sha256("\0".join((RENDER_VERSION, layout, title, text)).encode("utf-8")).hexdigest()
+
+def pdf_path(text: str, title: str, layout: str = "letter", pdf_dir: Optional[Path] = None) -> Path:
+    key = pdf_key(text, title, layout)
+    return Path(pdf_dir or PDF_DIR) / key[:2] / f"{key}.pdf"
+
+def _render(task: Tuple[str, str, str, str]) -> str:
+    """Lay out one letter into `path` (through a temp file, so readers never see half a PDF)."""
+    path, text, title, layout = task
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    settings = LAYOUTS[layout]
+    title_style, body_style = _styles(layout)
+    story = [Paragraph(escape(title), title_style), Spacer(1, 12)]
+    for para in text.split("\n\n"):
+        if para.strip():
+            story.append(Paragraph(escape(para.strip()).replace("\n", "<br/>"), body_style))
+            story.append(Spacer(1, settings["gap"]))
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    margin = settings["margin"]
+    try:
+        SimpleDocTemplate(str(tmp), pagesize=A4, rightMargin=margin, leftMargin=margin,
+                          topMargin=margin, bottomMargin=margin, title=title).build(story)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return str(target)
+
+def _warm_up():
+    _fonts()
+    for layout in LAYOUTS:
+        _styles(layout)
+
+class PDFRenderService:
+    """Render queue over a process pool; one render per distinct letter."""
+
+    def __init__(self, max_workers: int = PDF_WORKERS, pdf_dir: Optional[Path] = None):
+        self.max_workers = max_workers
+        self.pdf_dir = Path(pdf_dir or PDF_DIR)
+        self._executor = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "rendered": 0, "reused": 0, "failed": 0}
+
+    def _pool(self):
+        if self._executor is None:
+            if self.max_workers > 1:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_up)
+                except (OSError, RuntimeError) as e:
+                    # e.g. no /dev/shm or process limits in a restricted container
+                    print(f"⚠️ PDF process pool unavailable ({e}), rendering in a thread")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+        return self._executor
+
+    def submit(self, text: str, title: str, layout: str = "letter") -> Tuple[str, Future]:
+        """(final path, future resolving to it); the render runs in the background."""
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown PDF layout: {layout}")
+        path = pdf_path(text, title, layout, self.pdf_dir)
+        with self._lock:
+            self.stats["submitted"] += 1
+            future = self._inflight.get(str(path))
+            if future is not None:
+                self.stats["reused"] += 1
+                return str(path), future
+            if path.exists():
+                self.stats["reused"] += 1
+                future = Future()
+                future.set_result(str(path))
+                return str(path), future
+            future = self._pool().submit(_render, (str(path), text, title, layout))
+            self._inflight[str(path)] = future
+        future.add_done_callback(lambda done, key=str(path): self._finished(key, done))
+        return str(path), future
+
+    def _finished(self, key: str, future: Future):
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._inflight.pop(key, None)
+            self.stats["failed" if future.cancelled() or error else "rendered"] += 1
+        # Callers that don't wait (generate_pdf_cover_letter(wait=False)) never see the error
+        if future.cancelled():
+            print(f"⚠️ PDF render cancelled: {key}")
+        elif error:
+            print(f"❌ PDF render failed ({key}): {error}")
+
+    def render(self, text: str, title: str, layout: str = "letter") -> str:
+        return self.submit(text, title, layout)[1].result()
+
+    async def arender(self, text: str, title: str, layout: str = "letter") -> str:
+        return await asyncio.wrap_future(self.submit(text, title, layout)[1])
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+_service: Optional[PDFRenderService] = None
+_service_lock = threading.Lock()
+
+def get_pdf_service() -> PDFRenderService:
+    """Process-wide render service, created on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = PDFRenderService()
+    return _service
+
+def submit_pdf(text: str, title: str, layout: str = "letter") -> Tuple[str, Future]:
+    return get_pdf_service().submit(text, title, layout)
+
+def render_pdf(text: str, title: str, layout: str = "letter") -> str:
+    return get_pdf_service().render(text, title, layout)
+
+async def arender_pdf(text: str, title: str, layout: str = "letter") -> str:
+    return await get_pdf_service().arender(text, title, layout)
@@ -0,0 +1,43 @@
+"""Cache-friendly prompt layout: stable candidate prefix first, job-specific content last.
+
+Azure OpenAI reuses the computation for a prompt prefix it has seen recently
+(prompts of 1024+ tokens, matched in 128-token steps), but only when the
+prefix is byte-identical. Our prompts used to start with job details or mix
+them into the resume block, so nothing was ever reused.
+
+`build_messages` always produces
+    system: task instructions + candidate profile   (identical for every job)
+    user:   job-specific request                    (changes per call)
+and normalizes whitespace so indentation or trailing spaces in f-strings
+can't make two prefixes differ. Cached-token counts are read from the
+response usage by the dispatcher and reported per task in
+`get_dispatcher().get_stats()["by_label"]`.
+"""
+import hashlib
+import re
+import textwrap
+from typing import Any, Dict, Iterable, List
+
+CANDIDATE_HEADER = "### CANDIDATE PROFILE"
+REQUEST_HEADER = "### REQUEST"
+
+def normalize_block(text: str) -> str:
+    """Dedent, strip trailing spaces and collapse blank-line runs so equal content is byte-identical."""
+    text = textwrap.dedent(str(text or "")).replace("\r\n", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+def format_list(items: Iterable[Any]) -> str:
+    return ", ".join(str(item) for item in items if item)
+
+def build_messages(instructions: str, candidate: str, request: str) -> List[Dict[str, str]]:
+    """Chat messages with the reusable prefix (instructions + candidate) ahead of the per-job request."""
+    system = f"{normalize_block(instructions)}\n\n{CANDIDATE_HEADER}\n{normalize_block(candidate)}"
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"{REQUEST_HEADER}\n{normalize_block(request)}"},
+    ]
+
+def prefix_fingerprint(messages: List[Dict[str, Any]]) -> str:
+    """Short hash of the system prefix; equal fingerprints mean the provider cache can be hit."""
+    return hashlib.sha256(str(messages[0]["content"]).encode("utf-8")).hexdigest()[:12]
@@ -1,60 +1,105 @@
-"""Resume analyzer for multiple file formats using Azure OpenAI."""
+"""Resume analyzer for multiple file formats using Azure OpenAI.
+
+Extracted text and per-file analyses are cached by the SHA-256 of the file
+bytes, and the unified profile is only rebuilt when the set of file hashes
+changes, so re-running onboarding on unchanged resumes makes no LLM calls.
+New files are extracted together in a process pool (utils/text_extraction).
+"""
 import os
 import json
 from pathlib import Path
-from typing import List, Dict, Any
-import PyPDF2
-import docx
-from openai import AzureOpenAI
+from typing import List, Dict, Any, Optional
+try:
+    from .structured_output import complete_json
+    from .token_budget import RESUME_MERGE_TOKENS, RESUME_TEXT_TOKENS, fit_json, truncate_tokens
+    from .utils.ai_cache import file_set_hash, get_ai_cache, hash_file
+    from .utils.profile_artifact import load_profile
+    from .utils.text_extraction import extract_file, extract_many, pdf_backend
+except ImportError:
+    from structured_output import complete_json
+    from token_budget import RESUME_MERGE_TOKENS, RESUME_TEXT_TOKENS, fit_json, truncate_tokens
+    from utils.ai_cache import file_set_hash, get_ai_cache, hash_file
+    from utils.profile_artifact import load_profile
+    from utils.text_extraction import extract_file, extract_many, pdf_backend
+
+RESUME_TEXT_NAMESPACE = "resume_text"
+RESUME_ANALYSIS_NAMESPACE = "resume_analysis"
+# Bump when text extraction or the analysis prompt changes to invalidate cached entries
+EXTRACTOR_VERSION = "extract-v1"
+ANALYSIS_VERSION = "analysis-v1"
+MANIFEST_NAME = "unified_profile.manifest.json"
 
 class ResumeAnalyzer:
     def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-            api_key=os.getenv("OPENAI_KEY"),
-            api_version="2024-05-01-preview"
-        )
         self.resume_dir = Path("/app/data/resumes")
         self.resume_dir.mkdir(exist_ok=True)
 
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file."""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
-        except Exception as e:
-            print(f"❌ Error reading PDF {pdf_path}: {e}")
-            return ""
+        return extract_file(pdf_path)
 
     def extract_text_from_docx(self, docx_path: str) -> str:
         """Extract text from Word document."""
-        try:
-            doc = docx.Document(docx_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
-        except Exception as e:
-            print(f"❌ Error reading DOCX {docx_path}: {e}")
-            return ""
+        return extract_file(docx_path)
 
     def extract_text_from_file(self, file_path: str) -> str:
         """Extract text from various file formats."""
-        file_path = Path(file_path)
-        
-        if file_path.suffix.lower() == '.pdf':
-            return self.extract_text_from_pdf(str(file_path))
-        elif file_path.suffix.lower() in ['.docx', '.doc']:
-            return self.extract_text_from_docx(str(file_path))
-        elif file_path.suffix.lower() == '.txt':
-            return file_path.read_text(encoding='utf-8')
-        else:
-            print(f"❌ Unsupported file format: {file_path.suffix}")
-            return ""
+        return extract_file(str(file_path))
+
+    def extract_texts_cached(self, files: List[Path], file_hashes: Dict[str, str]) -> Dict[str, str]:
+        """{file name: text}; files not extracted before are extracted together in parallel."""
+        cache = get_ai_cache()
+        texts = {}
+        missing = []
+        for file in files:
+            cached = cache.get(RESUME_TEXT_NAMESPACE, EXTRACTOR_VERSION, file_hashes[file.name]) if cache else None
+            if cached is not None:
+                texts[file.name] = cached["text"]
+            else:
+                missing.append(file)
+
+        if missing:
+            print(f"📖 Extracting {len(missing)} files ({pdf_backend()} PDF backend)...")
+            extracted = extract_many([str(file) for file in missing])
+            for file in missing:
+                text = extracted[str(file)]
+                texts[file.name] = text
+                if cache and text:
+                    cache.put(RESUME_TEXT_NAMESPACE, EXTRACTOR_VERSION, file_hashes[file.name], {"text": text})
+        return texts
+
+    def _analysis_key(self) -> str:
+        return f"{ANALYSIS_VERSION}:{os.getenv('AZURE_OPENAI_DEPLOYMENT_CHAT', 'gpt-4')}"
+
+    def cached_analysis(self, file_path: Path, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Analysis of identical bytes from an earlier run, if any."""
+        cache = get_ai_cache()
+        cached = cache.get(RESUME_ANALYSIS_NAMESPACE, self._analysis_key(), file_hash) if cache else None
+        if cached is None:
+            return None
+        print(f"♻️ {file_path.name}: unchanged, reusing cached analysis")
+        return {**cached, "source_file": file_path.name}
+
+    def analyze_resume_text(self, resume_text: str, file_path: Path, file_hash: str) -> Dict[str, Any]:
+        """analyze_single_resume, caching successful results under the file hash."""
+        analysis = self.analyze_single_resume(resume_text, file_path.name)
+        cache = get_ai_cache()
+        if cache and 'error' not in analysis:
+            cache.put(RESUME_ANALYSIS_NAMESPACE, self._analysis_key(), file_hash, analysis)
+        return analysis
+
+    def _load_unchanged_profile(self, set_hash: str) -> Optional[Dict[str, Any]]:
+        """The saved unified profile, if it was built from exactly this set of files."""
+        manifest_file = self.resume_dir / MANIFEST_NAME
+        profile_file = self.resume_dir / "unified_profile.json"
+        try:
+            manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+            if manifest.get("set_hash") != set_hash:
+                return None
+            profile = json.loads(profile_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return profile if 'error' not in profile else None
 
     def analyze_single_resume(self, resume_text: str, filename: str) -> Dict[str, Any]:
         """Analyze single resume using Azure OpenAI."""
@@ -62,9 +107,9 @@ class ResumeAnalyzer:
         Analyze this resume and extract structured information. The resume is from file: {filename}
 
         Resume text:
-        {resume_text[:4000]}
+        {truncate_tokens(resume_text, RESUME_TEXT_TOKENS)}
 
-        Extract and return ONLY valid JSON with this structure:
+        Extract and return JSON with this structure:
         {{
             "personal_info": {{
                 "name": "Full Name",
@@ -99,18 +144,11 @@ class ResumeAnalyzer:
         """
 
         try:
-            response = self.client.chat.completions.create(
+            result = complete_json(
+                "resume_analysis", [{"role": "user", "content": prompt}],
                 model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-                messages=[{"role": "user", "content": prompt}],
                 temperature=0.1
             )
-            
-            result_text = response.choices[0].message.content
-            
-            # Clean JSON response
-            result_text = result_text.replace('```json\n', '').replace('\n```', '').strip()
-            
-            result = json.loads(result_text)
             result['source_file'] = filename
             
             print(f"✅ Analyzed resume: {filename}")
@@ -136,9 +174,9 @@ class ResumeAnalyzer:
         Combine them into ONE comprehensive professional profile.
         
         Resume analyses:
-        {json.dumps(valid_analyses, indent=2)[:6000]}
+        {fit_json(valid_analyses, RESUME_MERGE_TOKENS)}
 
-        Create a unified profile with ONLY valid JSON:
+        Create a unified profile as JSON:
         {{
             "unified_profile": {{
                 "personal_info": {{"name": "...", "email": "...", "phone": "...", "location": "..."}},
@@ -163,17 +201,12 @@ class ResumeAnalyzer:
         """
 
         try:
-            response = self.client.chat.completions.create(
+            combined_profile = complete_json(
+                "unified_profile", [{"role": "user", "content": combine_prompt}],
                 model=os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4"),
-                messages=[{"role": "user", "content": combine_prompt}],
                 temperature=0.1
             )
             
-            result_text = response.choices[0].message.content
-            result_text = result_text.replace('```json\n', '').replace('\n```', '').strip()
-            
-            combined_profile = json.loads(result_text)
-            
             print(f"✅ Combined {len(valid_analyses)} resumes into unified profile")
             return combined_profile
             
@@ -189,6 +222,7 @@ class ResumeAnalyzer:
         resume_files = []
         for pattern in ['*.pdf', '*.docx', '*.doc', '*.txt']:
             resume_files.extend(self.resume_dir.glob(pattern))
+        resume_files.sort()
         
         if not resume_files:
             print("❌ No resume files found!")
@@ -198,22 +232,32 @@ class ResumeAnalyzer:
         print(f"📄 Found {len(resume_files)} resume files:")
         for file in resume_files:
             print(f"  - {file.name}")
+
+        file_hashes = {file.name: hash_file(file) for file in resume_files}
+        set_hash = file_set_hash(list(file_hashes.values()))
+        unchanged = self._load_unchanged_profile(set_hash)
+        if unchanged is not None:
+            print("♻️ Resume files unchanged, reusing unified profile")
+            return unchanged
         
-        # Analyze each resume
-        resume_analyses = []
+        # Only files whose bytes weren't analyzed before need extraction + AI
+        analyses = {}
+        pending = []
         for resume_file in resume_files:
-            print(f"\n📖 Processing: {resume_file.name}")
-            
-            # Extract text
-            resume_text = self.extract_text_from_file(str(resume_file))
+            cached = self.cached_analysis(resume_file, file_hashes[resume_file.name])
+            if cached is not None:
+                analyses[resume_file.name] = cached
+            else:
+                pending.append(resume_file)
+
+        texts = self.extract_texts_cached(pending, file_hashes)
+        for resume_file in pending:
+            resume_text = texts[resume_file.name]
             if not resume_text:
                 continue
-            
-            print(f"📝 Extracted {len(resume_text)} characters")
-            
-            # Analyze with AI
-            analysis = self.analyze_single_resume(resume_text, resume_file.name)
-            resume_analyses.append(analysis)
+            print(f"\n📖 Processing: {resume_file.name} ({len(resume_text)} characters)")
+            analyses[resume_file.name] = self.analyze_resume_text(resume_text, resume_file, file_hashes[resume_file.name])
+        resume_analyses = [analyses[file.name] for file in resume_files if file.name in analyses]
         
         # Combine all analyses
         print(f"\n🔄 Combining {len(resume_analyses)} resume analyses...")
@@ -223,8 +267,15 @@ class ResumeAnalyzer:
         profile_file = self.resume_dir / "unified_profile.json"
         with open(profile_file, 'w', encoding='utf-8') as f:
             json.dump(unified_profile, f, indent=2, ensure_ascii=False)
+
+        # Record which file contents it was built from; errors are never reused
+        if 'error' not in unified_profile:
+            manifest = {"set_hash": set_hash, "files": file_hashes}
+            (self.resume_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
         
         print(f"💾 Saved unified profile to: {profile_file}")
+        # Recompile the artifact the resume readers load, now rather than on their next run
+        load_profile(self.resume_dir)
         return unified_profile
 
 if __name__ == "__main__":
@@ -1,44 +1,52 @@
-"""Combined scraper for both finn.no and arbeidsplassen.nav.no."""
+"""Combined scraper for all registered job sources (finn.no, arbeidsplassen.nav.no, ...)."""
 import sys
 import os
 sys.path.append('/app')
 
-from .finn_rss import fetch_new_jobs as fetch_finn_jobs
-from .nav_scraper import fetch_nav_jobs
+from .source_adapters import get_enabled_adapters, fetch_from_adapters
+from ..utils.job_identity import dedup_jobs
+from ..utils.job_output import write_latest_jobs
+from ..utils.scan_state import ScanStateStore
 from datetime import datetime
 import json
 
-def fetch_all_jobs():
-    """Fetch jobs from all configured sources."""
+def fetch_all_jobs(config: dict = None, incremental: bool = False, scan_state: ScanStateStore = None):
+    """Fetch jobs from all enabled sources concurrently.
+
+    With `incremental` (or a `scan_state` store) only postings not committed by
+    a previous run of the same search URL are returned; pass your own store and
+    call its `commit_peeked()` once they have been processed.
+    """
+    adapters = get_enabled_adapters(config)
+    print(f"Fetching jobs from {len(adapters)} sources: {', '.join(a.name for a in adapters)}")
+
     all_jobs = []
-    
-    print("Fetching jobs from finn.no...")
-    finn_jobs = fetch_finn_jobs()
-    all_jobs.extend(finn_jobs)
-    print(f"✓ Found {len(finn_jobs)} jobs from finn.no")
-    
-    print("Fetching jobs from arbeidsplassen.nav.no...")
-    nav_jobs = fetch_nav_jobs()
-    all_jobs.extend(nav_jobs)
-    print(f"✓ Found {len(nav_jobs)} jobs from nav.no")
-    
-    # Remove duplicates based on URL
-    unique_jobs = {}
-    for job in all_jobs:
-        if job['url'] and job['url'] not in unique_jobs:
-            unique_jobs[job['url']] = job
-    
-    final_jobs = list(unique_jobs.values())
+    for name, jobs in fetch_from_adapters(adapters, config).items():
+        all_jobs.extend(jobs)
+        print(f"✓ Found {len(jobs)} jobs from {name}")
+
+    if incremental or scan_state is not None:
+        scan_state = scan_state or ScanStateStore()
+        by_search_url = {}
+        for job in all_jobs:
+            by_search_url.setdefault(job.get("search_url", job.get("source", "")), []).append(job)
+        all_jobs = [job for search_url, jobs in by_search_url.items()
+                    for job in scan_state.peek_new(search_url, jobs)]
+
+    # Remove duplicates (canonical URL, posting ID, cross-source fingerprint)
+    final_jobs = dedup_jobs(all_jobs)
     print(f"Total unique jobs: {len(final_jobs)}")
-    
+
     return final_jobs
 
 if __name__ == "__main__":
-    jobs = fetch_all_jobs()
-    
-    # Save to file for n8n to process
-    output_file = "/app/data/latest_jobs.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(jobs, f, indent=2, ensure_ascii=False)
-    
+    scan_state = ScanStateStore() if "--incremental" in sys.argv else None
+    incremental = scan_state is not None
+    jobs = fetch_all_jobs(scan_state=scan_state)
+
+    # Save to file for n8n to process (format from JOBS_OUTPUT_FORMAT); new postings only go to new_jobs
+    output_file = write_latest_jobs(jobs, name="new_jobs" if incremental else "latest_jobs")
+    if incremental:
+        scan_state.commit_peeked()
+
     print(f"Saved {len(jobs)} jobs to {output_file}")
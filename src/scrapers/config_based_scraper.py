@@ -12,6 +12,10 @@ import os
 # Add parent directory to path for imports
 sys.path.append('/app')
 
+from ..utils.job_identity import dedup_jobs
+from ..utils.job_output import write_latest_jobs
+from ..utils.scan_state import ScanStateStore
+
 CONFIG_FILE = Path("/app/src/config/search_config.json")
 
 def load_config():
@@ -40,8 +44,8 @@ def filter_by_keywords(text: str, keywords: list, exclude_keywords: list = None)
     
     return has_keyword and not has_exclude
 
-def fetch_finn_jobs_config(config: dict) -> list:
-    """Fetch finn.no jobs using configuration."""
+def fetch_finn_jobs_config(config: dict, scan_state: ScanStateStore = None) -> list:
+    """Fetch finn.no jobs using configuration (only new ones when scan_state is given)."""
     if not config.get("search_sources", {}).get("finn.no", {}).get("enabled"):
         return []
     
@@ -49,6 +53,7 @@ def fetch_finn_jobs_config(config: dict) -> list:
     all_jobs = []
     
     for rss_url in finn_config.get("rss_urls", []):
+        start = len(all_jobs)
         try:
             print(f"Fetching from finn RSS: {rss_url}")
             response = requests.get(rss_url, timeout=30)
@@ -75,14 +80,17 @@ def fetch_finn_jobs_config(config: dict) -> list:
                         'source': 'finn.no',
                         'created_at': datetime.now().isoformat()
                     })
+            
+            if scan_state:
+                all_jobs[start:] = scan_state.peek_new(rss_url, all_jobs[start:])
         
         except Exception as e:
             print(f"Error fetching finn RSS {rss_url}: {e}")
     
     return all_jobs
 
-def fetch_nav_jobs_config(config: dict) -> list:
-    """Fetch nav.no jobs using configuration."""
+def fetch_nav_jobs_config(config: dict, scan_state: ScanStateStore = None) -> list:
+    """Fetch nav.no jobs using configuration (only new ones when scan_state is given)."""
     if not config.get("search_sources", {}).get("arbeidsplassen.nav.no", {}).get("enabled"):
         return []
     
@@ -94,6 +102,7 @@ def fetch_nav_jobs_config(config: dict) -> list:
     }
     
     for search_url in nav_config.get("search_urls", []):
+        start = len(all_jobs)
         try:
             print(f"Fetching from NAV: {search_url}")
             response = requests.get(search_url, headers=headers, timeout=30)
@@ -152,45 +161,52 @@ def fetch_nav_jobs_config(config: dict) -> list:
                 except Exception as e:
                     print(f"Error parsing nav job card: {e}")
                     continue
+            
+            if scan_state:
+                all_jobs[start:] = scan_state.peek_new(search_url, all_jobs[start:])
         
         except Exception as e:
             print(f"Error fetching nav URL {search_url}: {e}")
     
     return all_jobs
 
-def fetch_all_jobs_config():
-    """Fetch all jobs using configuration file."""
+def fetch_all_jobs_config(incremental: bool = False, scan_state: ScanStateStore = None):
+    """Fetch all jobs using configuration file.
+    
+    With `incremental` (or a `scan_state` store) only postings not committed by
+    a previous run of the same search URL are returned; pass your own store and
+    call its `commit_peeked()` once they have been processed.
+    """
     config = load_config()
     if not config:
         return []
     
+    if incremental and scan_state is None:
+        scan_state = ScanStateStore()
     all_jobs = []
     
     # Fetch from finn.no
-    finn_jobs = fetch_finn_jobs_config(config)
+    finn_jobs = fetch_finn_jobs_config(config, scan_state)
     all_jobs.extend(finn_jobs)
     print(f"✓ Found {len(finn_jobs)} relevant jobs from finn.no")
     
     # Fetch from nav.no
-    nav_jobs = fetch_nav_jobs_config(config)
+    nav_jobs = fetch_nav_jobs_config(config, scan_state)
     all_jobs.extend(nav_jobs)
     print(f"✓ Found {len(nav_jobs)} relevant jobs from nav.no")
     
-    # Remove duplicates based on URL
-    unique_jobs = {}
-    for job in all_jobs:
-        if job.get('url') and job['url'] not in unique_jobs:
-            unique_jobs[job['url']] = job
-    
-    return list(unique_jobs.values())
+    # Remove duplicates (canonical URL, posting ID, cross-source fingerprint)
+    return dedup_jobs(all_jobs)
 
 if __name__ == "__main__":
-    jobs = fetch_all_jobs_config()
+    scan_state = ScanStateStore() if "--incremental" in sys.argv else None
+    incremental = scan_state is not None
+    jobs = fetch_all_jobs_config(scan_state=scan_state)
     print(f"Total filtered jobs: {len(jobs)}")
     
-    # Save results
-    output_file = "/app/data/latest_jobs.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(jobs, f, indent=2, ensure_ascii=False)
+    # Save results (format from JOBS_OUTPUT_FORMAT); new postings only go to new_jobs
+    output_file = write_latest_jobs(jobs, name="new_jobs" if incremental else "latest_jobs")
+    if incremental:
+        scan_state.commit_peeked()
     
     print(f"Saved to {output_file}")
@@ -5,10 +5,10 @@ from datetime import datetime
 import sqlite3
 from pathlib import Path
 
-def fetch_new_jobs():
-    """Fetch new jobs from finn.no RSS feed."""
-    rss_url = "https://www.finn.no/job/fulltime/search.rss?location=0.20001"
-    
+DEFAULT_RSS_URL = "https://www.finn.no/job/fulltime/search.rss?location=0.20001"
+
+def fetch_new_jobs(rss_url: str = DEFAULT_RSS_URL):
+    """Fetch new jobs from a finn.no RSS feed."""
     try:
         response = requests.get(rss_url, timeout=30)
         response.raise_for_status()
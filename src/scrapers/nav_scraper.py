@@ -5,7 +5,9 @@ from datetime import datetime
 import time
 import json
 
-def fetch_nav_jobs(base_url: str = "https://arbeidsplassen.nav.no/stillinger?county=INNLANDET&v=5&municipal=INNLANDET.%C3%98STRE+TOTEN&municipal=INNLANDET.VESTRE+TOTEN"):
+DEFAULT_SEARCH_URL = "https://arbeidsplassen.nav.no/stillinger?county=INNLANDET&v=5&municipal=INNLANDET.%C3%98STRE+TOTEN&municipal=INNLANDET.VESTRE+TOTEN"
+
+def fetch_nav_jobs(base_url: str = DEFAULT_SEARCH_URL):
     """Scrape jobs from arbeidsplassen.nav.no with geographic filter."""
     
     headers = {
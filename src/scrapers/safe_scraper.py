@@ -1,4 +1,5 @@
 """Safe scraper with anti-detection measures."""
+import asyncio
 import json
 import requests
 import xml.etree.ElementTree as ET
@@ -10,17 +11,31 @@ import random
 from urllib.robotparser import RobotFileParser
 import sys
 
+from ..utils.job_identity import dedup_jobs
+from ..utils.job_output import write_latest_jobs
+from ..utils.scan_state import ScanStateStore
+from ..utils.async_http import create_async_client
+
 CONFIG_FILE = Path("/app/src/config/search_config.json")
 
 class SafeScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, scan_state: ScanStateStore = None):
+        self._session = None
+        # When set, each search URL only yields postings not seen on a previous run
+        self.scan_state = scan_state
         # Rotate User-Agents
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         ]
+    
+    @property
+    def session(self) -> requests.Session:
+        """requests session, created on first use (the async subclass never needs one)."""
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
         
     def check_robots_txt(self, base_url: str) -> bool:
         """Check if scraping is allowed by robots.txt"""
@@ -32,13 +47,9 @@ class SafeScraper:
         except:
             return True  # If can't check, assume allowed
     
-    def safe_request(self, url: str, delay_range=(1, 3)) -> requests.Response:
-        """Make request with random delay and rotating user agent."""
-        # Random delay between requests
-        time.sleep(random.uniform(*delay_range))
-        
-        # Random user agent
-        headers = {
+    def request_headers(self) -> dict:
+        """Browser-like headers with a random user agent."""
+        return {
             'User-Agent': random.choice(self.user_agents),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
@@ -46,11 +57,92 @@ class SafeScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
+    
+    def safe_request(self, url: str, delay_range=(1, 3)) -> requests.Response:
+        """Make request with random delay and rotating user agent."""
+        # Random delay between requests
+        time.sleep(random.uniform(*delay_range))
         
-        response = self.session.get(url, headers=headers, timeout=30)
+        response = self.session.get(url, headers=self.request_headers(), timeout=30)
         response.raise_for_status()
         return response
     
+    def record_scan(self, search_url: str, jobs: list) -> list:
+        """Return only postings not committed by a previous run (all of them without scan state)."""
+        if self.scan_state:
+            return self.scan_state.peek_new(search_url, jobs)
+        return jobs
+    
+    def parse_finn_rss(self, content: bytes, keywords: list, exclude_keywords: list) -> list:
+        """Parse a finn.no RSS feed and apply keyword filtering."""
+        jobs = []
+        root = ET.fromstring(content)
+        
+        for item in root.findall('.//item'):
+            title = item.find('title').text if item.find('title') is not None else ""
+            link = item.find('link').text if item.find('link') is not None else ""
+            description = item.find('description').text if item.find('description') is not None else ""
+            
+            full_text = f"{title} {description}".lower()
+            
+            # Keyword filtering
+            has_keyword = any(kw.lower() in full_text for kw in keywords) if keywords else True
+            has_exclude = any(ex.lower() in full_text for ex in exclude_keywords) if exclude_keywords else False
+            
+            if has_keyword and not has_exclude:
+                jobs.append({
+                    'title': title,
+                    'url': link,
+                    'description': description,
+                    'source': 'finn.no',
+                    'created_at': datetime.now().isoformat()
+                })
+        
+        return jobs
+    
+    def parse_nav_page(self, content: bytes, keywords: list, exclude_keywords: list) -> list:
+        """Parse a NAV search results page and apply keyword filtering."""
+        jobs = []
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Try to find job listings with various selectors
+        job_elements = (
+            soup.find_all('a', href=lambda x: x and '/stilling/' in x) or
+            soup.find_all('article') or
+            soup.find_all('div', class_=lambda x: x and 'job' in x.lower())
+        )
+        
+        for element in job_elements[:20]:  # Limit to first 20 to avoid overload
+            try:
+                title = element.get_text(strip=True)[:100]  # Limit length
+                href = element.get('href') if element.name == 'a' else element.find('a', href=True)
+                
+                if href:
+                    job_url = href if href.startswith('http') else f"https://arbeidsplassen.nav.no{href}"
+                    
+                    # Simple keyword check
+                    if keywords:
+                        has_keyword = any(kw.lower() in title.lower() for kw in keywords)
+                        if not has_keyword:
+                            continue
+                    
+                    if exclude_keywords:
+                        has_exclude = any(ex.lower() in title.lower() for ex in exclude_keywords)
+                        if has_exclude:
+                            continue
+                    
+                    jobs.append({
+                        'title': title,
+                        'url': job_url,
+                        'source': 'arbeidsplassen.nav.no',
+                        'created_at': datetime.now().isoformat()
+                    })
+            
+            except Exception as e:
+                continue
+        
+        return jobs
+    
     def fetch_finn_rss(self, rss_urls: list, keywords: list, exclude_keywords: list) -> list:
         """Safely fetch from finn.no RSS (low risk)."""
         jobs = []
@@ -60,27 +152,7 @@ class SafeScraper:
                 print(f"Fetching finn RSS: {rss_url}")
                 response = self.safe_request(rss_url, delay_range=(0.5, 1.5))  # Shorter delay for RSS
                 
-                root = ET.fromstring(response.content)
-                
-                for item in root.findall('.//item'):
-                    title = item.find('title').text if item.find('title') is not None else ""
-                    link = item.find('link').text if item.find('link') is not None else ""
-                    description = item.find('description').text if item.find('description') is not None else ""
-                    
-                    full_text = f"{title} {description}".lower()
-                    
-                    # Keyword filtering
-                    has_keyword = any(kw.lower() in full_text for kw in keywords) if keywords else True
-                    has_exclude = any(ex.lower() in full_text for ex in exclude_keywords) if exclude_keywords else False
-                    
-                    if has_keyword and not has_exclude:
-                        jobs.append({
-                            'title': title,
-                            'url': link,
-                            'description': description,
-                            'source': 'finn.no',
-                            'created_at': datetime.now().isoformat()
-                        })
+                jobs.extend(self.record_scan(rss_url, self.parse_finn_rss(response.content, keywords, exclude_keywords)))
                 
             except Exception as e:
                 print(f"Error fetching finn RSS: {e}")
@@ -101,62 +173,106 @@ class SafeScraper:
                 print(f"Carefully fetching NAV: {url}")
                 response = self.safe_request(url, delay_range=(2, 5))  # Longer delays
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
+                jobs.extend(self.record_scan(url, self.parse_nav_page(response.content, keywords, exclude_keywords)))
                 
-                # Try to find job listings with various selectors
-                job_elements = (
-                    soup.find_all('a', href=lambda x: x and '/stilling/' in x) or
-                    soup.find_all('article') or
-                    soup.find_all('div', class_=lambda x: x and 'job' in x.lower())
-                )
+                # Extra delay after each URL
+                time.sleep(random.uniform(3, 6))
                 
-                for element in job_elements[:20]:  # Limit to first 20 to avoid overload
-                    try:
-                        title = element.get_text(strip=True)[:100]  # Limit length
-                        href = element.get('href') if element.name == 'a' else element.find('a', href=True)
-                        
-                        if href:
-                            job_url = href if href.startswith('http') else f"https://arbeidsplassen.nav.no{href}"
-                            
-                            # Simple keyword check
-                            if keywords:
-                                has_keyword = any(kw.lower() in title.lower() for kw in keywords)
-                                if not has_keyword:
-                                    continue
-                            
-                            if exclude_keywords:
-                                has_exclude = any(ex.lower() in title.lower() for ex in exclude_keywords)
-                                if has_exclude:
-                                    continue
-                            
-                            jobs.append({
-                                'title': title,
-                                'url': job_url,
-                                'source': 'arbeidsplassen.nav.no',
-                                'created_at': datetime.now().isoformat()
-                            })
-                    
-                    except Exception as e:
-                        continue
+            except Exception as e:
+                print(f"Error fetching NAV: {e}")
+        
+        return jobs
+
+class AsyncSafeScraper(SafeScraper):
+    """asyncio variant of SafeScraper on a pooled httpx client (HTTP/2 when available).
+    
+    Requests to the same site stay sequential with the same random delays, so
+    the anti-detection behaviour is unchanged; finn.no and NAV are fetched
+    concurrently and the delays no longer block the event loop. Return
+    shapes are the same as the sync class.
+    """
+    
+    def __init__(self, scan_state: ScanStateStore = None):
+        super().__init__(scan_state)
+        self.client = create_async_client()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def aclose(self):
+        await self.client.aclose()
+    
+    async def safe_request(self, url: str, delay_range=(1, 3)):
+        """Make request with random delay and rotating user agent."""
+        await asyncio.sleep(random.uniform(*delay_range))
+        
+        headers = self.request_headers()
+        # Hop-by-hop headers are not allowed over HTTP/2; httpx keeps connections alive itself
+        headers.pop('Connection', None)
+        
+        response = await self.client.get(url, headers=headers)
+        response.raise_for_status()
+        return response
+    
+    async def fetch_finn_rss(self, rss_urls: list, keywords: list, exclude_keywords: list) -> list:
+        """Safely fetch from finn.no RSS (low risk)."""
+        jobs = []
+        
+        for rss_url in rss_urls:
+            try:
+                print(f"Fetching finn RSS: {rss_url}")
+                response = await self.safe_request(rss_url, delay_range=(0.5, 1.5))
+                
+                jobs.extend(self.record_scan(rss_url, self.parse_finn_rss(response.content, keywords, exclude_keywords)))
+                
+            except Exception as e:
+                print(f"Error fetching finn RSS: {e}")
+        
+        return jobs
+    
+    async def fetch_nav_carefully(self, search_urls: list, keywords: list, exclude_keywords: list) -> list:
+        """Carefully fetch from NAV (higher risk)."""
+        jobs = []
+        
+        # RobotFileParser is blocking; keep it off the event loop
+        if not await asyncio.to_thread(self.check_robots_txt, "https://arbeidsplassen.nav.no"):
+            print("❌ NAV robots.txt disallows scraping")
+            return []
+        
+        for url in search_urls:
+            try:
+                print(f"Carefully fetching NAV: {url}")
+                response = await self.safe_request(url, delay_range=(2, 5))
+                
+                jobs.extend(self.record_scan(url, self.parse_nav_page(response.content, keywords, exclude_keywords)))
                 
                 # Extra delay after each URL
-                time.sleep(random.uniform(3, 6))
+                await asyncio.sleep(random.uniform(3, 6))
                 
             except Exception as e:
                 print(f"Error fetching NAV: {e}")
         
         return jobs
 
-def safe_fetch_all():
-    """Main function with safety measures."""
+def load_config() -> dict:
     try:
         with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+            return json.load(f)
     except:
         print("❌ Cannot load config")
+        return {}
+
+def safe_fetch_all(incremental: bool = False, scan_state: ScanStateStore = None):
+    """Main function with safety measures; `incremental` (or a `scan_state` store) returns only new
+    postings; pass your own store and call its `commit_peeked()` once they have been processed."""
+    config = load_config()
+    if not config:
         return []
     
-    scraper = SafeScraper()
+    scraper = SafeScraper(scan_state or (ScanStateStore() if incremental else None))
     all_jobs = []
     
     # Finn.no (RSS - safe)
@@ -181,14 +297,51 @@ def safe_fetch_all():
         all_jobs.extend(nav_jobs)
         print(f"✅ NAV.no: {len(nav_jobs)} jobs")
     
-    # Remove duplicates
-    unique_jobs = {job['url']: job for job in all_jobs if job.get('url')}
+    # Remove duplicates (canonical URL, posting ID, cross-source fingerprint)
+    return dedup_jobs(all_jobs)
+
+async def async_safe_fetch_all(incremental: bool = False, scan_state: ScanStateStore = None):
+    """Async variant of safe_fetch_all; finn.no and NAV are fetched concurrently."""
+    config = load_config()
+    if not config:
+        return []
+    
+    sources = config.get("search_sources", {})
+    finn_config = sources.get("finn.no", {})
+    nav_config = sources.get("arbeidsplassen.nav.no", {})
+    
+    async with AsyncSafeScraper(scan_state or (ScanStateStore() if incremental else None)) as scraper:
+        tasks = []
+        if finn_config.get("enabled"):
+            tasks.append(scraper.fetch_finn_rss(
+                finn_config.get("rss_urls", []),
+                finn_config.get("keywords", []),
+                finn_config.get("exclude_keywords", [])
+            ))
+        if nav_config.get("enabled"):
+            tasks.append(scraper.fetch_nav_carefully(
+                nav_config.get("search_urls", []),
+                nav_config.get("keywords", []),
+                nav_config.get("exclude_keywords", [])
+            ))
+        results = await asyncio.gather(*tasks)
+    
+    all_jobs = [job for jobs in results for job in jobs]
+    print(f"✅ Fetched {len(all_jobs)} jobs")
     
-    return list(unique_jobs.values())
+    # Remove duplicates (canonical URL, posting ID, cross-source fingerprint)
+    return dedup_jobs(all_jobs)
 
 if __name__ == "__main__":
-    jobs = safe_fetch_all()
+    scan_state = ScanStateStore() if "--incremental" in sys.argv else None
+    incremental = scan_state is not None
+    if "--async" in sys.argv:
+        jobs = asyncio.run(async_safe_fetch_all(scan_state=scan_state))
+    else:
+        jobs = safe_fetch_all(scan_state=scan_state)
     print(f"📊 Total unique jobs: {len(jobs)}")
     
-    with open("/app/data/latest_jobs.json", 'w', encoding='utf-8') as f:
-        json.dump(jobs, f, indent=2, ensure_ascii=False)
+    output_file = write_latest_jobs(jobs, name="new_jobs" if incremental else "latest_jobs")
+    if incremental:
+        scan_state.commit_peeked()
+    print(f"💾 Saved to {output_file}")
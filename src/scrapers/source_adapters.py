@@ -0,0 +1,141 @@
+"""Pluggable job-source adapters with concurrent fan-out.
+
+Each adapter wraps one job source (finn.no RSS, arbeidsplassen.nav.no HTML,
+Playwright multi-site scraping) behind the same small interface, so
+`fetch_all_jobs` can run every enabled source at once instead of one after
+another. New sources are added by subclassing `SourceAdapter` and decorating
+the class with `@register_adapter`.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Optional, Type
+
+from .finn_rss import fetch_new_jobs as fetch_finn_jobs, DEFAULT_RSS_URL
+from .nav_scraper import fetch_nav_jobs, DEFAULT_SEARCH_URL
+
+SOURCE_ADAPTERS: Dict[str, Type["SourceAdapter"]] = {}
+
+def register_adapter(adapter_cls: Type["SourceAdapter"]) -> Type["SourceAdapter"]:
+    """Class decorator that makes an adapter available to `fetch_all_jobs`."""
+    SOURCE_ADAPTERS[adapter_cls.name] = adapter_cls
+    return adapter_cls
+
+class SourceAdapter:
+    """Base class for a single job source.
+
+    `config_key` is the key under `search_sources` in search_config.json.
+    When no config is given the adapter falls back to `enabled_by_default`
+    and its built-in search URL. Every returned job carries the
+    `search_url` it came from, so callers can keep per-search scan state.
+    """
+    name = ""
+    config_key = ""
+    timeout = 60
+    enabled_by_default = False
+
+    def source_config(self, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if config is None:
+            return {}
+        return config.get("search_sources", {}).get(self.config_key, {})
+
+    def is_enabled(self, config: Optional[Dict[str, Any]]) -> bool:
+        if config is None:
+            return self.enabled_by_default
+        return bool(self.source_config(config).get("enabled"))
+
+    def get_timeout(self, config: Optional[Dict[str, Any]]) -> float:
+        return self.source_config(config).get("timeout", self.timeout)
+
+    def fetch(self, config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+@register_adapter
+class FinnRssAdapter(SourceAdapter):
+    """finn.no RSS feeds."""
+    name = "finn_rss"
+    config_key = "finn.no"
+    timeout = 45
+    enabled_by_default = True
+
+    def fetch(self, config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rss_urls = self.source_config(config).get("rss_urls", [])
+        if not rss_urls:
+            rss_urls = [DEFAULT_RSS_URL]
+
+        jobs = []
+        for rss_url in rss_urls:
+            jobs.extend(dict(job, search_url=rss_url) for job in fetch_finn_jobs(rss_url))
+        return jobs
+
+@register_adapter
+class NavHtmlAdapter(SourceAdapter):
+    """arbeidsplassen.nav.no search result pages."""
+    name = "nav_html"
+    config_key = "arbeidsplassen.nav.no"
+    timeout = 60
+    enabled_by_default = True
+
+    def fetch(self, config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        search_urls = self.source_config(config).get("search_urls", [])
+        if not search_urls:
+            search_urls = [DEFAULT_SEARCH_URL]
+
+        jobs = []
+        for search_url in search_urls:
+            jobs.extend(dict(job, search_url=search_url) for job in fetch_nav_jobs(search_url))
+        return jobs
+
+@register_adapter
+class PlaywrightAdapter(SourceAdapter):
+    """Headless browser scraping through `MultiSiteScraper`.
+
+    Disabled unless `search_sources.playwright.enabled` is set, because it
+    needs a Chromium install and is by far the slowest source.
+    """
+    name = "playwright"
+    config_key = "playwright"
+    timeout = 300
+
+    def fetch(self, config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from ..multi_site_scraper import MultiSiteScraper
+
+        return asyncio.run(MultiSiteScraper().scrape_all_sites(config or {}))
+
+def get_enabled_adapters(config: Optional[Dict[str, Any]] = None) -> List[SourceAdapter]:
+    """Instantiate every registered adapter that is enabled for `config`."""
+    adapters = [adapter_cls() for adapter_cls in SOURCE_ADAPTERS.values()]
+    return [adapter for adapter in adapters if adapter.is_enabled(config)]
+
+def fetch_from_adapters(adapters: List[SourceAdapter],
+                        config: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Run all adapters concurrently and collect their jobs by adapter name.
+
+    Every adapter gets its own deadline measured from the moment the fan-out
+    starts. A source that errors or misses its deadline contributes an empty
+    list; the other sources are not held back by it.
+    """
+    results = {}
+    if not adapters:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=len(adapters), thread_name_prefix="source")
+    started = time.monotonic()
+    futures = {adapter.name: (adapter, executor.submit(adapter.fetch, config)) for adapter in adapters}
+
+    try:
+        for name, (adapter, future) in futures.items():
+            remaining = adapter.get_timeout(config) - (time.monotonic() - started)
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                print(f"⏱️ Source {name} timed out after {adapter.get_timeout(config)}s")
+                results[name] = []
+            except Exception as e:
+                print(f"❌ Source {name} failed: {e}")
+                results[name] = []
+    finally:
+        # Don't wait for timed-out sources; their threads finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
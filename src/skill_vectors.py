@@ -0,0 +1,253 @@
+"""Normalized skill taxonomy and dense skill vectors for profiles and postings.
+
+The candidate's skills used to exist only as a free-text string rebuilt on
+every run, and the only way to compare it with a posting was an LLM call.
+Now the unified profile is compiled once into
+
+    skills        canonical taxonomy skills with weights ("forklift": 1.0, ...)
+    other_skills  skills outside the taxonomy, kept as normalized text
+    vector        L2-normalized feature-hashed vector (VECTOR_DIM floats)
+
+and saved as `skill_profile.json` next to the user's config.json. Postings
+are mapped into the same space (`job_matrix`), so scoring many jobs is one
+NumPy matrix-vector product: `score_jobs(vector, jobs)` returns cosine
+similarities in [0, 1].
+
+Aliases are matched on `local_ranker.tokenize` tokens, Norwegian and English;
+single-word aliases of 4+ letters also match as the start of a compound
+("lagermedarbeider" -> warehouse, "truckførerbevis" -> forklift).
+"""
+import hashlib
+import json
+import math
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .local_ranker import tokenize
+except ImportError:
+    from local_ranker import tokenize
+
+TAXONOMY_VERSION = "1"
+VECTOR_DIM = 256
+SKILL_PROFILE_NAME = "skill_profile.json"
+
+SKILL_TAXONOMY: Dict[str, List[str]] = {
+    "warehouse": ["lager", "lagerarbeid", "lagermedarbeider", "warehouse", "terminal"],
+    "logistics": ["logistikk", "logistics", "vareflyt", "supply chain", "innkjøp"],
+    "forklift": ["truck", "truckfører", "truckførerbevis", "forklift", "gaffeltruck", "t1", "t2", "t4"],
+    "order picking": ["plukk", "plukking", "pakking", "picking", "packing", "ordreplukk"],
+    "driving": ["sjåfør", "førerkort", "truck driver", "delivery driver", "lastebil", "varebil", "budbil", "klasse b"],
+    "customer service": ["kundeservice", "kundebehandling", "kundekontakt", "kundesenter", "customer service"],
+    "retail": ["butikk", "butikkmedarbeider", "kasse", "retail", "cashier"],
+    "sales": ["salg", "selger", "sales", "salesperson"],
+    "cleaning": ["renhold", "renholder", "rengjøring", "cleaning", "cleaner"],
+    "construction": ["bygg", "anlegg", "snekker", "tømrer", "construction", "carpenter"],
+    "electrician": ["elektriker", "electrician"],
+    "mechanic": ["mekaniker", "verksted", "mechanic"],
+    "welding": ["sveis", "sveiser", "welding", "welder"],
+    "production": ["produksjon", "produksjonsmedarbeider", "operatør", "production", "manufacturing", "fabrikk"],
+    "food service": ["kokk", "kjøkken", "servitør", "restaurant", "kitchen", "chef", "cook"],
+    "healthcare": ["helsefagarbeider", "sykepleier", "pleie", "omsorg", "nurse", "healthcare"],
+    "childcare": ["barnehage", "barnehageassistent", "childcare"],
+    "office administration": ["kontor", "administrasjon", "sekretær", "resepsjon", "receptionist", "office administration"],
+    "accounting": ["regnskap", "økonomi", "accounting", "bookkeeping"],
+    "software development": ["utvikler", "systemutvikler", "programmering", "developer", "software"],
+    "python": ["python"],
+    "javascript": ["javascript", "typescript", "node.js", "nodejs"],
+    "java": ["java"],
+    "sql": ["sql", "postgresql", "mysql", "database"],
+    "docker": ["docker", "kubernetes"],
+    "react": ["react"],
+    "it support": ["it support", "helpdesk", "brukerstøtte"],
+    "ms office": ["excel", "powerpoint", "microsoft office", "ms office"],
+    "project management": ["prosjektledelse", "prosjektleder", "project management"],
+    "leadership": ["ledelse", "teamleder", "leadership"],
+    "teamwork": ["teamarbeid", "samarbeid", "lagspiller", "teamwork", "team player"],
+    "communication": ["kommunikasjon", "communication"],
+    "hse": ["hms", "hse"],
+    "norwegian": ["norsk", "norwegian", "bokmål"],
+    "english": ["engelsk", "english"],
+    "ukrainian": ["ukrainsk", "ukrainian"],
+    "polish": ["polsk", "polish"],
+}
+
+MIN_PREFIX_LEN = 4
+
+def _build_index() -> Tuple[Dict[str, List[Tuple[Tuple[str, ...], str]]], List[Tuple[str, str]]]:
+    phrases: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+    prefixes = []
+    for skill, aliases in SKILL_TAXONOMY.items():
+        for alias in aliases + [skill]:
+            tokens = tuple(tokenize(alias))
+            if not tokens:
+                continue
+            phrases.setdefault(tokens[0], []).append((tokens, skill))
+            if len(tokens) == 1 and len(tokens[0]) >= MIN_PREFIX_LEN:
+                prefixes.append((tokens[0], skill))
+    # Longest phrases first so "customer service" wins over a shorter alias
+    for candidates in phrases.values():
+        candidates.sort(key=lambda item: -len(item[0]))
+    prefixes.sort(key=lambda item: -len(item[0]))
+    return phrases, prefixes
+
+_PHRASES, _PREFIXES = _build_index()
+_ALIAS_TOKENS = {token for items in _PHRASES.values() for phrase, _ in items for token in phrase}
+
+def match_skills(text: str) -> Counter:
+    """Count taxonomy skills mentioned in text."""
+    tokens = tokenize(text)
+    found = Counter()
+    i = 0
+    while i < len(tokens):
+        matched = 0
+        for phrase, skill in _PHRASES.get(tokens[i], ()):
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                found[skill] += 1
+                matched = len(phrase)
+                break
+        if not matched:
+            for prefix, skill in _PREFIXES:
+                if tokens[i].startswith(prefix):
+                    found[skill] += 1
+                    break
+        i += matched or 1
+    return found
+
+def normalize_skill(skill: str) -> Optional[str]:
+    """Canonical taxonomy name for one skill string, or None if it isn't in the taxonomy."""
+    found = match_skills(skill)
+    return found.most_common(1)[0][0] if found else None
+
+def _skill_names(items: Iterable[Any]) -> List[str]:
+    names = []
+    for item in items or []:
+        if isinstance(item, dict):
+            # e.g. languages as {"language": "Norsk", "spoken": "flytende"}
+            item = item.get("language") or item.get("name") or ""
+        if item:
+            names.append(str(item))
+    return names
+
+def profile_skills(unified_profile: Dict[str, Any]) -> Tuple[Dict[str, float], List[str]]:
+    """(canonical skill -> weight, other skills) from a unified profile.
+
+    Listed skills weigh 1.0; skills only implied by job titles, strengths or
+    career preferences weigh 0.5.
+    """
+    skills = unified_profile.get("comprehensive_skills") or {}
+    listed = []
+    for key in ("technical", "soft_skills", "industry_knowledge", "languages"):
+        listed.extend(_skill_names(skills.get(key)))
+
+    weights: Dict[str, float] = {}
+    other = []
+    for name in listed:
+        found = match_skills(name)
+        for skill in found:
+            weights[skill] = 1.0
+        if not found:
+            normalized = " ".join(tokenize(name))
+            if normalized and normalized not in other:
+                other.append(normalized)
+
+    implied = [exp.get("position", "") for exp in unified_profile.get("all_work_experience") or [] if isinstance(exp, dict)]
+    implied += _skill_names(unified_profile.get("key_strengths"))
+    implied.append(str(unified_profile.get("career_preferences") or ""))
+    for skill in match_skills(" \n ".join(implied)):
+        weights.setdefault(skill, 0.5)
+    return dict(sorted(weights.items())), other
+
+def _slot(feature: str) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % VECTOR_DIM, 1.0 if (value >> 63) & 1 else -1.0
+
+def features_vector(features: Dict[str, float]) -> np.ndarray:
+    """Feature-hash weighted features into a unit vector."""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for feature, weight in features.items():
+        index, sign = _slot(feature)
+        vector[index] += sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def skill_vector(weights: Dict[str, float], other_skills: Iterable[str] = ()) -> np.ndarray:
+    features = {f"skill:{skill}": weight for skill, weight in weights.items()}
+    for skill in other_skills:
+        for token in skill.split():
+            features[f"tok:{token}"] = 0.5
+    return features_vector(features)
+
+def text_vector(text: str) -> np.ndarray:
+    """Vector for a plain skills string (e.g. the `skills` field of a search config)."""
+    weights = {skill: 1.0 for skill in match_skills(text)}
+    other = [token for token in tokenize(text) if token not in _ALIAS_TOKENS]
+    return skill_vector(weights, other)
+
+def job_vector(job: Dict[str, Any]) -> np.ndarray:
+    """Posting vector: taxonomy skills found in title (x2) and description, plus title words."""
+    title = job.get("title", "")
+    counts = match_skills(title)
+    counts.update(match_skills(title))
+    counts.update(match_skills(job.get("description") or ""))
+    features = {f"skill:{skill}": 1 + math.log(count) for skill, count in counts.items()}
+    for token in tokenize(title):
+        features.setdefault(f"tok:{token}", 0.5)
+    return features_vector(features)
+
+def job_matrix(jobs: List[Dict[str, Any]]) -> np.ndarray:
+    """(len(jobs), VECTOR_DIM) matrix of posting vectors."""
+    if not jobs:
+        return np.zeros((0, VECTOR_DIM), dtype=np.float32)
+    return np.vstack([job_vector(job) for job in jobs])
+
+def score_jobs(vector: np.ndarray, jobs: List[Dict[str, Any]]) -> np.ndarray:
+    """Cosine similarity of every job to the profile vector, in one product."""
+    return np.clip(job_matrix(jobs) @ vector, 0.0, 1.0)
+
+def _source_hash(unified_profile: Dict[str, Any]) -> str:
+    text = json.dumps(unified_profile, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{TAXONOMY_VERSION}:{VECTOR_DIM}:{text}".encode("utf-8")).hexdigest()
+
+def compile_skill_profile(unified_profile: Dict[str, Any]) -> Dict[str, Any]:
+    weights, other = profile_skills(unified_profile)
+    return {
+        "taxonomy_version": TAXONOMY_VERSION,
+        "dim": VECTOR_DIM,
+        "source_hash": _source_hash(unified_profile),
+        "compiled_at": datetime.now().isoformat(),
+        "skills": weights,
+        "other_skills": other,
+        "vector": [round(float(x), 6) for x in skill_vector(weights, other)],
+    }
+
+def load_skill_profile(user_dir: Any, unified_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """The user's compiled skill profile; recompiled and saved when the unified profile changed."""
+    path = Path(user_dir).expanduser() / SKILL_PROFILE_NAME
+    try:
+        stored = json.loads(path.read_text(encoding="utf-8"))
+        if stored.get("source_hash") == _source_hash(unified_profile):
+            return stored
+    except (OSError, ValueError):
+        pass
+
+    compiled = compile_skill_profile(unified_profile)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(compiled, ensure_ascii=False, indent=2), encoding="utf-8")
+    except OSError as e:
+        print(f"⚠️ Could not save {path}: {e}")
+    return compiled
+
+def profile_vector(skill_profile: Dict[str, Any]) -> np.ndarray:
+    return np.asarray(skill_profile["vector"], dtype=np.float32)
+
+def skills_line(skill_profile: Dict[str, Any], limit: int = 15) -> str:
+    """Comma-separated canonical skills (strongest first), then other skills, for prompts."""
+    ranked = sorted(skill_profile["skills"].items(), key=lambda item: (-item[1], item[0]))
+    return ", ".join(([skill for skill, _ in ranked] + skill_profile["other_skills"])[:limit])
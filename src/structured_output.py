@@ -0,0 +1,351 @@
+"""Structured (JSON schema) output for every AI task.
+
+Each task's response shape is defined once in `SCHEMAS` and sent to the
+model as `response_format`, so replies are JSON by construction instead of
+being scraped out of markdown fences. If a reply still fails to parse or is
+missing required fields, one repair request is made (the bad reply plus the
+schema, no original prompt) before giving up with `StructuredOutputError`.
+
+Deployments/API versions that reject `json_schema` are remembered and fall
+back to plain `json_object` mode; the local validator still checks the shape.
+
+Parse outcomes are counted per task; see `get_parse_stats()`.
+"""
+import copy
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from openai import BadRequestError
+
+try:
+    from .llm_dispatcher import get_dispatcher
+except ImportError:
+    from llm_dispatcher import get_dispatcher
+
+_STRINGS = {"type": "array", "items": {"type": "string"}}
+
+_RELEVANCE = {
+    "type": "object",
+    "properties": {
+        "relevance_score": {"type": "integer"},
+        "is_relevant": {"type": "boolean"},
+        "match_reasons": _STRINGS,
+        "concerns": _STRINGS,
+        "recommendation": {"type": "string", "enum": ["APPLY", "REVIEW", "SKIP"]},
+    },
+    "required": ["relevance_score", "is_relevant", "recommendation"],
+}
+
+_SKILLS = {
+    "type": "object",
+    "properties": {"technical": _STRINGS, "languages": _STRINGS, "soft_skills": _STRINGS},
+}
+
+_PERSONAL_INFO = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "email": {"type": "string"},
+        "phone": {"type": "string"},
+        "location": {"type": "string"},
+    },
+}
+
+_FIELD = {
+    "type": "object",
+    "properties": {
+        "field_type": {"type": "string"},
+        "selector": {"type": "string"},
+        "label": {"type": "string"},
+        "required": {"type": "boolean"},
+        "placeholder": {"type": "string"},
+        "suggested_value": {"type": "string"},
+        "frame": {"type": "string"},
+    },
+    "required": ["field_type", "selector"],
+}
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "job_relevance": _RELEVANCE,
+    "job_relevance_batch": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    **_RELEVANCE,
+                    "properties": {"job_id": {"type": "string"}, **_RELEVANCE["properties"]},
+                    "required": ["job_id"] + _RELEVANCE["required"],
+                },
+            },
+        },
+        "required": ["results"],
+    },
+    "fixed_api_relevance": {
+        "type": "object",
+        "properties": {
+            "relevance_score": {"type": "integer"},
+            "reasoning": {"type": "string"},
+            "key_matches": _STRINGS,
+            "recommendation": {"type": "string"},
+        },
+        "required": ["relevance_score", "recommendation"],
+    },
+    "resume_analysis": {
+        "type": "object",
+        "properties": {
+            "personal_info": _PERSONAL_INFO,
+            "professional_summary": {"type": "string"},
+            "work_experience": {"type": "array", "items": {"type": "object"}},
+            "education": {"type": "array", "items": {"type": "object"}},
+            "skills": _SKILLS,
+            "certifications": _STRINGS,
+            "career_objective": {"type": "string"},
+        },
+        "required": ["personal_info", "work_experience", "skills"],
+    },
+    "unified_profile": {
+        "type": "object",
+        "properties": {
+            "unified_profile": {
+                "type": "object",
+                "properties": {
+                    "personal_info": _PERSONAL_INFO,
+                    "comprehensive_summary": {"type": "string"},
+                    "total_experience_years": {"type": "number"},
+                    "all_work_experience": {"type": "array"},
+                    "all_education": {"type": "array"},
+                    "comprehensive_skills": _SKILLS,
+                    "all_certifications": {"type": "array"},
+                    "career_preferences": {"type": "string"},
+                    "key_strengths": _STRINGS,
+                    "adaptability_areas": _STRINGS,
+                },
+                "required": ["personal_info", "comprehensive_summary", "comprehensive_skills"],
+            },
+            "resume_sources": _STRINGS,
+            "analysis_confidence": {"type": "string"},
+        },
+        "required": ["unified_profile"],
+    },
+    "form_analysis": {
+        "type": "object",
+        "properties": {
+            "form_fields": {"type": "array", "items": _FIELD},
+            "submit_button": {
+                "type": "object",
+                "properties": {"selector": {"type": "string"}, "text": {"type": "string"}},
+                "required": ["selector"],
+            },
+            "cookies_accept": {
+                "type": "object",
+                "properties": {"found": {"type": "boolean"}, "selector": {"type": "string"}},
+            },
+            "special_instructions": _STRINGS,
+        },
+        "required": ["form_fields", "submit_button"],
+    },
+    "application_letter": {
+        "type": "object",
+        "properties": {
+            "cover_letter": {"type": "string"},
+            "key_skills_match": _STRINGS,
+            "experience_highlight": {"type": "string"},
+            "motivation": {"type": "string"},
+        },
+        "required": ["cover_letter"],
+    },
+    "letter_template": {
+        "type": "object",
+        "properties": {
+            "greeting": {"type": "string"},
+            "about": {"type": "string"},
+            "experience": {"type": "string"},
+            "closing": {"type": "string"},
+        },
+        "required": ["greeting", "about", "experience", "closing"],
+    },
+    "letter_tailoring": {
+        "type": "object",
+        "properties": {"intro": {"type": "string"}, "fit": {"type": "string"}},
+        "required": ["intro", "fit"],
+    },
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+class StructuredOutputError(ValueError):
+    """The model's reply could not be turned into the task's schema, even after repair."""
+
+def validate(data: Any, schema: Dict[str, Any], path: str = "$") -> Optional[str]:
+    """Check data against the subset of JSON schema used in SCHEMAS; return the first problem or None."""
+    expected = schema.get("type")
+    if expected:
+        python_type = _TYPES[expected]
+        # bool is a subclass of int; don't accept True as a score
+        if not isinstance(data, python_type) or (expected in ("integer", "number") and isinstance(data, bool)):
+            return f"{path} should be {expected}"
+    if "enum" in schema and data not in schema["enum"]:
+        return f"{path} should be one of {schema['enum']}"
+
+    if isinstance(data, dict):
+        for key in schema.get("required", []):
+            if key not in data:
+                return f"{path}.{key} is missing"
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in data and data[key] is not None:
+                problem = validate(data[key], sub_schema, f"{path}.{key}")
+                if problem:
+                    return problem
+    elif isinstance(data, list) and "items" in schema:
+        for i, item in enumerate(data):
+            problem = validate(item, schema["items"], f"{path}[{i}]")
+            if problem:
+                return problem
+    return None
+
+def parse_json(raw: Optional[str]) -> Any:
+    """json.loads that tolerates a stray markdown fence around the payload."""
+    text = (raw or "").strip()
+    text = re.sub(r"^```(?:json)?\s*", "", text)
+    text = re.sub(r"\s*```$", "", text)
+    return json.loads(text)
+
+def response_format(task: str) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": task, "schema": SCHEMAS[task], "strict": False},
+    }
+
+def repair_messages(task: str, raw: Optional[str], problem: str) -> List[Dict[str, str]]:
+    """Messages for the single repair attempt: just the broken reply and the schema."""
+    return [
+        {"role": "system", "content": (
+            "You fix malformed JSON. Reply with ONLY a JSON object that matches this JSON schema:\n"
+            + json.dumps(SCHEMAS[task], ensure_ascii=False)
+        )},
+        {"role": "user", "content": f"Problem: {problem}\n\nReply to fix:\n{raw or ''}"},
+    ]
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+_json_object_only = set()
+
+def _count(task: str, key: str):
+    with _stats_lock:
+        counter = _stats.setdefault(task, {"calls": 0, "parse_failures": 0, "repaired": 0, "failed": 0})
+        counter[key] += 1
+
+def check(task: str, raw: Optional[str]) -> Tuple[Any, Optional[str]]:
+    """Parse and validate a reply; return (data, None) or (None, problem)."""
+    try:
+        data = parse_json(raw)
+    except (json.JSONDecodeError, TypeError) as e:
+        return None, f"invalid JSON: {e}"
+    problem = validate(data, SCHEMAS[task])
+    return (None, problem) if problem else (data, None)
+
+def _first_pass(task: str, raw: Optional[str]) -> Tuple[Any, Optional[str]]:
+    _count(task, "calls")
+    data, problem = check(task, raw)
+    if problem is not None:
+        _count(task, "parse_failures")
+        print(f"⚠️ {task}: {problem}, attempting repair")
+    return data, problem
+
+def _after_repair(task: str, data: Any, problem: Optional[str]) -> Any:
+    if problem is None:
+        _count(task, "repaired")
+        return data
+    _count(task, "failed")
+    raise StructuredOutputError(f"{task}: {problem}")
+
+def parse_structured(task: str, raw: Optional[str], repair=None) -> Any:
+    """Count, parse and validate a reply; `repair(messages) -> raw` is tried once on failure.
+
+    For callers that don't go through the dispatcher (e.g. raw REST calls).
+    """
+    data, problem = _first_pass(task, raw)
+    if problem is None:
+        return data
+    if repair is not None:
+        try:
+            data, problem = check(task, repair(repair_messages(task, raw, problem)))
+        except Exception as e:
+            problem = f"repair request failed: {e}"
+    return _after_repair(task, data, problem)
+
+def _request_kwargs(task: str, endpoint: Optional[str], api_version: Optional[str],
+                    kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    mode = {"type": "json_object"} if (endpoint, api_version) in _json_object_only else response_format(task)
+    return {**kwargs, "response_format": mode}
+
+def _is_schema_rejection(error: BadRequestError) -> bool:
+    return "response_format" in str(error) or "json_schema" in str(error)
+
+def complete_json(task: str, messages: List[Dict[str, Any]], endpoint: Optional[str] = None,
+                  api_version: Optional[str] = None, **kwargs) -> Any:
+    """Blocking structured completion through the dispatcher; returns parsed, validated JSON."""
+    dispatcher = get_dispatcher()
+
+    def send(msgs):
+        request = _request_kwargs(task, endpoint, api_version, {**kwargs, "messages": msgs})
+        try:
+            response = dispatcher.complete(endpoint, api_version, task, **request)
+        except BadRequestError as e:
+            if request["response_format"]["type"] != "json_schema" or not _is_schema_rejection(e):
+                raise
+            _json_object_only.add((endpoint, api_version))
+            response = dispatcher.complete(endpoint, api_version, task, **{**request, "response_format": {"type": "json_object"}})
+        return response.choices[0].message.content
+
+    return parse_structured(task, send(messages), repair=send)
+
+async def acomplete_json(task: str, messages: List[Dict[str, Any]], endpoint: Optional[str] = None,
+                         api_version: Optional[str] = None, **kwargs) -> Any:
+    """Awaitable `complete_json`."""
+    dispatcher = get_dispatcher()
+
+    async def send(msgs):
+        request = _request_kwargs(task, endpoint, api_version, {**kwargs, "messages": msgs})
+        try:
+            response = await dispatcher.acomplete(endpoint, api_version, task, **request)
+        except BadRequestError as e:
+            if request["response_format"]["type"] != "json_schema" or not _is_schema_rejection(e):
+                raise
+            _json_object_only.add((endpoint, api_version))
+            response = await dispatcher.acomplete(endpoint, api_version, task, **{**request, "response_format": {"type": "json_object"}})
+        return response.choices[0].message.content
+
+    raw = await send(messages)
+    data, problem = _first_pass(task, raw)
+    if problem is None:
+        return data
+    try:
+        data, problem = check(task, await send(repair_messages(task, raw, problem)))
+    except Exception as e:
+        problem = f"repair request failed: {e}"
+    return _after_repair(task, data, problem)
+
+def reset_parse_stats():
+    with _stats_lock:
+        _stats.clear()
+
+def get_parse_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-task call/parse-failure/repair counters with failure rates."""
+    with _stats_lock:
+        stats = copy.deepcopy(_stats)
+    for counter in stats.values():
+        calls = counter["calls"]
+        counter["parse_failure_rate"] = round(counter["parse_failures"] / calls, 3) if calls else 0.0
+        counter["failure_rate"] = round(counter["failed"] / calls, 3) if calls else 0.0
+    return stats
@@ -1,8 +1,8 @@
 """Telegram webhook handler for processing approval callbacks."""
 import sys
 import asyncio
-from pathlib import Path
 from .job_manager import JobManager
+from .letter_generator import load_letter
 from .telegram_bot import TelegramBot
 from .apply import submit_application
 
@@ -45,8 +45,7 @@ class TelegramApprovalHandler:
             self.job_manager.update_job_status(job_id, 'APPROVED')
             
             # Check if letter exists
-            letter_file = Path(f"/app/data/letters/{job_id}.txt")
-            if not letter_file.exists():
+            if load_letter(job_id) is None:
                 self.telegram_bot.send_message(f"❌ Letter file missing for job {job_id}")
                 return False
             
@@ -71,7 +70,7 @@ class TelegramApprovalHandler:
     def handle_skip(self, job_id: int, job: dict) -> bool:
         """Handle skipped job."""
         try:
-            self.job_manager.update_job_status(job_id, 'MANUALLY_SKIPPED')
+            self.job_manager.archive_job(job_id, 'MANUALLY_SKIPPED')
             
             self.telegram_bot.send_message(
                 f"⏭️ <b>Job Skipped</b>\n\n"
@@ -93,10 +92,9 @@ class TelegramApprovalHandler:
             self.job_manager.update_job_status(job_id, 'MANUAL_REVIEW')
             
             # Send detailed job information
-            letter_file = Path(f"/app/data/letters/{job_id}.txt")
-            letter_text = ""
-            if letter_file.exists():
-                letter_text = letter_file.read_text(encoding='utf-8')[:500] + "..."
+            letter_text = load_letter(job_id) or ""
+            if letter_text:
+                letter_text = letter_text[:500] + "..."
             
             review_message = f"""
 📝 <b>Job Review Details</b>
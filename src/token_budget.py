@@ -0,0 +1,207 @@
+"""Token-aware budgeting for prompt sections.
+
+Prompts used to cut text at fixed character counts (`description[:2000]`,
+`json.dumps(...)[:6000]`), which could overshoot the intended size for
+non-ASCII text, cut JSON in half, or drop a posting's requirements section
+while keeping the company boilerplate that came before it.
+
+    count_tokens(text)                  exact with tiktoken, estimated otherwise
+    truncate_tokens(text, n)            cut at a token/word boundary
+    compress_job_text(text)             drop boilerplate lines and duplicates
+    fit_job_description(text, n)        compress, then keep the highest-value
+                                        sections (requirements, duties) first
+    split_budget(texts, total)          share one budget between several texts
+    fit_json(data, n)                   shrink lists/strings until the JSON fits
+
+tiktoken is optional (`pip install tiktoken`); without it counts are a
+conservative character-based estimate. Actual input tokens per call are
+reported by the LLM dispatcher.
+"""
+import json
+import re
+from typing import Any, List, Optional
+
+DEFAULT_ENCODING = "o200k_base"
+
+# Per-section budgets (tokens) used by the AI modules
+JOB_DESCRIPTION_TOKENS = 600
+COVER_LETTER_JOB_TOKENS = 700
+SHORT_JOB_TOKENS = 300
+RESUME_TEXT_TOKENS = 1200
+RESUME_MERGE_TOKENS = 2000
+FORM_HTML_TOKENS = 1000
+BATCH_JOB_TOKENS = 600  # per job in a relevance batch, before redistribution
+
+MIN_PARTIAL_TOKENS = 40
+
+_encoder = None
+_encoder_loaded = False
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            try:
+                _encoder = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except ValueError:
+                _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None
+    return _encoder
+
+def count_tokens(text: str) -> int:
+    """Token count of text; ~4 ASCII chars or ~2 non-ASCII chars per token without tiktoken."""
+    text = text or ""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii + 3) // 4 + (non_ascii + 1) // 2
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, backing off to a word boundary."""
+    text = text or ""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoder = _get_encoder()
+    if encoder is not None:
+        cut = encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        # Shrink until the estimate fits; the estimate is monotonic in length
+        cut = text[:max_tokens * 4]
+        while cut and count_tokens(cut) > max_tokens:
+            cut = cut[:int(len(cut) * 0.9)]
+
+    space = cut.rfind(" ")
+    if space > len(cut) * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + " …"
+
+BOILERPLATE_PATTERNS = [
+    r"cookie", r"informasjonskapsler", r"personvern", r"privacy policy",
+    r"del (denne )?annonsen", r"tips en venn", r"rapporter annonse", r"del stillingen",
+    r"share (this )?job", r"^søk (på stillingen|her|nå)\b", r"^apply (now|here)\b",
+    r"annonsen (er )?publisert", r"^sist endret", r"^annonsenummer", r"^finn-kode",
+    r"^stillingsnummer", r"^referansenummer", r"^hjemmeside", r"^facebook", r"^linkedin",
+    r"inkluderende arbeidsgiver", r"mangfold", r"equal opportunity", r"we encourage .* to apply",
+    r"offentlighetsloven", r"søkerliste",
+]
+_BOILERPLATE = re.compile("|".join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+HIGH_VALUE_HEADERS = [
+    "kvalifikasjon", "krav", "vi søker", "du har", "du er", "ønsket", "erfaring", "kompetanse",
+    "utdanning", "arbeidsoppgaver", "oppgaver", "ansvar", "requirements", "qualifications",
+    "responsibilities", "skills", "you have", "what you", "personlige egenskaper",
+]
+LOW_VALUE_HEADERS = [
+    "om oss", "om arbeidsgiver", "om selskapet", "om bedriften", "about us", "about the company",
+    "vi tilbyr", "vi kan tilby", "we offer", "benefits", "fordeler", "kontakt", "contact",
+]
+
+def compress_job_text(text: str) -> str:
+    """Normalize whitespace and drop share/cookie/legal boilerplate and repeated lines."""
+    lines = []
+    seen = set()
+    for line in (text or "").splitlines():
+        line = re.sub(r"\s+", " ", line).strip()
+        if not line or _BOILERPLATE.search(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+def _section_priority(line: str, current: int) -> int:
+    """2 = requirements/duties, 1 = neutral, 0 = about-us/benefits; headers switch the section."""
+    if len(line) > 60:
+        return current
+    lowered = line.lower()
+    if any(header in lowered for header in HIGH_VALUE_HEADERS):
+        return 2
+    if any(header in lowered for header in LOW_VALUE_HEADERS):
+        return 0
+    return current
+
+def fit_job_description(text: str, max_tokens: int = JOB_DESCRIPTION_TOKENS) -> str:
+    """Compress a posting and, if still too long, keep its most useful lines in original order.
+
+    The opening line (usually the lead) is always kept; then requirement and
+    duty sections, then neutral text, then about-us/benefits text.
+    """
+    text = compress_job_text(text)
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    priorities = []
+    current = 1
+    for line in lines:
+        current = _section_priority(line, current)
+        priorities.append(current)
+
+    order = [0] + sorted(range(1, len(lines)), key=lambda i: (-priorities[i], i))
+    kept = {}
+    used = 0
+    for i in order:
+        remaining = max_tokens - used
+        cost = count_tokens(lines[i]) + 1
+        if cost <= remaining:
+            kept[i] = lines[i]
+            used += cost
+        elif remaining >= MIN_PARTIAL_TOKENS:
+            # Long paragraph: keep its beginning rather than dropping it
+            kept[i] = truncate_tokens(lines[i], remaining - 2)
+            used = max_tokens
+
+    # A section header is only useful if the line under it survived
+    headers = {i for i, line in enumerate(lines) if len(line) <= 60 and _section_priority(line, -1) != -1}
+    for i in headers:
+        if i != 0 and i + 1 not in kept:
+            kept.pop(i, None)
+    return "\n".join(kept[i] for i in sorted(kept))
+
+def split_budget(texts: List[str], total_tokens: int) -> List[int]:
+    """Per-text budgets summing to total_tokens; short texts give their unused share to long ones."""
+    budgets = [0] * len(texts)
+    sizes = sorted((count_tokens(text), i) for i, text in enumerate(texts))
+    remaining = total_tokens
+    for position, (size, i) in enumerate(sizes):
+        share = remaining // (len(sizes) - position)
+        budgets[i] = min(size, share)
+        remaining -= budgets[i]
+    return budgets
+
+def fit_json(data: Any, max_tokens: int, indent: Optional[int] = None) -> str:
+    """Serialize data compactly, shortening long strings and lists until it fits.
+
+    Unlike slicing the serialized text, the result is always valid JSON.
+    """
+    def dumps(value):
+        separators = None if indent else (",", ":")
+        return json.dumps(value, ensure_ascii=False, indent=indent, separators=separators)
+
+    def shrink(value, max_chars, max_items, top=False):
+        if isinstance(value, str):
+            return value if len(value) <= max_chars else value[:max_chars].rstrip() + "…"
+        if isinstance(value, list):
+            # Top-level items (e.g. one entry per resume) are never dropped, only shortened
+            items = value if top else value[:max_items]
+            return [shrink(item, max_chars, max_items) for item in items]
+        if isinstance(value, dict):
+            return {key: shrink(item, max_chars, max_items) for key, item in value.items()}
+        return value
+
+    text = dumps(data)
+    max_chars, max_items = 2000, 50
+    while count_tokens(text) > max_tokens and (max_chars > 40 or max_items > 1):
+        max_chars = max(max_chars // 2, 40)
+        max_items = max(max_items // 2, 1)
+        text = dumps(shrink(data, max_chars, max_items, top=True))
+    return text
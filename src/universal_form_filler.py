@@ -31,7 +31,7 @@ class UniversalFormFiller:
                 return {'error': f'Navigation failed: {nav_result.get("error")}', 'step': 'navigation'}
             
             employer_url = nav_result['employer_url']
-            form_screenshot = nav_result['form_screenshot']
+            form_screenshot = nav_result.get('form_screenshot_vision', nav_result['form_screenshot'])
             html_content = nav_result['html_content']
             
             print(f'Employer site: {employer_url}')
@@ -39,7 +39,8 @@ class UniversalFormFiller:
             # Step 2: AI analysis of form
             print('Step 2: Analyzing form with AI...')
             analysis_result = await self.analyzer.analyze_form(
-                form_screenshot, html_content, job_title, company
+                form_screenshot, html_content, job_title, company,
+                form_schema=nav_result.get('form_schema')
             )
             
             if not analysis_result.get('success'):
@@ -58,7 +59,7 @@ class UniversalFormFiller:
             # Step 4: Fill form
             print('Step 4: Filling form...')
             fill_result = await self.filler.fill_form_universally(
-                employer_url, instructions, user_data, self.username
+                employer_url, instructions, user_data, self.username, job=job_data
             )
             
             if not fill_result.get('success'):
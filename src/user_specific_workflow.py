@@ -6,6 +6,7 @@ from typing import List, Dict, Any
 
 from .playwright_job_analyzer import PlaywrightJobAnalyzer
 from .multi_user_system import MultiUserJobSystem
+from .skill_vectors import load_skill_profile, skills_line
 
 class UserSpecificWorkflow:
     def __init__(self, username: str):
@@ -53,16 +54,10 @@ class UserSpecificWorkflow:
                 duration = exp.get('duration', 'Unknown')
                 profile_parts.append(f"- {position} at {company} ({duration})")
         
-        # Skills
-        skills = profile_data.get('comprehensive_skills', {})
-        all_skills = []
-        all_skills.extend(skills.get('technical', []))
-        all_skills.extend(skills.get('soft_skills', []))
-        all_skills.extend(skills.get('industry_knowledge', []))
-        all_skills.extend(skills.get('languages', []))
-        
-        if all_skills:
-            profile_parts.append(f"Skills: {', '.join(all_skills[:15])}")  # Top 15 skills
+        # Skills: normalized taxonomy skills from the compiled skill profile
+        skill_profile = load_skill_profile(self.user_dir, profile_data)
+        if skill_profile["skills"] or skill_profile["other_skills"]:
+            profile_parts.append(f"Skills: {skills_line(skill_profile)}")
         
         # Career preferences
         career_prefs = profile_data.get('career_preferences', '')
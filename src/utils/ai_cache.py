@@ -0,0 +1,166 @@
+"""Persistent memoization of AI results keyed by (profile hash, job content hash).
+
+The same posting used to be re-scored every time any workflow or API route
+saw it. Results are now stored in SQLite and reused until either side
+changes: a different resume/skills text gives a different profile hash, an
+edited posting gives a different content hash.
+
+Entries expire after `ttl_days` and the least recently used ones are evicted
+once the cache grows past `max_entries`. Hit/miss counters are kept per
+namespace (e.g. "relevance") and returned by `stats()`.
+
+Set AI_CACHE_DISABLED=1 to bypass the cache entirely.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+AI_CACHE_PATH = Path(os.getenv("AI_CACHE_PATH", "/app/data/ai_cache.db"))
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_TTL_DAYS = 30
+
+def hash_text(*parts: Any) -> str:
+    """Hash text parts after normalizing case and whitespace."""
+    normalized = "\x1f".join(re.sub(r"\s+", " ", str(part or "")).strip().lower() for part in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def hash_file(path: Any) -> str:
+    """SHA-256 of a file's raw bytes (unlike hash_text, no normalization)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_set_hash(file_hashes: Iterable[str]) -> str:
+    """Order-independent hash of a set of file hashes (renaming a file doesn't change it)."""
+    return hashlib.sha256("\n".join(sorted(set(file_hashes))).encode("utf-8")).hexdigest()
+
+class AIResultCache:
+    def __init__(self, db_path: Path = AI_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_days: int = DEFAULT_TTL_DAYS):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.ttl = timedelta(days=ttl_days)
+        self._writes = 0
+        self._setup()
+
+    def _conn(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _setup(self):
+        with self._conn() as cx:
+            cx.execute("""
+                CREATE TABLE IF NOT EXISTS ai_cache (
+                    namespace TEXT NOT NULL,
+                    profile_hash TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_used_at TEXT NOT NULL,
+                    hits INTEGER DEFAULT 0,
+                    PRIMARY KEY (namespace, profile_hash, content_hash)
+                )
+            """)
+            cx.execute("CREATE INDEX IF NOT EXISTS ai_cache_lru ON ai_cache (last_used_at)")
+            cx.execute("""
+                CREATE TABLE IF NOT EXISTS ai_cache_stats (
+                    namespace TEXT PRIMARY KEY,
+                    hits INTEGER DEFAULT 0,
+                    misses INTEGER DEFAULT 0
+                )
+            """)
+            cx.commit()
+
+    def _count(self, cx: sqlite3.Connection, namespace: str, column: str):
+        cx.execute(f"""
+            INSERT INTO ai_cache_stats (namespace, {column}) VALUES (?, 1)
+            ON CONFLICT (namespace) DO UPDATE SET {column} = {column} + 1
+        """, (namespace,))
+
+    def get(self, namespace: str, profile_hash: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result, or None on a miss or expired entry."""
+        now = datetime.now()
+        with self._conn() as cx:
+            row = cx.execute("""
+                SELECT result, created_at FROM ai_cache
+                WHERE namespace = ? AND profile_hash = ? AND content_hash = ?
+            """, (namespace, profile_hash, content_hash)).fetchone()
+
+            if row and datetime.fromisoformat(row[1]) + self.ttl > now:
+                cx.execute("""
+                    UPDATE ai_cache SET last_used_at = ?, hits = hits + 1
+                    WHERE namespace = ? AND profile_hash = ? AND content_hash = ?
+                """, (now.isoformat(), namespace, profile_hash, content_hash))
+                self._count(cx, namespace, "hits")
+                cx.commit()
+                return json.loads(row[0])
+
+            self._count(cx, namespace, "misses")
+            cx.commit()
+            return None
+
+    def put(self, namespace: str, profile_hash: str, content_hash: str, result: Dict[str, Any]):
+        now = datetime.now().isoformat()
+        with self._conn() as cx:
+            cx.execute("""
+                INSERT OR REPLACE INTO ai_cache
+                (namespace, profile_hash, content_hash, result, created_at, last_used_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+            """, (namespace, profile_hash, content_hash, json.dumps(result, ensure_ascii=False), now, now))
+            cx.commit()
+
+        # Eviction scans the table; amortize it over many writes
+        self._writes += 1
+        if self._writes % 100 == 1:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones beyond max_entries."""
+        cutoff = (datetime.now() - self.ttl).isoformat()
+        with self._conn() as cx:
+            cx.execute("DELETE FROM ai_cache WHERE created_at < ?", (cutoff,))
+            cx.execute("""
+                DELETE FROM ai_cache WHERE rowid IN (
+                    SELECT rowid FROM ai_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            cx.commit()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters and entry counts per namespace."""
+        with self._conn() as cx:
+            counters = {row[0]: {"hits": row[1], "misses": row[2]}
+                        for row in cx.execute("SELECT namespace, hits, misses FROM ai_cache_stats")}
+            for namespace, entries in cx.execute("SELECT namespace, COUNT(*) FROM ai_cache GROUP BY namespace"):
+                counters.setdefault(namespace, {"hits": 0, "misses": 0})["entries"] = entries
+
+        for counter in counters.values():
+            total = counter["hits"] + counter["misses"]
+            counter["hit_rate"] = round(counter["hits"] / total, 3) if total else 0.0
+        return counters
+
+_cache: Optional[AIResultCache] = None
+_lock = threading.Lock()
+
+def get_ai_cache() -> Optional[AIResultCache]:
+    """Shared cache instance, or None when disabled or the DB can't be opened."""
+    global _cache
+    if os.getenv("AI_CACHE_DISABLED") == "1":
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                try:
+                    _cache = AIResultCache()
+                except Exception as e:
+                    print(f"⚠️ AI cache unavailable: {e}")
+                    return None
+    return _cache
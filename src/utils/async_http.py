@@ -0,0 +1,28 @@
+"""Shared async HTTP client factory for the asyncio scraper/analyzer variants.
+
+Uses httpx (already installed as a dependency of the openai package).
+HTTP/2 is enabled when the optional `h2` package is present
+(`pip install "httpx[http2]"`); otherwise the client falls back to HTTP/1.1
+with keep-alive connection reuse.
+"""
+from typing import Dict, Optional
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def create_async_client(headers: Optional[Dict[str, str]] = None, max_connections: int = 10,
+                        timeout: float = 30.0):
+    """Return an `httpx.AsyncClient` with pooled, reused connections."""
+    import httpx
+
+    return httpx.AsyncClient(
+        headers=headers,
+        http2=http2_available(),
+        timeout=httpx.Timeout(timeout),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        follow_redirects=True,
+    )
@@ -0,0 +1,304 @@
+"""Content-addressed storage for letters, screenshots and PDFs.
+
+Artifacts used to be written to timestamped paths (`<user>_job_page_<ts>.png`,
+`cover_letter_<title>_<ts>.txt`, ...). They were never deduplicated or
+cleaned up, and finding the files for one job meant globbing directories.
+Now every artifact is stored once under its SHA-256:
+
+    <BLOB_DIR>/<ab>/<sha256><ext>      the bytes, written atomically
+    <BLOB_DIR>/index.db                SQLite index
+        blobs  hash, kind, size, reference count, timestamps
+        refs   (owner, job_key, role) -> hash   e.g. ("anna", "1234567", "form_screenshot")
+
+`store(...)` writes and references a blob in one call; `lookup(owner, job_key)`
+is a primary-key read. Re-storing the same role for a job moves the reference,
+and identical bytes (the same letter, an unchanged page) share one file.
+`release_job(job)` drops every owner's references once a job is deleted or
+archived (JobManager.delete_job / archive_job).
+
+Retention (`gc`, also run every 100 writes): unreferenced blobs older than
+BLOB_GRACE_SECONDS are deleted. If the store is still over BLOB_MAX_MB, the
+least recently used blobs of evictable kinds (screenshots) are dropped with
+their references. Letters and PDFs are only removed once unreferenced.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .job_identity import canonicalize_url, extract_posting_id
+
+BLOB_DIR = Path(os.getenv("BLOB_DIR", "/app/data/blobs"))
+DEFAULT_MAX_BYTES = int(os.getenv("BLOB_MAX_MB", "2048")) * 1024 * 1024
+DEFAULT_GRACE_SECONDS = int(os.getenv("BLOB_GRACE_SECONDS", "3600"))
+EVICTABLE_KINDS = ("screenshot",)
+
+def job_key(job: Any) -> str:
+    """Stable key for a job dict or URL: posting id, else canonical URL (as in JobDedupIndex).
+
+    An int is a jobs-table id (artifacts of the single-user workflows).
+    """
+    if isinstance(job, int):
+        return f"job-{job}"
+    if isinstance(job, dict):
+        if job.get("job_key"):
+            return str(job["job_key"])
+        url = job.get("url") or job.get("job_url") or ""
+    else:
+        url = str(job or "")
+    return extract_posting_id(url) or canonicalize_url(url) or url
+
+class BlobStore:
+    def __init__(self, root: Path = BLOB_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 grace_seconds: int = DEFAULT_GRACE_SECONDS):
+        self.root = Path(root).expanduser()
+        self.db_path = self.root / "index.db"
+        self.max_bytes = max_bytes
+        self.grace = timedelta(seconds=grace_seconds)
+        self._writes = 0
+        self._setup()
+
+    def _conn(self) -> sqlite3.Connection:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _setup(self):
+        with self._conn() as cx:
+            cx.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    ext TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    last_used_at TEXT NOT NULL
+                )
+            """)
+            cx.execute("CREATE INDEX IF NOT EXISTS blobs_gc ON blobs (refcount, last_used_at)")
+            cx.execute("""
+                CREATE TABLE IF NOT EXISTS refs (
+                    owner TEXT NOT NULL,
+                    job_key TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (owner, job_key, role)
+                )
+            """)
+            cx.execute("CREATE INDEX IF NOT EXISTS refs_hash ON refs (hash)")
+            cx.commit()
+
+    def path(self, digest: str, ext: str = "") -> Path:
+        return self.root / digest[:2] / f"{digest}{ext}"
+
+    def _write(self, digest: str, ext: str, write_body) -> Path:
+        target = self.path(digest, ext)
+        if target.exists():
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{digest}.", suffix=".tmp", dir=target.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write_body(f)
+            os.replace(tmp_name, target)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+        return target
+
+    def _index(self, cx: sqlite3.Connection, digest: str, ext: str, kind: str, size: int):
+        now = datetime.now().isoformat()
+        cx.execute("""
+            INSERT INTO blobs (hash, ext, kind, size, refcount, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, 0, ?, ?)
+            ON CONFLICT (hash) DO UPDATE SET last_used_at = excluded.last_used_at
+        """, (digest, ext, kind, size, now, now))
+
+    def put_bytes(self, data: bytes, ext: str = "", kind: str = "blob") -> Tuple[str, Path]:
+        """Store bytes (once per distinct content); returns (hash, path)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._write(digest, ext, lambda f: f.write(data))
+        with self._conn() as cx:
+            self._index(cx, digest, ext, kind, len(data))
+            cx.commit()
+        self._after_write()
+        return digest, path
+
+    def put_file(self, source: Any, ext: Optional[str] = None, kind: str = "blob") -> Tuple[str, Path]:
+        """Store an existing file, hard-linked into the store when possible (no extra copy)."""
+        source = Path(source)
+        ext = source.suffix if ext is None else ext
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+
+        target = self.path(digest, ext)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, target)
+            except FileExistsError:
+                pass
+            except OSError:
+                with open(source, "rb") as src:
+                    self._write(digest, ext, lambda f: shutil.copyfileobj(src, f))
+        with self._conn() as cx:
+            self._index(cx, digest, ext, kind, source.stat().st_size)
+            cx.commit()
+        self._after_write()
+        return digest, target
+
+    def attach(self, owner: str, job: Any, role: str, digest: str):
+        """Point (owner, job, role) at a blob, releasing whatever it referenced before."""
+        key = job_key(job)
+        with self._conn() as cx:
+            row = cx.execute("SELECT hash FROM refs WHERE owner = ? AND job_key = ? AND role = ?",
+                             (owner, key, role)).fetchone()
+            if row and row[0] == digest:
+                return
+            if row:
+                cx.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", (row[0],))
+            cx.execute("""
+                INSERT OR REPLACE INTO refs (owner, job_key, role, hash, created_at) VALUES (?, ?, ?, ?, ?)
+            """, (owner, key, role, digest, datetime.now().isoformat()))
+            cx.execute("UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?", (digest,))
+            cx.commit()
+
+    def store(self, data: Any, owner: str, job: Any, role: str, ext: str = "", kind: str = "blob") -> str:
+        """Store bytes or text for (owner, job, role); returns the blob's path."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest, path = self.put_bytes(data, ext, kind)
+        self.attach(owner, job, role, digest)
+        return str(path)
+
+    def store_file(self, source: Any, owner: str, job: Any, role: str, kind: str = "blob") -> str:
+        digest, path = self.put_file(source, kind=kind)
+        self.attach(owner, job, role, digest)
+        return str(path)
+
+    def lookup(self, owner: str, job: Any, role: Optional[str] = None) -> Dict[str, str]:
+        """{role: path} of everything stored for one job (or just `role`)."""
+        key = job_key(job)
+        query = """
+            SELECT refs.role, blobs.hash, blobs.ext FROM refs JOIN blobs ON blobs.hash = refs.hash
+            WHERE refs.owner = ? AND refs.job_key = ?
+        """
+        params = [owner, key]
+        if role is not None:
+            query += " AND refs.role = ?"
+            params.append(role)
+        with self._conn() as cx:
+            rows = cx.execute(query, params).fetchall()
+        return {row[0]: str(self.path(row[1], row[2])) for row in rows}
+
+    def release(self, owner: str, job: Any, role: Optional[str] = None) -> int:
+        """Drop references for one job (or one role); blobs are deleted by the next `gc`."""
+        key = job_key(job)
+        where, params = "owner = ? AND job_key = ?", [owner, key]
+        if role is not None:
+            where += " AND role = ?"
+            params.append(role)
+        with self._conn() as cx:
+            hashes = [row[0] for row in cx.execute(f"SELECT hash FROM refs WHERE {where}", params)]
+            cx.execute(f"DELETE FROM refs WHERE {where}", params)
+            cx.executemany("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", [(h,) for h in hashes])
+            cx.commit()
+        return len(hashes)
+
+    def release_job(self, job: Any) -> int:
+        """Drop every owner's references to one job."""
+        key = job_key(job)
+        with self._conn() as cx:
+            hashes = [row[0] for row in cx.execute("SELECT hash FROM refs WHERE job_key = ?", (key,))]
+            cx.execute("DELETE FROM refs WHERE job_key = ?", (key,))
+            cx.executemany("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", [(h,) for h in hashes])
+            cx.commit()
+        return len(hashes)
+
+    def _delete(self, cx: sqlite3.Connection, rows) -> int:
+        freed = 0
+        for digest, ext, size in rows:
+            try:
+                self.path(digest, ext).unlink()
+            except FileNotFoundError:
+                pass
+            cx.execute("DELETE FROM refs WHERE hash = ?", (digest,))
+            cx.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+            freed += size
+        return freed
+
+    def gc(self) -> Dict[str, int]:
+        """Apply the retention policy; returns counts of deleted blobs and bytes."""
+        cutoff = (datetime.now() - self.grace).isoformat()
+        with self._conn() as cx:
+            # The grace period covers the gap between put_* and attach in another process
+            orphans = cx.execute("SELECT hash, ext, size FROM blobs WHERE refcount <= 0 AND last_used_at < ?",
+                                 (cutoff,)).fetchall()
+            freed = self._delete(cx, orphans)
+            deleted = len(orphans)
+
+            total = cx.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total > self.max_bytes:
+                placeholders = ",".join("?" * len(EVICTABLE_KINDS))
+                candidates = cx.execute(f"""
+                    SELECT hash, ext, size FROM blobs WHERE kind IN ({placeholders}) ORDER BY last_used_at
+                """, EVICTABLE_KINDS).fetchall()
+                evict = []
+                for row in candidates:
+                    if total <= self.max_bytes:
+                        break
+                    evict.append(row)
+                    total -= row[2]
+                freed += self._delete(cx, evict)
+                deleted += len(evict)
+            cx.commit()
+        return {"deleted": deleted, "freed_bytes": freed}
+
+    def _after_write(self):
+        # GC scans the index; amortize it over many writes
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.gc()
+
+    def count(self, owner: Optional[str] = None, kind: Optional[str] = None) -> int:
+        """Number of references, optionally for one owner and/or blob kind."""
+        query = "SELECT COUNT(*) FROM refs JOIN blobs ON blobs.hash = refs.hash WHERE 1 = 1"
+        params = []
+        if owner is not None:
+            query += " AND refs.owner = ?"
+            params.append(owner)
+        if kind is not None:
+            query += " AND blobs.kind = ?"
+            params.append(kind)
+        with self._conn() as cx:
+            return cx.execute(query, params).fetchone()[0]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Blob count, bytes and references per kind."""
+        with self._conn() as cx:
+            return {
+                kind: {"blobs": blobs, "bytes": size, "refs": refs}
+                for kind, blobs, size, refs in cx.execute(
+                    "SELECT kind, COUNT(*), SUM(size), SUM(refcount) FROM blobs GROUP BY kind")
+            }
+
+_store: Optional[BlobStore] = None
+_lock = threading.Lock()
+
+def get_blob_store() -> BlobStore:
+    """Shared store instance, created on first use."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = BlobStore()
+    return _store
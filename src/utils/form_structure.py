@@ -0,0 +1,430 @@
+"""Normalized structure of application forms and their ATS vendor.
+
+Employers on the same applicant tracking system (Webcruiter, Jobbnorge,
+ReachMee, ...) serve the same form over and over, but every application
+used to be analyzed from scratch by the vision model. `form_fields(html)`
+reduces a page to its ordered form controls (type, name, label, ...).
+`form_signature(fields)` hashes the parts that define the form's layout,
+so the field mapping of a form seen before can be reused:
+
+    type, name, label, in document order
+
+Iframes count as fields (their src without the query), since a form embedded
+from an ATS isn't part of the outer HTML. Names and labels are lower-cased, with whitespace collapsed and digit runs
+replaced by "#", so per-posting ids such as `question_18342` still match.
+Because of that, a reused mapping can't keep its selectors: `bind_positions`
+stores each mapped field's position in `schema_fields` order, and
+`rebind_selectors` takes selector and frame from the current form's field at
+that position.
+
+The AI form analyzer used to get the raw `page.content()` (scripts, styles,
+tracking markup) cut to a token budget. It now gets a distilled schema
+instead, usually an order of magnitude smaller:
+
+    distill_form(page)   live DOM of every frame (iframes included, like
+                         IframeFormFiller.find_form_iframe): visible controls
+                         with label, type, selector, constraints, options
+    distill_html(html)   the same schema from an HTML string (main frame only)
+    resolve_frame(page, path, url)  the Playwright Frame a field's "frame" refers to
+                         (matched on the frame URL first: child-frame indexes
+                         differ between browser sessions)
+    locate_frames()      adds "frame_url" to the fields of an analysis
+    form_schema_text()   compact JSON for the prompt
+
+    {"url": ..., "frames": [{"frame": "main/1", "url": ..., "fields": [...]}]}
+"""
+import hashlib
+import json
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+SIGNATURE_VERSION = "form-sig-v2"
+
+# Vendor -> markers found in the page URL or HTML (form actions, script/iframe sources)
+ATS_VENDORS = {
+    "webcruiter": ("webcruiter.com", "webcruiter.no"),
+    "jobbnorge": ("jobbnorge.no",),
+    "reachmee": ("reachmee.com", "attract.reachmee"),
+    "teamtailor": ("teamtailor.com", "teamtailor-cdn"),
+    "easycruit": ("easycruit.com",),
+    "workday": ("myworkdayjobs.com", "workday.com"),
+    "successfactors": ("successfactors.com", "successfactors.eu"),
+    "varbi": ("varbi.com",),
+    "hrmanager": ("hrmanager.no", "hr-manager.net"),
+}
+
+FIELD_TAGS = ("input", "textarea", "select")
+SKIPPED_INPUT_TYPES = ("hidden",)
+CONSTRAINT_ATTRS = ("maxlength", "minlength", "pattern", "min", "max", "accept", "autocomplete")
+# Fewer fields than this (e.g. only a site search box) say too little about the form to reuse a mapping
+MIN_SIGNATURE_FIELDS = 2
+
+def _normalize(text: Any) -> str:
+    return re.sub(r"\d+", "#", re.sub(r"\s+", " ", str(text or "")).strip().lower())
+
+class _FormParser(HTMLParser):
+    """Collects form controls and label texts; scripts and styles are skipped."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields: List[Dict[str, Any]] = []
+        self.labels_for: Dict[str, List[str]] = {}
+        self._label_stack: List[Dict[str, Any]] = []
+        self._select: Optional[Dict[str, Any]] = None
+        self._option_text: Optional[List[str]] = None
+        self._button: Optional[Dict[str, Any]] = None
+        self._button_text: Optional[List[str]] = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag in ("script", "style", "noscript", "template"):
+            self._skip += 1
+        elif tag == "label":
+            self._label_stack.append({"for": attrs.get("for", ""), "text": [], "fields": []})
+        elif tag in FIELD_TAGS or (tag == "button" and attrs.get("type", "submit") == "submit"):
+            self._field(tag, attrs)
+        elif tag == "option" and self._select is not None:
+            self._option_text = []
+        elif tag == "iframe" and attrs.get("src"):
+            self.fields.append({"tag": "iframe", "type": "iframe", "name": attrs["src"].split("?")[0],
+                                "id": attrs.get("id", ""), "label": attrs.get("title", ""),
+                                "placeholder": "", "required": False})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag == "label":
+            self.handle_endtag(tag)
+
+    def _field(self, tag: str, attrs: Dict[str, str]):
+        field_type = attrs.get("type", "text").lower() if tag == "input" else tag
+        if tag == "button":
+            field_type = "submit"
+        if field_type in SKIPPED_INPUT_TYPES:
+            return
+        field = {
+            "tag": tag,
+            "type": field_type,
+            "name": attrs.get("name", ""),
+            "id": attrs.get("id", ""),
+            "label": attrs.get("aria-label", ""),
+            "placeholder": attrs.get("placeholder", ""),
+            "required": "required" in attrs or attrs.get("aria-required") == "true",
+        }
+        constraints = {attr: attrs[attr] for attr in CONSTRAINT_ATTRS if attrs.get(attr)}
+        if "multiple" in attrs:
+            constraints["multiple"] = True
+        if constraints:
+            field["constraints"] = constraints
+        if tag == "select":
+            field["options"] = []
+            self._select = field
+        elif tag == "button":
+            self._button, self._button_text = field, []
+        self.fields.append(field)
+        if self._label_stack:
+            self._label_stack[-1]["fields"].append(field)
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript", "template"):
+            self._skip = max(self._skip - 1, 0)
+        elif tag == "label" and self._label_stack:
+            label = self._label_stack.pop()
+            text = " ".join("".join(label["text"]).split())
+            if label["for"]:
+                self.labels_for.setdefault(label["for"], []).append(text)
+            for field in label["fields"]:
+                field["label"] = field["label"] or text
+            if self._label_stack:
+                self._label_stack[-1]["text"].append(text)
+        elif tag == "option" and self._option_text is not None:
+            self._select["options"].append(" ".join("".join(self._option_text).split()))
+            self._option_text = None
+        elif tag == "select":
+            self._select = None
+        elif tag == "button" and self._button_text is not None:
+            self._button["label"] = self._button["label"] or " ".join("".join(self._button_text).split())
+            self._button, self._button_text = None, None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._option_text is not None:
+            self._option_text.append(data)
+        elif self._button_text is not None:
+            self._button_text.append(data)
+        elif self._label_stack:
+            self._label_stack[-1]["text"].append(data)
+
+def form_fields(html: str) -> List[Dict[str, Any]]:
+    """Ordered form controls of a page: tag, type, name, id, label, placeholder, required
+    (+ constraints, options)."""
+    parser = _FormParser()
+    try:
+        parser.feed(html or "")
+        parser.close()
+    except Exception:
+        pass  # keep whatever was parsed from malformed markup
+    for field in parser.fields:
+        if field["id"] in parser.labels_for:
+            field["label"] = field["label"] or " ".join(parser.labels_for[field["id"]])
+        field["label"] = field["label"] or field["placeholder"]
+    return parser.fields
+
+def form_signature(fields: List[Dict[str, Any]]) -> Optional[str]:
+    """Structural hash of a form, or None when there are no fields to identify it by."""
+    parts = [
+        "|".join((_normalize(field.get("type")), _normalize(field.get("name")), _normalize(field.get("label"))))
+        for field in fields
+        if field.get("type") != "submit"
+    ]
+    if len(parts) < MIN_SIGNATURE_FIELDS:
+        return None
+    return hashlib.sha256("\n".join([SIGNATURE_VERSION] + parts).encode("utf-8")).hexdigest()
+
+# Runs inside each frame; returns that frame's visible form controls
+DISTILL_JS = r"""
+() => {
+    const esc = s => (window.CSS && CSS.escape) ? CSS.escape(s) : s.replace(/["\\]/g, '\\$&');
+    const text = el => (el ? el.innerText || el.textContent || '' : '').replace(/\s+/g, ' ').trim();
+    const unique = selector => { try { return document.querySelectorAll(selector).length === 1; } catch (e) { return false; } };
+    const labelOf = el => {
+        if (el.getAttribute('aria-label')) return el.getAttribute('aria-label');
+        const by = el.getAttribute('aria-labelledby');
+        if (by) {
+            const t = by.split(/\s+/).map(id => text(document.getElementById(id))).join(' ').trim();
+            if (t) return t;
+        }
+        if (el.id) {
+            const label = document.querySelector(`label[for="${esc(el.id)}"]`);
+            if (label) return text(label);
+        }
+        const wrapping = el.closest('label');
+        if (wrapping) return text(wrapping);
+        if (el.tagName === 'BUTTON' || el.type === 'submit') return text(el) || el.value || '';
+        return el.placeholder || el.title || '';
+    };
+    const selectorOf = el => {
+        const tag = el.tagName.toLowerCase();
+        if (el.id && unique('#' + esc(el.id))) return '#' + esc(el.id);
+        const name = el.getAttribute('name');
+        if (name && unique(`${tag}[name="${esc(name)}"]`)) return `${tag}[name="${esc(name)}"]`;
+        if (name && el.value && unique(`${tag}[name="${esc(name)}"][value="${esc(el.value)}"]`))
+            return `${tag}[name="${esc(name)}"][value="${esc(el.value)}"]`;
+        const parts = [];
+        for (let node = el; node && node.nodeType === 1 && node !== document.body; node = node.parentElement) {
+            let index = 1;
+            for (let sibling = node; (sibling = sibling.previousElementSibling);)
+                if (sibling.tagName === node.tagName) index++;
+            parts.unshift(`${node.tagName.toLowerCase()}:nth-of-type(${index})`);
+        }
+        return 'body > ' + parts.join(' > ');
+    };
+    const fields = [];
+    for (const el of document.querySelectorAll('input, textarea, select, button')) {
+        const tag = el.tagName.toLowerCase();
+        const type = tag === 'input' ? (el.getAttribute('type') || 'text').toLowerCase()
+            : tag === 'button' ? (el.getAttribute('type') || 'submit').toLowerCase() : tag;
+        if (type === 'hidden' || (tag === 'button' && type !== 'submit')) continue;
+        const rect = el.getBoundingClientRect();
+        const visible = rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+        if (!visible && type !== 'file' && type !== 'checkbox' && type !== 'radio') continue;  // these are often styled away
+        const field = {tag, type, name: el.getAttribute('name') || '', id: el.id || '',
+                       label: labelOf(el).slice(0, 150), selector: selectorOf(el),
+                       required: el.required || el.getAttribute('aria-required') === 'true'};
+        if (el.placeholder) field.placeholder = el.placeholder;
+        const constraints = {};
+        for (const attr of ['maxlength', 'minlength', 'pattern', 'min', 'max', 'accept', 'autocomplete']) {
+            const value = el.getAttribute(attr);
+            if (value) constraints[attr] = value;
+        }
+        if (el.multiple) constraints.multiple = true;
+        if (Object.keys(constraints).length) field.constraints = constraints;
+        if (tag === 'select') field.options = [...el.options].slice(0, 25).map(o => text(o) || o.value);
+        if (type === 'radio' || type === 'checkbox') field.value = el.value;
+        fields.push(field);
+    }
+    return fields;
+}
+"""
+
+def frame_path(frame) -> str:
+    """Frame path such as "main" or "main/0/2": child-frame indexes from the top frame."""
+    parts = []
+    while frame.parent_frame is not None:
+        parent = frame.parent_frame
+        parts.append(str(parent.child_frames.index(frame)))
+        frame = parent
+    return "/".join(["main"] + parts[::-1])
+
+def _frame_at(page, path: Optional[str]):
+    frame = page.main_frame
+    for part in (path or "main").split("/")[1:]:
+        try:
+            frame = frame.child_frames[int(part)]
+        except (ValueError, IndexError):
+            return page.main_frame
+    return frame
+
+def resolve_frame(page, path: Optional[str], url: Optional[str] = None):
+    """Playwright Frame for a field: the frame loaded from `url` (exact, then without the query),
+    else the one at `frame_path` `path`; the main frame when neither exists.
+
+    Among several frames with the URL, the one at `path` wins.
+    """
+    by_path = _frame_at(page, path)
+    if url:
+        for key in (lambda u: u, lambda u: u.split("?")[0]):
+            matches = [frame for frame in page.frames if key(frame.url) == key(url)]
+            if matches:
+                return by_path if by_path in matches else matches[0]
+    return by_path
+
+async def distill_form(page) -> Dict[str, Any]:
+    """Form schema of a live Playwright page, across all frames that contain controls."""
+    frames = []
+    for frame in page.frames:
+        try:
+            fields = await frame.evaluate(DISTILL_JS)
+            path = frame_path(frame)
+        except Exception:
+            continue  # detached or still navigating
+        if fields:
+            frames.append({"frame": path, "url": frame.url, "fields": fields})
+    return {"url": page.url, "frames": frames}
+
+def css_escape(ident: str) -> str:
+    r"""`ident` escaped for use as a CSS identifier (the CSS.escape algorithm).
+
+    >>> print(css_escape("2fa:code.x"))
+    \32 fa\:code\.x
+    """
+    out = []
+    for i, char in enumerate(ident):
+        code = ord(char)
+        if code == 0:
+            out.append("\ufffd")
+        elif code < 0x20 or code == 0x7F or (char.isdigit() and code < 0x80
+                                              and (i == 0 or (i == 1 and ident[0] == "-"))):
+            out.append(f"\\{code:x} ")
+        elif char == "-" and len(ident) == 1:
+            out.append("\\-")
+        elif code >= 0x80 or char in "-_" or char.isalnum():
+            out.append(char)
+        else:
+            out.append("\\" + char)
+    return "".join(out)
+
+def _css_string(value: str) -> str:
+    """`value` as a double-quoted CSS string (attribute selectors)."""
+    return '"' + re.sub(r'(["\\])', r"\\\1", value).replace("\n", "\\a ") + '"'
+
+def _html_selector(field: Dict[str, Any]) -> str:
+    if field["id"]:
+        return f"#{css_escape(field['id'])}"
+    if field["name"] and field["type"] != "iframe":
+        return f'{field["tag"]}[name={_css_string(field["name"])}]'
+    if field["type"] == "iframe":
+        return f'iframe[src^={_css_string(field["name"])}]'
+    return f'{field["tag"]}[type="submit"]' if field["type"] == "submit" else field["tag"]
+
+def distill_html(html: str, url: str = "") -> Dict[str, Any]:
+    """Form schema from page HTML (no iframe contents, no visibility information)."""
+    fields = []
+    for field in form_fields(html):
+        field = {key: value for key, value in field.items() if value not in ("", None, False, [])}
+        field.setdefault("name", "")
+        field.setdefault("id", "")
+        field["selector"] = _html_selector(field)
+        fields.append(field)
+    return {"url": url, "frames": [{"frame": "main", "url": url, "fields": fields}] if fields else []}
+
+def schema_fields(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """All fields of a schema in order; each embedded frame is preceded by a field naming its URL."""
+    fields = []
+    for frame in schema.get("frames", []):
+        if frame["frame"] != "main":
+            fields.append({"type": "iframe", "name": (frame.get("url") or "").split("?")[0], "label": ""})
+        fields.extend(frame["fields"])
+    return fields
+
+def _positioned(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`schema_fields` order, each field with its frame path (iframe pseudo-fields included)."""
+    fields = []
+    for frame in schema.get("frames", []):
+        if frame["frame"] != "main":
+            fields.append({"frame": frame["frame"]})
+        fields.extend(dict(field, frame=frame["frame"]) for field in frame["fields"])
+    return fields
+
+def bind_positions(analysis: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a form analysis whose fields (and submit button) record their `position` in the schema."""
+    index = {}
+    for position, field in enumerate(_positioned(schema)):
+        if field.get("selector"):
+            index.setdefault((field["frame"], field["selector"]), position)
+            index.setdefault((None, field["selector"]), position)
+
+    def bind(entry: Dict[str, Any]) -> Dict[str, Any]:
+        position = index.get((entry.get("frame"), entry.get("selector"))) if entry.get("frame") else None
+        if position is None:
+            position = index.get((None, entry.get("selector")))
+        return dict(entry, position=position) if position is not None else dict(entry)
+
+    bound = dict(analysis)
+    bound["form_fields"] = [bind(entry) for entry in analysis.get("form_fields", [])]
+    if isinstance(analysis.get("submit_button"), dict):
+        bound["submit_button"] = bind(analysis["submit_button"])
+    return bound
+
+def rebind_selectors(analysis: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
+    """A cached analysis with selector and frame taken from the current form, by position."""
+    fields = _positioned(schema)
+
+    def rebind(entry: Dict[str, Any]) -> Dict[str, Any]:
+        entry = dict(entry)
+        position = entry.pop("position", None)
+        if position is not None and position < len(fields) and fields[position].get("selector"):
+            entry["selector"] = fields[position]["selector"]
+            entry["frame"] = fields[position]["frame"]
+        return entry
+
+    rebound = dict(analysis)
+    rebound["form_fields"] = [rebind(entry) for entry in analysis.get("form_fields", [])]
+    if isinstance(analysis.get("submit_button"), dict):
+        rebound["submit_button"] = rebind(analysis["submit_button"])
+    return rebound
+
+def locate_frames(analysis: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a form analysis whose fields (and submit button) carry the URL of their frame,
+    so `resolve_frame` finds it in a later browser session."""
+    urls = {frame["frame"]: frame.get("url") for frame in schema.get("frames", [])}
+
+    def locate(entry: Dict[str, Any]) -> Dict[str, Any]:
+        url = urls.get(entry.get("frame"))
+        return dict(entry, frame_url=url) if url else dict(entry)
+
+    located = dict(analysis)
+    located["form_fields"] = [locate(entry) for entry in analysis.get("form_fields", [])]
+    if isinstance(analysis.get("submit_button"), dict):
+        located["submit_button"] = locate(analysis["submit_button"])
+    return located
+
+def form_schema_text(schema: Dict[str, Any]) -> str:
+    """Compact JSON of the frames and their fields for the prompt (empty values dropped)."""
+    frames = [
+        {"frame": frame["frame"], "url": frame.get("url", ""),
+         "fields": [{key: value for key, value in field.items() if value not in ("", None, False, [], {})}
+                    for field in frame["fields"]]}
+        for frame in schema.get("frames", [])
+    ]
+    return json.dumps(frames, ensure_ascii=False, separators=(",", ":"))
+
+def detect_ats(html: str = "", url: str = "") -> str:
+    """ATS vendor name from the page URL or markup, or "other"."""
+    for text in (url.lower(), (html or "").lower()):
+        for vendor, markers in ATS_VENDORS.items():
+            if any(marker in text for marker in markers):
+                return vendor
+    return "other"
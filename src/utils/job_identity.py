@@ -0,0 +1,178 @@
+"""Canonical job identity and cross-source duplicate detection.
+
+Scrapers used to dedup on the raw URL string, so tracking parameters,
+trailing slashes and the same posting on both finn.no and NAV all came
+through as separate jobs (and each one later cost an AI call). Use
+`JobDedupIndex` / `dedup_jobs` before anything expensive runs downstream.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Any, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Only parameters that are tracking by definition; generic names such as `source`,
+# `ref` or `sid` can identify the posting on some ATS hosts and are kept
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "trk", "trackingid", "searchid",
+}
+TRACKING_PREFIXES = ("utm_", "_hs", "pk_")
+
+FINNKODE_RE = re.compile(r"(?:[?&]finnkode=|/job/(?:fulltime|parttime|management)?/?ad/?)(\d{6,})", re.I)
+NAV_UUID_RE = re.compile(
+    r"/stilling/([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})", re.I
+)
+
+# Legal-form suffixes and filler words that differ between sources for the same employer
+COMPANY_NOISE = {"as", "asa", "ans", "da", "sa", "ks", "nuf", "iks", "kf", "ba", "the", "og", "and"}
+
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a job URL so trivially different links compare equal."""
+    if not url:
+        return ""
+
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    host = host.split(":")[0] if host.endswith((":80", ":443")) else host
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+def extract_posting_id(url: str) -> Optional[str]:
+    """Return a source-qualified posting ID (finn:<finnkode> / nav:<uuid>) if the URL has one."""
+    if not url:
+        return None
+
+    match = FINNKODE_RE.search(url)
+    if match and "finn.no" in url.lower():
+        return f"finn:{match.group(1)}"
+
+    match = NAV_UUID_RE.search(url)
+    if match:
+        return f"nav:{match.group(1).lower()}"
+
+    return None
+
+def _normalize_text(text: str) -> List[str]:
+    """Lowercase, strip accents/punctuation and split into tokens."""
+    text = unicodedata.normalize("NFKD", text or "").lower()
+    text = text.replace("ø", "o").replace("æ", "ae").replace("å", "a")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.findall(r"[a-z0-9]+", text)
+
+def job_shingles(job: Dict[str, Any]) -> Set[str]:
+    """Title+employer+location word-bigram shingles used for near-duplicate matching."""
+    tokens = _normalize_text(job.get("title", ""))
+    tokens += [t for t in _normalize_text(job.get("company", "")) if t not in COMPANY_NOISE]
+    tokens += _normalize_text(job.get("location", ""))
+
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+def employer_key(job: Dict[str, Any]) -> str:
+    """Normalized employer name, used to block near-duplicate comparisons."""
+    return " ".join(t for t in _normalize_text(job.get("company", "")) if t not in COMPANY_NOISE)
+
+def content_fingerprint(job: Dict[str, Any]) -> Optional[str]:
+    """Stable hash of the shingle set; None when title or employer is missing."""
+    if not job.get("title") or not employer_key(job):
+        return None
+    shingles = sorted(job_shingles(job))
+    return hashlib.sha1("|".join(shingles).encode("utf-8")).hexdigest()
+
+def _same_source(a: Optional[str], b: Optional[str]) -> bool:
+    """Both posting IDs known and from the same source ("finn:1" vs "finn:2")."""
+    return bool(a and b) and a.split(":", 1)[0] == b.split(":", 1)[0]
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class JobDedupIndex:
+    """In-memory identity index: canonical URL, posting ID and content fingerprint.
+
+    `add(job)` returns True the first time a posting is seen and False for a
+    duplicate. Near-duplicates are only compared within the same employer, so
+    the check stays cheap on large scans. Content matching (fingerprint, near)
+    is for cross-source twins only: two jobs with different posting IDs from the
+    same source (e.g. two finnkodes for one role in two cities) are both kept.
+    """
+
+    def __init__(self, near_duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.keys: Set[str] = set()
+        # Posting IDs (None when unknown) registered under each fingerprint / employer
+        self.fingerprints: Dict[str, List[Optional[str]]] = {}
+        self.by_employer: Dict[str, List[Tuple[Set[str], Optional[str]]]] = {}
+        self.stats = {"seen": 0, "unique": 0, "url": 0, "posting_id": 0, "fingerprint": 0, "near": 0}
+
+    def identity(self, job: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        url = job.get("url", "")
+        return {
+            "canonical_url": canonicalize_url(url),
+            "posting_id": extract_posting_id(url),
+            "fingerprint": content_fingerprint(job),
+        }
+
+    def is_duplicate(self, job: Dict[str, Any]) -> Optional[str]:
+        """Return the reason a job is a duplicate ('url', 'posting_id', ...) or None."""
+        ident = self.identity(job)
+        if ident["canonical_url"] and f"url:{ident['canonical_url']}" in self.keys:
+            return "url"
+        if ident["posting_id"] and f"id:{ident['posting_id']}" in self.keys:
+            return "posting_id"
+        posting_id = ident["posting_id"]
+        if ident["fingerprint"] and any(not _same_source(posting_id, other)
+                                        for other in self.fingerprints.get(ident["fingerprint"], [])):
+            return "fingerprint"
+
+        employer = employer_key(job)
+        if employer and job.get("title"):
+            shingles = job_shingles(job)
+            for other, other_id in self.by_employer.get(employer, []):
+                if not _same_source(posting_id, other_id) and jaccard(shingles, other) >= self.near_duplicate_threshold:
+                    return "near"
+        return None
+
+    def add(self, job: Dict[str, Any]) -> bool:
+        """Register a job; annotate it with its identity and return False if already known."""
+        self.stats["seen"] += 1
+        reason = self.is_duplicate(job)
+        if reason:
+            self.stats[reason] += 1
+            return False
+
+        ident = self.identity(job)
+        job["canonical_url"] = ident["canonical_url"]
+        job["job_key"] = ident["posting_id"] or ident["canonical_url"]
+
+        if ident["canonical_url"]:
+            self.keys.add(f"url:{ident['canonical_url']}")
+        if ident["posting_id"]:
+            self.keys.add(f"id:{ident['posting_id']}")
+        if ident["fingerprint"]:
+            self.fingerprints.setdefault(ident["fingerprint"], []).append(ident["posting_id"])
+
+        employer = employer_key(job)
+        if employer and job.get("title"):
+            self.by_employer.setdefault(employer, []).append((job_shingles(job), ident["posting_id"]))
+
+        self.stats["unique"] += 1
+        return True
+
+def dedup_jobs(jobs: List[Dict[str, Any]], index: Optional[JobDedupIndex] = None) -> List[Dict[str, Any]]:
+    """Drop jobs without a URL and every duplicate, keeping the first occurrence."""
+    index = index or JobDedupIndex()
+    return [job for job in jobs if job.get("url") and index.add(job)]
@@ -0,0 +1,182 @@
+"""Atomic job-list output for n8n (JSON or streaming NDJSON) and an incremental reader.
+
+The scrapers hand their results to n8n through `/app/data/latest_jobs.*`.
+Files are always written to a temp file in the same directory and swapped
+in with `os.replace`, so a concurrent reader sees either the old or the new
+file, never a half-written one.
+
+Output format is picked with `JOBS_OUTPUT_FORMAT`:
+    json       - latest_jobs.json, one JSON array (default, what n8n reads today)
+    ndjson     - latest_jobs.ndjson, one job per line
+    ndjson.gz  - latest_jobs.ndjson.gz, gzip-compressed NDJSON
+
+n8n side:
+    docker exec jobbot python -m src.utils.job_output read /app/data/latest_jobs.ndjson \
+        --state /app/data/n8n_reader_state.json
+prints only the jobs that were not returned by the previous call.
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+
+DATA_DIR = Path("/app/data")
+OUTPUT_FORMATS = ("json", "ndjson", "ndjson.gz")
+
+def _open_for_format(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def _atomic_write(path: Path, write_body) -> Path:
+    """Write through a temp file in the target directory and rename it into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+
+    try:
+        if path.suffix == ".gz":
+            with open(tmp_path, "wb") as raw:
+                with gzip.open(raw, "wt", encoding="utf-8") as f:
+                    write_body(f)
+                raw.flush()
+                os.fsync(raw.fileno())
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                write_body(f)
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return path
+
+def write_jobs_ndjson(jobs: Iterable[Dict[str, Any]], path: Path, compress: bool = False) -> Path:
+    """Stream jobs one per line; `compress` appends .gz and gzips the output."""
+    path = Path(path)
+    if compress and path.suffix != ".gz":
+        path = path.with_name(path.name + ".gz")
+
+    def write_body(f):
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+
+    return _atomic_write(path, write_body)
+
+def write_jobs_json(jobs: List[Dict[str, Any]], path: Path) -> Path:
+    """Write the legacy JSON-array file atomically."""
+    return _atomic_write(Path(path), lambda f: json.dump(jobs, f, indent=2, ensure_ascii=False))
+
+def write_latest_jobs(jobs: List[Dict[str, Any]], output_format: Optional[str] = None,
+                      data_dir: Path = DATA_DIR, name: str = "latest_jobs") -> Path:
+    """Write the scraper result for n8n in the configured format and return its path.
+
+    `name` is the file stem; incremental runs write `new_jobs` so the
+    full-snapshot `latest_jobs` file keeps its meaning for existing consumers.
+    """
+    output_format = output_format or os.getenv("JOBS_OUTPUT_FORMAT", "json")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+
+    if output_format == "json":
+        return write_jobs_json(jobs, Path(data_dir) / f"{name}.json")
+    return write_jobs_ndjson(jobs, Path(data_dir) / f"{name}.ndjson",
+                             compress=output_format == "ndjson.gz")
+
+def iter_jobs_ndjson(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield jobs from an NDJSON (optionally gzipped) file, skipping blank lines."""
+    with _open_for_format(Path(path), "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+class NdjsonTailReader:
+    """Incremental reader that returns only jobs added since the last call.
+
+    Tracks the file's inode and the number of lines already consumed. When the
+    scraper swaps in a new file (new inode) the reader starts over on it, and
+    jobs it has already returned (by `job_key`/`url`) are not returned again.
+    Only complete lines are consumed, so a file still being appended to is safe.
+    """
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        state = state or {}
+        self.inode = state.get("inode")
+        self.lines_read = state.get("lines_read", 0)
+        # Insertion-ordered, so `state` can keep the most recently returned keys
+        self.seen_keys = dict.fromkeys(state.get("seen_keys", []))
+
+    def state(self, max_keys: int = 5000) -> Dict[str, Any]:
+        return {
+            "inode": self.inode,
+            "lines_read": self.lines_read,
+            "seen_keys": list(self.seen_keys)[-max_keys:],
+        }
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+
+        inode = os.stat(self.path).st_ino
+        if inode != self.inode:
+            self.inode = inode
+            self.lines_read = 0
+
+        new_jobs = []
+        with _open_for_format(self.path, "r") as f:
+            for line_no, line in enumerate(f):
+                if line_no < self.lines_read:
+                    continue
+                if not line.endswith("\n"):
+                    break  # Partial line, pick it up next time
+                self.lines_read = line_no + 1
+                if not line.strip():
+                    continue
+
+                job = json.loads(line)
+                key = job.get("job_key") or job.get("url")
+                if key in self.seen_keys:
+                    continue
+                if key:
+                    self.seen_keys[key] = None
+                new_jobs.append(job)
+
+        return new_jobs
+
+def _read_cli(args: List[str]) -> int:
+    if not args:
+        print("Usage: python -m src.utils.job_output read <file> [--state <state.json>]")
+        return 1
+
+    path = Path(args[0])
+    state_file = Path(args[args.index("--state") + 1]) if "--state" in args else None
+
+    state = {}
+    if state_file and state_file.exists():
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+
+    reader = NdjsonTailReader(path, state)
+    jobs = reader.read_new()
+
+    if state_file:
+        _atomic_write(state_file, lambda f: json.dump(reader.state(), f))
+
+    print(json.dumps(jobs, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "read":
+        sys.exit(_read_cli(sys.argv[2:]))
+    print("Usage: python -m src.utils.job_output read <file> [--state <state.json>]")
+    sys.exit(1)
@@ -0,0 +1,176 @@
+"""Compiled candidate profile shared by every resume reader.
+
+resume_loader, SimpleResumeReader, EnhancedResumeReader and the enhanced
+workflow each used to re-scan `resumes/` and re-parse every TXT/JSON/PDF
+file on each run. The merged result is now compiled once into
+`compiled_profile.json` next to the files, with a manifest of each file's
+SHA-256, size and mtime:
+
+    load_profile(resumes_dir)
+        unchanged files (same size/mtime)  -> in-memory copy, or the artifact
+                                              read from disk, no parsing
+        touched but identical bytes        -> manifest stats refreshed only
+        added/removed/edited files         -> recompiled and rewritten
+
+The artifact carries everything the readers need, including `skills_summary`,
+a ready-made prompt string.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ai_cache import file_set_hash, hash_file
+from .job_output import _atomic_write
+from .text_extraction import extract_many
+
+ARTIFACT_NAME = "compiled_profile.json"
+ARTIFACT_VERSION = 1
+SOURCE_SUFFIXES = (".txt", ".json", ".pdf", ".docx", ".doc")
+# Files we write ourselves; they must not feed back into the manifest
+GENERATED_SUFFIXES = (ARTIFACT_NAME, ".manifest.json")
+
+_memo: Dict[str, Tuple[Dict[str, Tuple[int, int]], Dict[str, Any]]] = {}
+_memo_lock = threading.Lock()
+
+def _scan(resumes_dir: Path) -> Dict[str, Tuple[int, int]]:
+    """{file name: (size, mtime_ns)} of the source files; stat only, nothing is read."""
+    stats = {}
+    try:
+        entries = list(os.scandir(resumes_dir))
+    except FileNotFoundError:
+        return stats
+    for entry in entries:
+        name = entry.name
+        if not entry.is_file() or name.startswith(".") or name.endswith(GENERATED_SUFFIXES):
+            continue
+        if name.lower().endswith(SOURCE_SUFFIXES):
+            stat = entry.stat()
+            stats[name] = (stat.st_size, stat.st_mtime_ns)
+    return stats
+
+def _manifest_stats(profile: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    files = profile.get("manifest", {}).get("files", {})
+    return {name: (meta["size"], meta["mtime_ns"]) for name, meta in files.items()}
+
+def _dedupe(items: List[Any]) -> List[str]:
+    seen = set()
+    result = []
+    for item in items:
+        key = str(item).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            result.append(str(item).strip())
+    return result
+
+def skills_summary(summary: str, technical: List[str], soft: List[str]) -> str:
+    """Skills/summary block used as the candidate part of AI prompts."""
+    return f"{summary}\n\nTechnical skills: {', '.join(technical[:10])}\nSoft skills: {', '.join(soft[:5])}"
+
+def compile_profile(resumes_dir: Path, stats: Optional[Dict[str, Tuple[int, int]]] = None,
+                    hashes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Parse every source file once and merge them into one profile dict."""
+    resumes_dir = Path(resumes_dir)
+    stats = _scan(resumes_dir) if stats is None else stats
+    hashes = hashes or {name: hash_file(resumes_dir / name) for name in stats}
+    names = sorted(stats)
+
+    unified: Dict[str, Any] = {}
+    summaries, technical, soft, all_text, processed = [], [], [], [], []
+
+    documents = [resumes_dir / name for name in names if name.lower().endswith((".pdf", ".docx", ".doc"))]
+    extracted = extract_many(documents) if documents else {}
+
+    # unified_profile.json (the ResumeAnalyzer output) is read last so it wins over older JSON exports
+    for name in sorted(names, key=lambda n: n == "unified_profile.json"):
+        path = resumes_dir / name
+        try:
+            if name.lower().endswith(".json"):
+                data = json.loads(path.read_text(encoding="utf-8"))
+                up = data.get("unified_profile") if isinstance(data, dict) else None
+                if isinstance(up, dict):
+                    unified = up
+                    if up.get("comprehensive_summary"):
+                        summaries.append(up["comprehensive_summary"])
+                    skills = up.get("comprehensive_skills") or {}
+                    technical.extend(skills.get("technical") or [])
+                    soft.extend(skills.get("soft_skills") or [])
+            elif name.lower().endswith(".txt"):
+                all_text.append(f"=== {name} ===\n{path.read_text(encoding='utf-8')}")
+            else:
+                text = extracted.get(str(path), "")
+                if text:
+                    all_text.append(f"=== {name} ===\n{text}")
+            processed.append(name)
+        except Exception as e:
+            print(f"❌ Error reading {name}: {e}")
+
+    technical, soft = _dedupe(technical), _dedupe(soft)
+    personal = unified.get("personal_info") or {}
+    summary = unified.get("comprehensive_summary") or ""
+    return {
+        "version": ARTIFACT_VERSION,
+        "compiled_at": datetime.now().isoformat(),
+        "manifest": {
+            "set_hash": file_set_hash(hashes.values()),
+            "files": {name: {"sha256": hashes[name], "size": stats[name][0], "mtime_ns": stats[name][1]}
+                      for name in names},
+        },
+        "name": personal.get("name") or "",
+        "location": personal.get("location") or "",
+        "experience_years": unified.get("total_experience_years") or 0,
+        "summary": summary,
+        "summaries": summaries,
+        "technical_skills": technical,
+        "soft_skills": soft,
+        "skills": _dedupe(technical + soft),
+        "all_text": all_text,
+        "files_processed": sorted(processed),
+        "unified_profile": unified,
+        "skills_summary": skills_summary(summary, technical, soft),
+    }
+
+def _read_artifact(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        profile = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return profile if profile.get("version") == ARTIFACT_VERSION else None
+
+def _save(resumes_dir: Path, profile: Dict[str, Any]):
+    try:
+        _atomic_write(resumes_dir / ARTIFACT_NAME,
+                      lambda f: json.dump(profile, f, ensure_ascii=False, indent=2))
+    except OSError as e:
+        print(f"⚠️ Could not save {ARTIFACT_NAME}: {e}")
+
+def load_profile(resumes_dir: Any) -> Dict[str, Any]:
+    """Compiled profile for a resumes directory, rebuilt only when its files changed."""
+    resumes_dir = Path(resumes_dir).expanduser()
+    key = str(resumes_dir.resolve())
+    stats = _scan(resumes_dir)
+
+    with _memo_lock:
+        memo = _memo.get(key)
+    if memo and memo[0] == stats:
+        return memo[1]
+
+    profile = _read_artifact(resumes_dir / ARTIFACT_NAME)
+    if profile is None or _manifest_stats(profile) != stats:
+        hashes = {name: hash_file(resumes_dir / name) for name in stats}
+        known = {name: meta["sha256"] for name, meta in (profile or {}).get("manifest", {}).get("files", {}).items()}
+        if profile is not None and known == hashes:
+            # Touched (e.g. copied again) but byte-identical: keep the compiled data
+            for name, meta in profile["manifest"]["files"].items():
+                meta["size"], meta["mtime_ns"] = stats[name]
+        else:
+            print(f"🔄 Compiling profile from {len(stats)} files in {resumes_dir}")
+            profile = compile_profile(resumes_dir, stats, hashes)
+        if resumes_dir.exists():
+            _save(resumes_dir, profile)
+
+    with _memo_lock:
+        _memo[key] = (stats, profile)
+    return profile
@@ -0,0 +1,178 @@
+"""Persistent per-search-URL scan state so scrapers only emit new postings.
+
+For every saved search URL we keep a last-seen cursor (the newest posting
+key of the last committed run), the posting keys already emitted and the
+time of the last run. Emitting is two-phase so a failure downstream never
+loses postings:
+
+    new_jobs = store.peek_new(search_url, jobs)   # nothing marked as seen yet
+    ... dedup / store / score / apply ...
+    store.commit_peeked(exclude_urls=failed)      # only after that succeeded
+
+`commit_peeked` commits everything this store instance peeked, including
+cross-source twins that `dedup_jobs` dropped afterwards, so those are not
+re-emitted on every run. Postings that were peeked but never committed come
+back on the next run.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from .db import DB_PATH
+from .job_identity import canonicalize_url, extract_posting_id
+
+# Posting keys not seen for this long are forgotten, so the table stays small
+SEEN_RETENTION_DAYS = 60
+
+def posting_key(job: Dict[str, Any]) -> Optional[str]:
+    """Stable key for a posting: job_key from the dedup index, posting ID or canonical URL."""
+    if job.get("job_key"):
+        return job["job_key"]
+    url = job.get("url", "")
+    return extract_posting_id(url) or canonicalize_url(url) or None
+
+class ScanStateStore:
+    """SQLite-backed scan state, by default stored in the shared app.db."""
+
+    def __init__(self, db_path: Path = DB_PATH):
+        self.db_path = Path(db_path)
+        # Jobs returned by peek_new and not committed yet
+        self.peeked: List[Dict[str, Any]] = []
+        self._setup()
+
+    def _conn(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _setup(self):
+        with self._conn() as cx:
+            cx.execute("""
+                CREATE TABLE IF NOT EXISTS scan_state (
+                    search_url TEXT PRIMARY KEY,
+                    cursor TEXT,
+                    last_run_at TEXT,
+                    last_total INTEGER DEFAULT 0,
+                    last_new INTEGER DEFAULT 0
+                )
+            """)
+            cx.execute("""
+                CREATE TABLE IF NOT EXISTS scan_seen (
+                    search_url TEXT NOT NULL,
+                    posting_key TEXT NOT NULL,
+                    first_seen_at TEXT NOT NULL,
+                    last_seen_at TEXT NOT NULL,
+                    PRIMARY KEY (search_url, posting_key)
+                )
+            """)
+            cx.commit()
+
+    def get_state(self, search_url: str) -> Optional[Dict[str, Any]]:
+        """Return cursor / last_run_at / counters for a search URL, or None if never scanned."""
+        with self._conn() as cx:
+            row = cx.execute(
+                "SELECT * FROM scan_state WHERE search_url = ?", (search_url,)
+            ).fetchone()
+            return dict(row) if row else None
+
+    def seen_keys(self, search_url: str) -> set:
+        with self._conn() as cx:
+            rows = cx.execute(
+                "SELECT posting_key FROM scan_seen WHERE search_url = ?", (search_url,)
+            ).fetchall()
+            return {row["posting_key"] for row in rows}
+
+    def peek_new(self, search_url: str, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Postings of a scan that were never committed; nothing new is recorded as seen.
+
+        Each job is tagged with `search_url` (if it has none) so `commit_jobs` can
+        record it later. Keys that were already committed get their last_seen_at
+        refreshed, so postings still listed aren't forgotten by the retention cleanup.
+        """
+        now = datetime.now().isoformat()
+        seen = self.seen_keys(search_url)
+
+        new_jobs = []
+        still_listed = []
+        for job in jobs:
+            job.setdefault("search_url", search_url)
+            key = posting_key(job)
+            if key and key in seen:
+                still_listed.append(key)
+                continue
+            if key:
+                seen.add(key)  # the same posting twice in one scan is emitted once
+            new_jobs.append(job)
+
+        cutoff = (datetime.now() - timedelta(days=SEEN_RETENTION_DAYS)).isoformat()
+        with self._conn() as cx:
+            cx.executemany(
+                "UPDATE scan_seen SET last_seen_at = ? WHERE search_url = ? AND posting_key = ?",
+                [(now, search_url, key) for key in still_listed],
+            )
+            cx.execute("""
+                INSERT INTO scan_state (search_url, last_run_at, last_total) VALUES (?, ?, ?)
+                ON CONFLICT (search_url) DO UPDATE SET
+                    last_run_at = excluded.last_run_at,
+                    last_total = excluded.last_total
+            """, (search_url, now, len(jobs)))
+            cx.execute(
+                "DELETE FROM scan_seen WHERE search_url = ? AND last_seen_at < ?",
+                (search_url, cutoff),
+            )
+            cx.commit()
+
+        print(f"🆕 {len(new_jobs)}/{len(jobs)} new since last scan of {search_url[:70]}")
+        self.peeked.extend(new_jobs)
+        return new_jobs
+
+    def commit_seen(self, keys: Iterable[Tuple[str, str]]):
+        """Mark (search_url, posting_key) pairs as emitted; call once downstream processing succeeded."""
+        by_url: Dict[str, List[str]] = {}
+        for search_url, key in keys:
+            if search_url and key:
+                by_url.setdefault(search_url, []).append(key)
+        if not by_url:
+            return
+
+        now = datetime.now().isoformat()
+        with self._conn() as cx:
+            for search_url, url_keys in by_url.items():
+                cx.executemany("""
+                    INSERT INTO scan_seen (search_url, posting_key, first_seen_at, last_seen_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (search_url, posting_key) DO UPDATE SET last_seen_at = excluded.last_seen_at
+                """, [(search_url, key, now, now) for key in url_keys])
+                cx.execute("""
+                    INSERT INTO scan_state (search_url, cursor, last_run_at, last_new) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (search_url) DO UPDATE SET
+                        cursor = excluded.cursor,
+                        last_new = excluded.last_new
+                """, (search_url, url_keys[0], now, len(url_keys)))
+            cx.commit()
+
+    def commit_jobs(self, jobs: List[Dict[str, Any]]):
+        """`commit_seen` for jobs returned by `peek_new`."""
+        self.commit_seen((job.get("search_url", ""), posting_key(job)) for job in jobs)
+
+    def commit_peeked(self, exclude_urls: Iterable[str] = ()):
+        """Commit every job this store peeked (deduplicated away or not), except `exclude_urls`.
+
+        Pass the URLs whose downstream processing failed so they come back next run.
+        """
+        exclude_urls = set(exclude_urls)
+        self.commit_jobs([job for job in self.peeked if job.get("url") not in exclude_urls])
+        self.peeked = []
+
+    def reset(self, search_url: Optional[str] = None):
+        """Forget state for one search URL (or all), forcing a full rescan."""
+        with self._conn() as cx:
+            if search_url:
+                cx.execute("DELETE FROM scan_state WHERE search_url = ?", (search_url,))
+                cx.execute("DELETE FROM scan_seen WHERE search_url = ?", (search_url,))
+            else:
+                cx.execute("DELETE FROM scan_state")
+                cx.execute("DELETE FROM scan_seen")
+            cx.commit()
@@ -0,0 +1,166 @@
+"""Compressed screenshots with a cropped, downscaled variant for the vision model.
+
+Form screenshots used to be two full-page PNGs per job. The whole PNG was then
+base64-encoded into the vision prompt: several MB on disk and in every
+upload, and far more image tiles than the model needs. Now:
+
+    capture_form(page, owner, job, role)
+        original  full page, SCREENSHOT_FORMAT at SCREENSHOT_QUALITY, kept for audit
+        vision    cropped to the form region (all visible inputs, padded) and
+                  downscaled to fit VISION_MAX_WIDTH x VISION_MAX_HEIGHT
+    vision_data_url(path)   data: URL for the prompt, downscaling on the fly
+                            when given an original (or any other image)
+
+Both variants are stored in the blob store as kind "screenshot" (roles
+`<role>` and `<role>_vision`). Cropping, downscaling and WebP need Pillow
+(optional). Without it, Playwright writes JPEG/PNG directly and crops with
+`clip`, and images go to the model at their captured size.
+
+Tuning (environment variables):
+    SCREENSHOT_FORMAT    jpeg | webp | png (default jpeg)
+    SCREENSHOT_QUALITY   1-100 for jpeg/webp originals (default 80)
+    VISION_MAX_WIDTH     default 1024
+    VISION_MAX_HEIGHT    default 2048
+    VISION_QUALITY       1-100 for the vision variant (default 70)
+"""
+import base64
+import io
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .blob_store import get_blob_store
+
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "jpeg").lower()
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+VISION_MAX_WIDTH = int(os.getenv("VISION_MAX_WIDTH", "1024"))
+VISION_MAX_HEIGHT = int(os.getenv("VISION_MAX_HEIGHT", "2048"))
+VISION_QUALITY = int(os.getenv("VISION_QUALITY", "70"))
+FORM_PADDING = 24
+
+EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp", "png": ".png"}
+MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp", ".png": "image/png"}
+
+# Bounding box (document coordinates) of the visible form controls, or null
+FORM_REGION_JS = """
+() => {
+    const controls = [...document.querySelectorAll(
+        'form, input:not([type=hidden]), textarea, select, button[type=submit], iframe')]
+        .map(el => el.getBoundingClientRect())
+        .filter(r => r.width > 0 && r.height > 0);
+    if (!controls.length) return null;
+    const left = Math.min(...controls.map(r => r.left)), top = Math.min(...controls.map(r => r.top));
+    const right = Math.max(...controls.map(r => r.right)), bottom = Math.max(...controls.map(r => r.bottom));
+    return {
+        x: left + window.scrollX, y: top + window.scrollY, width: right - left, height: bottom - top,
+        page_width: document.documentElement.scrollWidth,
+    };
+}
+"""
+
+def _pil():
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+def _encode(image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "png":
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, "JPEG" if fmt == "jpeg" else "WEBP", quality=quality, optimize=fmt == "jpeg")
+    return buffer.getvalue()
+
+def _downscale(image):
+    if image.width > VISION_MAX_WIDTH or image.height > VISION_MAX_HEIGHT:
+        image = image.copy()
+        image.thumbnail((VISION_MAX_WIDTH, VISION_MAX_HEIGHT))
+    return image
+
+def vision_image(data: bytes, region: Optional[Dict[str, float]] = None) -> Tuple[bytes, str]:
+    """(image bytes, extension) for the model: cropped to `region`, downscaled, re-encoded."""
+    Image = _pil()
+    if Image is None:
+        return data, ".png" if data.startswith(b"\x89PNG") else ".jpg"
+    image = Image.open(io.BytesIO(data))
+    if region:
+        # Region is in CSS pixels; the capture may be scaled by the device pixel ratio
+        scale = image.width / max(region.get("page_width") or image.width, 1)
+        box = (
+            max(int((region["x"] - FORM_PADDING) * scale), 0),
+            max(int((region["y"] - FORM_PADDING) * scale), 0),
+            min(int((region["x"] + region["width"] + FORM_PADDING) * scale), image.width),
+            min(int((region["y"] + region["height"] + FORM_PADDING) * scale), image.height),
+        )
+        if box[2] > box[0] and box[3] > box[1]:
+            image = image.crop(box)
+    fmt = "webp" if SCREENSHOT_FORMAT == "webp" else "jpeg"
+    return _encode(_downscale(image), fmt, VISION_QUALITY), EXTENSIONS[fmt]
+
+async def form_region(page) -> Optional[Dict[str, float]]:
+    try:
+        return await page.evaluate(FORM_REGION_JS)
+    except Exception:
+        return None
+
+async def capture(page, full_page: bool = True) -> Tuple[bytes, str]:
+    """(original screenshot bytes, extension) in SCREENSHOT_FORMAT."""
+    Image = _pil()
+    if SCREENSHOT_FORMAT == "png":
+        return await page.screenshot(full_page=full_page, type="png"), ".png"
+    if SCREENSHOT_FORMAT == "webp" and Image is not None:
+        # Playwright has no WebP output; re-encode its lossless PNG
+        png = await page.screenshot(full_page=full_page, type="png")
+        return _encode(Image.open(io.BytesIO(png)), "webp", SCREENSHOT_QUALITY), ".webp"
+    return await page.screenshot(full_page=full_page, type="jpeg", quality=SCREENSHOT_QUALITY), ".jpg"
+
+async def capture_page(page, owner: str, job: Any, role: str) -> str:
+    """Compressed full-page screenshot stored for (owner, job, role); returns its path."""
+    data, ext = await capture(page)
+    return get_blob_store().store(data, owner, job, role, ext=ext, kind="screenshot")
+
+async def capture_form(page, owner: str, job: Any, role: str = "form_screenshot") -> Dict[str, str]:
+    """Store the audit original and the vision variant; returns {"original": path, "vision": path}."""
+    store = get_blob_store()
+    region = await form_region(page)
+    if _pil() is not None and SCREENSHOT_FORMAT != "png":
+        # One lossless capture; both variants are encoded from it
+        png = await page.screenshot(full_page=True, type="png")
+        Image = _pil()
+        fmt = SCREENSHOT_FORMAT if SCREENSHOT_FORMAT in ("jpeg", "webp") else "jpeg"
+        original, ext = _encode(Image.open(io.BytesIO(png)), fmt, SCREENSHOT_QUALITY), EXTENSIONS[fmt]
+        vision, vision_ext = vision_image(png, region)
+    else:
+        original, ext = await capture(page)
+        if _pil() is not None:
+            vision, vision_ext = vision_image(original, region)
+        elif region:
+            clip = {
+                "x": max(region["x"] - FORM_PADDING, 0), "y": max(region["y"] - FORM_PADDING, 0),
+                "width": region["width"] + 2 * FORM_PADDING, "height": region["height"] + 2 * FORM_PADDING,
+            }
+            vision = await page.screenshot(full_page=True, clip=clip, type="jpeg", quality=VISION_QUALITY)
+            vision_ext = ".jpg"
+        else:
+            vision, vision_ext = original, ext
+
+    return {
+        "original": store.store(original, owner, job, role, ext=ext, kind="screenshot"),
+        "vision": store.store(vision, owner, job, f"{role}_vision", ext=vision_ext, kind="screenshot"),
+    }
+
+def vision_data_url(path: Any) -> str:
+    """data: URL of an image for the vision prompt, downscaled if it is larger than the vision limits."""
+    data = Path(path).read_bytes()
+    ext = Path(path).suffix.lower()
+    Image = _pil()
+    if Image is not None:
+        with Image.open(io.BytesIO(data)) as image:
+            oversized = image.width > VISION_MAX_WIDTH or image.height > VISION_MAX_HEIGHT
+        if oversized or ext == ".png":
+            data, ext = vision_image(data)
+    return f"data:{MIME_TYPES.get(ext, 'image/png')};base64,{base64.b64encode(data).decode()}"
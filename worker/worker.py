@@ -17,6 +17,8 @@ import uuid
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.utils.job_identity import JobDedupIndex, dedup_jobs
+
 try:
     from supabase import create_client, Client
 except ImportError:
@@ -321,16 +323,25 @@ class JobBotWorker:
 
             logger.info(f"📊 Found {len(jobs_list)} jobs")
 
+            # Drop duplicates before the (expensive) per-job detail extraction
+            dedup_index = JobDedupIndex()
+            jobs_with_url = [job for job in jobs_list if job.get('url')]
+            unique_jobs = dedup_jobs(jobs_with_url, dedup_index)
+            duplicates = len(jobs_with_url) - len(unique_jobs)
+            if duplicates:
+                logger.info(f"🧹 Skipped {duplicates} duplicate job(s): {dedup_index.stats}")
+            jobs_to_detail = unique_jobs + [job for job in jobs_list if not job.get('url')]
+
             # Step 2: For each job, get detailed information
             detailed_jobs = []
-            for i, job in enumerate(jobs_list, 1):
+            for i, job in enumerate(jobs_to_detail, 1):
                 job_url = job.get('url')
                 if not job_url:
                     logger.warning(f"⚠️ Job {i} has no URL, skipping detail extraction")
                     detailed_jobs.append(job)
                     continue
 
-                logger.info(f"🔍 Extracting details for job {i}/{len(jobs_list)}: {job.get('title', 'N/A')[:40]}...")
+                logger.info(f"🔍 Extracting details for job {i}/{len(jobs_to_detail)}: {job.get('title', 'N/A')[:40]}...")
 
                 detail_result = self.call_skyvern('DETAIL', job_url)
 